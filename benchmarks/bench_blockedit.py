@@ -0,0 +1,83 @@
+"""Indenting and commenting out a 10k-line selection as one bulk edit, against an `insert` per line.
+
+Each timing includes dispatching the changes to the listeners (document,
+highlighter, gutter...), and undoing the edit again.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_blockedit.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main, timed
+
+from core.blockedit import comment_edits, indent_edits
+from main import DEFAULT_EDITOR_CONFIG, MainWindow
+
+LINES = 10_000
+ITERATIONS = 5
+
+SOURCE_LINE = "    total = sum(value * {n} for value in values if value > 0)\n"
+
+
+def open_window(path):
+    window = MainWindow()
+    window.editor_config = dict(DEFAULT_EDITOR_CONFIG, diagnostics=False)
+    window.geometry("1200x900")
+    window.open_new_tab(path)
+    tab = window.current_tab
+    while tab.loading is not None:
+        window.update()
+    window.update()
+    return window, tab
+
+
+def lines_of(text_area, lines):
+    return text_area.get("1.0", f"{lines}.end").split("\n")
+
+
+@benchmark("blockedit", display=True)
+def bench_blockedit(results, quick):
+    lines, iterations = (LINES // 10, 2) if quick else (LINES, ITERATIONS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.py"
+        path.write_text("".join(SOURCE_LINE.format(n=n) for n in range(lines)))
+        window, tab = open_window(path)
+        text_area = tab.text_area
+
+        def settle(func, *args):
+            func(*args)
+            window.update_idletasks()
+
+        def undo():
+            text_area.edit_undo()
+            window.update_idletasks()
+
+        for name, make_edits in (
+            ("indent", lambda block: indent_edits(block, 1, "    ")),
+            ("comment", lambda block: comment_edits(block, 1, "#")),
+        ):
+            bulk = []
+            undos = []
+            for _ in range(iterations):
+                bulk.append(timed(settle, text_area.bulk_edit, make_edits(lines_of(text_area, lines))))
+                undos.append(timed(undo))
+            results.add(f"blockedit.{name}.bulk", bulk)
+            results.add(f"blockedit.{name}.undo", undos)
+
+        def insert_per_line(edits):
+            for start, _, text in edits:
+                text_area.insert(start, text)
+
+        start = time.perf_counter()
+        settle(insert_per_line, indent_edits(lines_of(text_area, lines), 1, "    "))
+        results.add("blockedit.indent.per_line", [(time.perf_counter() - start) * 1000])
+        window.quit_editor()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["blockedit"]))
@@ -0,0 +1,100 @@
+"""Word completion over 1M indexed words: indexing files as they load, updating while typing, and lookups.
+
+Runs without a display:
+
+    python benchmarks/bench_completion.py
+"""
+import random
+import string
+import sys
+import time
+
+from harness import benchmark, main, timed
+
+from core.words import CONTEXT, DocumentWords, WordIndex, find_words, word_context
+
+TOKENS = 1_000_000
+FILES = 20
+# distinct identifiers the files are made of
+VOCABULARY = 60_000
+PIECE = 64 * 1024  # characters, as `ui.progressiveload` inserts them
+LOOKUPS = 2000
+KEYSTROKES = 2000
+
+
+def identifiers(rng, count):
+    parts = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 7))) for _ in range(3000)]
+    names = set()
+    while len(names) < count:
+        names.add("_".join(rng.choice(parts) for _ in range(rng.randint(1, 3))))
+    return sorted(names)
+
+
+def build_files(rng, tokens):
+    vocabulary = identifiers(rng, VOCABULARY)
+    # a few names are used much more often than the rest
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    per_file = tokens // FILES
+    files = []
+    for _ in range(FILES):
+        words = rng.choices(vocabulary, weights, k=per_file)
+        lines = [" ".join(words[n:n + 8]) for n in range(0, len(words), 8)]
+        files.append("\n".join(f"    {line} = 1" for line in lines) + "\n")
+    return vocabulary, files
+
+
+def type_word(document, text, position, word):
+    """Type `word` at `position` one character at a time, the way `TextArea.event_proxy` reports it"""
+    samples = []
+    for char in word:
+        left, right = word_context(text[max(position - CONTEXT, 0):position], text[position:position + CONTEXT])
+        samples.append(timed(document.edit, left + right, left + char + right))
+        text = text[:position] + char + text[position:]
+        position += 1
+    return text, samples
+
+
+@benchmark("completion")
+def bench_completion(results, quick):
+    rng = random.Random(0)
+    tokens = TOKENS // 10 if quick else TOKENS
+    vocabulary, files = build_files(rng, tokens)
+
+    index = WordIndex()
+    documents = []
+    start = time.perf_counter()
+    for text in files:
+        document = DocumentWords(index)
+        for offset in range(0, len(text), PIECE):
+            # pieces are cut anywhere, the text around them tells what is split
+            piece = text[offset:offset + PIECE]
+            left, right = word_context(text[max(offset - CONTEXT, 0):offset], "")
+            document.edit(left + right, left + piece + right)
+        documents.append(document)
+    results.add("completion.index_files", [(time.perf_counter() - start) * 1000])
+    results.add_value("completion.tokens", index.tokens, "words")
+    results.add_value("completion.distinct", len(index), "words")
+    results.add_value("completion.memory", index.memory / 1024 / 1024, "MB")
+    assert index.tokens == sum(len(find_words(text)) for text in files)
+
+    prefixes = [word[:rng.randint(2, 4)] for word in rng.sample(vocabulary, LOOKUPS // 10 if quick else LOOKUPS)]
+    results.add("completion.lookup", [timed(index.complete, prefix) for prefix in prefixes])
+
+    # typing new words into a file, every keystroke adds one and takes the word it extends out
+    text = files[0]
+    samples = []
+    for _ in range(KEYSTROKES // 10 if quick else KEYSTROKES):
+        position = text.index("\n", rng.randrange(len(text) - 1))
+        text, typed = type_word(documents[0], text, position, " " + rng.choice(vocabulary) + "x")
+        samples.extend(typed)
+    results.add("completion.keystroke", samples)
+
+    start = time.perf_counter()
+    for document in documents:
+        document.close()
+    results.add("completion.close_all", [(time.perf_counter() - start) * 1000])
+    assert not index.words
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["completion"]))
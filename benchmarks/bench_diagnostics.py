@@ -0,0 +1,87 @@
+"""Keystroke latency editing a 50k-line Python file with diagnostics off and on, and the cost of a check.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_diagnostics.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main, timed
+
+from main import DEFAULT_EDITOR_CONFIG, MainWindow
+
+LINES = 50_000
+ITERATIONS = 300
+
+SOURCE_LINE = "    total = sum(value * {n} for value in values if value > 0)  # running total\n"
+
+
+def build_source(lines):
+    # an unused import every 100 lines, so there is something to show
+    imports = "".join(f"import module{n}\n" for n in range(lines // 100))
+    return imports + "def compute(values):\n" + "".join(SOURCE_LINE.format(n=n) for n in range(lines))
+
+
+def wait_for_check(window, view, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while view.diagnostics is None and time.perf_counter() < deadline:
+        window.update()
+        time.sleep(0.005)
+
+
+def open_window(path, diagnostics):
+    window = MainWindow()
+    window.editor_config = dict(DEFAULT_EDITOR_CONFIG, diagnostics=diagnostics)
+    window.geometry("1200x900")
+    window.open_new_tab(path)
+    tab = window.current_tab
+    while tab.loading is not None:
+        window.update()
+    window.update()
+    return window, tab
+
+
+@benchmark("diagnostics", display=True)
+def bench_diagnostics(results, quick):
+    lines, iterations = (LINES // 10, ITERATIONS // 3) if quick else (LINES, ITERATIONS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.py"
+        path.write_text(build_source(lines))
+
+        for diagnostics in (False, True):
+            name = "on" if diagnostics else "off"
+            window, tab = open_window(path, diagnostics)
+            text_area = tab.text_area
+
+            def keystroke(text):
+                text_area.insert("insert", text)
+                window.update_idletasks()
+
+            text_area.mark_set("insert", f"{lines // 2}.8")
+            text_area.see("insert")
+            window.update()
+            view = tab.diagnostics_view
+            if view is not None:
+                wait_for_check(window, view)
+                # a check of the whole file, from the document snapshot to the tags shown
+                start = time.perf_counter()
+                view.check()
+                wait_for_check(window, view)
+                results.add("diagnostics.check", [(time.perf_counter() - start) * 1000])
+                results.add("diagnostics.apply", [timed(view.show, view.diagnostics) for _ in range(10)])
+                results.add_value("diagnostics.found", len(view.diagnostics), "diag")
+                results.add("diagnostics.submit", [timed(view.check) for _ in range(10)])
+                # the worker process is still busy with the last of those checks while typing
+                view.check()
+
+            results.add(f"diagnostics.{name}.keystroke", [timed(keystroke, "x") for _ in range(iterations)])
+            results.add(f"diagnostics.{name}.newline", [timed(keystroke, "\n") for _ in range(iterations // 3)])
+            window.quit_editor()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["diagnostics"]))
@@ -0,0 +1,75 @@
+"""Keystroke-to-repaint latency and scroll throughput of a MainWindow editing a Python file.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_editor.py
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import benchmark, main, timed
+
+from main import MainWindow
+
+LINES = 50_000
+ITERATIONS = 300
+
+SOURCE_LINE = "    total = sum(value * {n} for value in values if value > 0)  # running total\n"
+
+
+def open_file(window, path):
+    window.open_new_tab(path)
+    tab = window.current_tab
+    while tab.loading is not None:
+        window.update()
+    window.update()
+    return tab
+
+
+@benchmark("editor", display=True)
+def bench_editor(results, quick):
+    lines, iterations = (LINES // 10, ITERATIONS // 3) if quick else (LINES, ITERATIONS)
+    window = MainWindow()
+    window.geometry("1200x900")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.py"
+        path.write_text("def compute(values):\n" + "".join(SOURCE_LINE.format(n=n) for n in range(lines)))
+        tab = open_file(window, path)
+        text_area = tab.text_area
+
+        # a key press is handled, then everything that follows it (gutter, highlighting,
+        # status bar) happens at idle time before the window repaints
+        def keystroke(text):
+            text_area.insert("insert", text)
+            window.update_idletasks()
+
+        text_area.mark_set("insert", f"{lines // 2}.8")
+        text_area.see("insert")
+        window.update()
+        results.add("editor.keystroke", [timed(keystroke, "x") for _ in range(iterations)])
+        results.add("editor.newline", [timed(keystroke, "\n") for _ in range(iterations // 3)])
+
+        def scroll(amount):
+            text_area.yview_scroll(amount, "units")
+            window.update_idletasks()
+
+        text_area.yview_moveto(0)
+        window.update()
+        results.add("editor.scroll_step", [timed(scroll, 3) for _ in range(iterations)])
+
+        def page(amount):
+            text_area.yview_scroll(amount, "pages")
+            window.update_idletasks()
+
+        samples = [timed(page, 1) for _ in range(iterations)]
+        results.add("editor.scroll_page", samples)
+        # pages a second when scrolling as fast as the editor keeps up
+        results.add_value("editor.scroll_throughput", 1000 * len(samples) / sum(samples), "pg/s", higher_is_better=True)
+
+    window.destroy()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["editor"]))
@@ -0,0 +1,73 @@
+"""Time-to-first-paint and total load time of the background file-open pipeline.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_fileopen.py
+"""
+import sys
+import tempfile
+import time
+import tkinter as tk
+from pathlib import Path
+
+from harness import benchmark, main
+
+from core.loader import FileLoader
+from ui.progressiveload import ProgressiveLoad
+from ui.textarea import TextArea
+
+SIZES_MB = (10, 50, 100, 200)
+
+
+def write_file(directory, size_mb):
+    path = Path(directory) / f"{size_mb}mb.txt"
+    line = "2024-01-01 12:00:00,000 INFO [worker-3] request handled in 12 ms\n"
+    block = line * (1024 * 1024 // len(line))
+    with open(path, "w", encoding="utf-8") as fp:
+        for _ in range(size_mb):
+            fp.write(block)
+    return path
+
+
+def load(root, path):
+    frame = tk.Frame(root)
+    text_area = TextArea(frame)
+    frame.pack(fill=tk.BOTH, expand=True)
+    text_area.pack(fill=tk.BOTH, expand=True)
+    root.update()
+
+    times = {}
+    start = time.perf_counter()
+
+    def on_progress(load):
+        if "first paint" not in times:
+            root.update_idletasks()
+            times["first paint"] = (time.perf_counter() - start) * 1000
+
+    def on_done(load):
+        times["total"] = (time.perf_counter() - start) * 1000
+
+    ProgressiveLoad(text_area, FileLoader(path), on_progress=on_progress, on_done=on_done)
+    while "total" not in times:
+        root.update()
+
+    frame.destroy()
+    return times
+
+
+@benchmark("fileopen", display=True)
+def bench_fileopen(results, quick):
+    root = tk.Tk()
+    root.geometry("1000x800")
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in SIZES_MB[:1] if quick else SIZES_MB:
+            path = write_file(directory, size_mb)
+            times = load(root, path)
+            results.add_value(f"fileopen.{size_mb}mb.first_paint", times["first paint"], "ms")
+            results.add_value(f"fileopen.{size_mb}mb.total", times["total"], "ms")
+            path.unlink()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["fileopen"]))
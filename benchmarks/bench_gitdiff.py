@@ -0,0 +1,89 @@
+"""Git change markers: reading the committed file, the first diff, and keeping it up to date while editing.
+
+Runs without a display, reading the committed file needs git:
+
+    python benchmarks/bench_gitdiff.py
+"""
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main, timed
+
+from core.gitdiff import HeadBlobs, LineDiff, merge_edit
+from core.piecetable import PieceTable
+
+LINES = 20_000
+# lines changed since the commit before editing starts
+CHANGED = 200
+EDITS = 500
+
+SOURCE_LINE = "    total = sum(value * {n} for value in values if value > 0)  # running total"
+
+
+def commit(directory, path, text):
+    path.write_text(text)
+    git = ["git", "-C", str(directory), "-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+    subprocess.run(git + ["init", "-q"], check=True)
+    subprocess.run(git + ["add", path.name], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "bench"], check=True)
+
+
+def edit(document, rng):
+    """Type, add or remove a line somewhere, returning what `merge_edit` needs"""
+    line = rng.randrange(document.line_count - 1)
+    offset = document.line_start(line) + 4
+    choice = rng.random()
+    if choice < 0.6:
+        document.insert(offset, "x")
+        return line, 0, 0
+    if choice < 0.8:
+        document.insert(offset, "\n    inserted = True")
+        return line, 0, 1
+    end = document.line_start(line + 1)
+    document.delete(offset, end - offset)
+    return line, 1, 0
+
+
+@benchmark("gitdiff")
+def bench_gitdiff(results, quick):
+    rng = random.Random(0)
+    lines = LINES // 10 if quick else LINES
+    text = "\n".join(SOURCE_LINE.format(n=n) for n in range(lines)) + "\n"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.py"
+        try:
+            commit(directory, path, text)
+        except (OSError, subprocess.CalledProcessError):
+            print("  git is needed to read the committed file, skipping that part")
+            base = text.split("\n")
+        else:
+            blobs = HeadBlobs()
+            start = time.perf_counter()
+            base = blobs.get(path)
+            results.add("gitdiff.read_head", [(time.perf_counter() - start) * 1000])
+            results.add("gitdiff.read_head_cached", [timed(blobs.get, path) for _ in range(20)])
+
+    document = PieceTable(text)
+    for _ in range(CHANGED):
+        edit(document, rng)
+    start = time.perf_counter()
+    diff = LineDiff(base, document.snapshot())
+    results.add("gitdiff.full_diff", [(time.perf_counter() - start) * 1000])
+    results.add_value("gitdiff.hunks", len(diff.hunks), "hunks")
+
+    # one edit per keystroke, anywhere in the file
+    samples = []
+    for _ in range(EDITS // 5 if quick else EDITS):
+        region = merge_edit(None, *edit(document, rng))
+        samples.append(timed(diff.update, document.snapshot(), region))
+    results.add("gitdiff.update", samples)
+    results.add("gitdiff.markers", [timed(diff.markers) for _ in range(20)])
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["gitdiff"]))
@@ -0,0 +1,108 @@
+"""Keystroke latency and per-page scrolling cost of the syntax highlighter.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_highlight.py
+"""
+import json
+import random
+import sys
+import time
+import tkinter as tk
+
+from harness import benchmark, main, timed
+
+from core.highlight import language_for_path
+from core.piecetable import PieceTable
+from ui.filetab import FileTab
+from ui.highlighter import SyntaxHighlighter
+from ui.textarea import TextArea
+
+ITERATIONS = 200
+
+PYTHON_BLOCK = '''
+class Handler{n}(BaseHandler):
+    """Handles requests of kind {n}.
+
+    Multi-line docstrings keep the lexer state busy.
+    """
+
+    def handle(self, request, retries=3):
+        # look the request up and answer it
+        result = self.lookup(request.key, default=None)
+        if result is None and retries > 0:
+            return self.handle(request, retries - 1)
+        return {{"status": 200, "body": f"handled {{request.key}}", "size": 0x{n:x}}}
+'''
+
+
+def python_source(lines):
+    blocks = []
+    n = 0
+    while len(blocks) * 14 < lines:
+        blocks.append(PYTHON_BLOCK.format(n=n))
+        n += 1
+    return "".join(blocks)
+
+
+def json_source(lines):
+    records = [
+        {"id": n, "name": f"record {n}", "active": n % 2 == 0, "score": n * 1.5, "tags": ["a", "b"], "parent": None}
+        for n in range(lines // 12)
+    ]
+    return json.dumps(records, indent=2)
+
+
+def measure(action, flush, iterations):
+    samples = []
+    for _ in range(iterations):
+        samples.append(timed(lambda: (action(), flush())))
+    return samples
+
+
+def run(root, results, name, filename, source, iterations):
+    tab = FileTab(root)
+    tab.text_area = TextArea(tab)
+    tab.document = PieceTable()
+    tab.text_area.add_change_listener(tab.sync_document)
+    tab.pack(fill=tk.BOTH, expand=True)
+    tab.text_area.pack(fill=tk.BOTH, expand=True)
+
+    text_area = tab.text_area
+    text_area.insert("1.0", source)
+    text_area.flush_changes()
+    root.update()
+
+    start = time.perf_counter()
+    highlighter = SyntaxHighlighter(text_area, tab.document, language_for_path(filename))
+    while highlighter.states.valid_until < tab.document.line_count:
+        root.update()
+    results.add_value(f"highlight.{name}.background_lex", (time.perf_counter() - start) * 1000, "ms")
+
+    random.seed(0)
+    text_area.mark_set("insert", f"{tab.document.line_count // 2}.4")
+    text_area.see("insert")
+    flush = text_area.flush_changes
+    results.add(f"highlight.{name}.keystroke", measure(lambda: text_area.insert("insert", "x"), flush, iterations))
+    results.add(f"highlight.{name}.newline", measure(lambda: text_area.insert("insert", "\n"), flush, iterations))
+    text_area.yview_moveto(0)
+    results.add(
+        f"highlight.{name}.scrolled_page", measure(lambda: text_area.yview_scroll(1, "pages"), flush, iterations)
+    )
+
+    highlighter.detach()
+    tab.destroy()
+
+
+@benchmark("highlight", display=True)
+def bench_highlight(results, quick):
+    lines, iterations = (20_000, ITERATIONS // 4) if quick else (200_000, ITERATIONS)
+    root = tk.Tk()
+    root.geometry("1000x1200")
+    run(root, results, "python", "bench.py", python_source(lines), iterations)
+    run(root, results, "json", "bench.json", json_source(lines), iterations)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["highlight"]))
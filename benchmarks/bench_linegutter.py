@@ -0,0 +1,86 @@
+"""LineGutter redraw cost, against the original full-rebuild redraw.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_linegutter.py
+"""
+import sys
+import tkinter as tk
+
+from harness import benchmark, main, timed
+
+from ui.linegutter import LineGutter
+from ui.textarea import TextArea
+
+LINES = 100_000
+ITERATIONS = 200
+
+
+def legacy_redraw(gutter):
+    """The redraw LineGutter shipped with before item recycling."""
+    gutter.delete("all")
+
+    i = gutter.text_area.index("@0,0")
+    while True:
+        dline = gutter.text_area.dlineinfo(i)
+        if dline is None:
+            break
+
+        y = dline[1]
+        line_num = str(i).split(".")[0]
+        gutter.create_text(2, y, anchor="nw", text=line_num, fill=gutter.foreground)
+        i = gutter.text_area.index(f"{i}+1line")
+
+
+def build_window(lines):
+    root = tk.Tk()
+    root.geometry("1000x2400")
+
+    frame = tk.Frame(root)
+    text_area = TextArea(frame, font=("Consolas", 12))
+    gutter = LineGutter(frame, text_area, width=40)
+    # the benchmark drives redraws itself
+    text_area.remove_change_listener(gutter._on_change)
+
+    frame.pack(fill=tk.BOTH, expand=True)
+    gutter.pack(side=tk.LEFT, fill=tk.Y)
+    text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    text_area.insert("1.0", "\n".join(f"line {n} of the benchmark buffer" for n in range(lines)))
+    text_area.mark_set("insert", "5000.0")
+    text_area.see("insert")
+    root.update()
+    return root, text_area, gutter
+
+
+def measure(root, redraw, action, iterations):
+    samples = []
+    for _ in range(iterations):
+        action()
+        root.update_idletasks()
+        samples.append(timed(redraw))
+    return samples
+
+
+@benchmark("linegutter", display=True)
+def bench_linegutter(results, quick):
+    iterations = ITERATIONS // 4 if quick else ITERATIONS
+    root, text_area, gutter = build_window(LINES // 10 if quick else LINES)
+
+    def keystroke():
+        text_area.insert("insert", "x")
+
+    def scroll():
+        text_area.yview_scroll(1, "units")
+
+    for name, redraw in (("legacy", lambda: legacy_redraw(gutter)), ("recycling", gutter.redraw)):
+        results.add(f"linegutter.redraw.{name}.keystroke", measure(root, redraw, keystroke, iterations))
+        results.add(f"linegutter.redraw.{name}.scroll", measure(root, redraw, scroll, iterations))
+        gutter.delete("all")
+        gutter._items, gutter._labels, gutter._positions, gutter._geometry = [], [], [], None
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["linegutter"]))
@@ -0,0 +1,76 @@
+"""A minified JSON file on one line: loading it, moving the cursor and redrawing the gutter, cut off or whole.
+
+Shown whole, the line is much shorter than the cut off one, Tk takes too
+long laying out the 20 MB one to measure it in a reasonable time.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_longlines.py
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main, timed
+
+from main import DEFAULT_EDITOR_CONFIG, MainWindow
+
+SIZE = 20 * 1024 * 1024  # characters on the line
+WHOLE_SIZE = 1024 * 1024  # characters on the line when it is shown whole
+ITERATIONS = 100
+
+
+def minified(size):
+    record = {"id": 0, "name": "item", "tags": ["alpha", "beta"], "price": 12.5, "active": True}
+    item = json.dumps(record, separators=(",", ":"))
+    return "[" + ",".join([item] * (size // (len(item) + 1))) + "]"
+
+
+def open_window(path, limit):
+    window = MainWindow()
+    window.editor_config = dict(DEFAULT_EDITOR_CONFIG, **{"long-line-limit": limit, "diagnostics": False})
+    window.geometry("1200x900")
+    start = time.perf_counter()
+    window.open_new_tab(path)
+    tab = window.current_tab
+    while tab.loading is not None:
+        window.update()
+    window.update()
+    return window, tab, (time.perf_counter() - start) * 1000
+
+
+@benchmark("longlines", display=True)
+def bench_longlines(results, quick):
+    iterations = ITERATIONS // 4 if quick else ITERATIONS
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, limit, size in (("cut", DEFAULT_EDITOR_CONFIG["long-line-limit"], SIZE), ("whole", None, WHOLE_SIZE)):
+            if quick:
+                size //= 10
+            path = Path(directory) / f"{name}.json"
+            path.write_text(minified(size))
+
+            window, tab, load = open_window(path, limit)
+            text_area = tab.text_area
+            results.add(f"longlines.{name}.load", [load])
+
+            def move(key):
+                text_area.event_generate(key, when="now")
+                window.update_idletasks()
+
+            text_area.focus_force()
+            text_area.mark_set("insert", "1.0")
+            results.add(f"longlines.{name}.cursor", [timed(move, "<Right>") for _ in range(iterations)])
+            results.add(f"longlines.{name}.line_end", [timed(move, "<End>"), timed(move, "<Home>")])
+            results.add(f"longlines.{name}.gutter", [timed(tab.line_gutter.redraw) for _ in range(iterations)])
+            results.add(f"longlines.{name}.status", [timed(window.update_index) for _ in range(iterations)])
+
+            # saving writes the whole line, not what is shown of it
+            assert len(tab.document) == path.stat().st_size
+            window.quit_editor()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["longlines"]))
@@ -0,0 +1,115 @@
+"""The minimap of a 100k-line file: rendering its tiles, and keystroke latency with it off and on.
+
+Rendering runs without a display, typing needs one, run it under Xvfb on
+headless machines:
+
+    xvfb-run python benchmarks/bench_minimap.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from harness import benchmark, main, timed
+
+from core.minimap import TILE_LINES, render_tile
+from core.piecetable import PieceTable
+from main import DEFAULT_EDITOR_CONFIG, MainWindow
+from ui.minimap import COLORS
+
+LINES = 100_000
+ITERATIONS = 300
+
+SOURCE_LINE = "    total = sum(value * {n} for value in values if value > 0)  # running total\n"
+
+
+def build_source(lines):
+    return "def compute(values):\n" + "".join(SOURCE_LINE.format(n=n) for n in range(lines))
+
+
+@benchmark("minimap.render")
+def bench_render(results, quick):
+    lines = LINES // 10 if quick else LINES
+    snapshot = PieceTable(build_source(lines)).snapshot()
+    colors = [COLORS[kind] for kind in sorted(COLORS)]
+    tiles = range(0, lines // TILE_LINES, 10 if quick else 1)
+    results.add("minimap.render_tile", [timed(render_tile, snapshot, tile, colors) for tile in tiles])
+
+
+def open_window(path, minimap):
+    window = MainWindow()
+    window.editor_config = dict(DEFAULT_EDITOR_CONFIG, minimap=minimap, diagnostics=False)
+    window.geometry("1200x900")
+    window.open_new_tab(path)
+    tab = window.current_tab
+    while tab.loading is not None:
+        window.update()
+    window.update()
+    return window, tab
+
+
+def wait_for_tiles(window, view, timeout=30):
+    deadline = time.perf_counter() + timeout
+    window.update()
+    while (view._requested or view._render_job is not None) and time.perf_counter() < deadline:
+        window.update()
+        time.sleep(0.005)
+
+
+def drag(view, window, y):
+    view._drag(SimpleNamespace(y=y))
+    window.update()
+
+
+@benchmark("minimap", display=True)
+def bench_minimap(results, quick):
+    lines, iterations = (LINES // 10, ITERATIONS // 3) if quick else (LINES, ITERATIONS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.py"
+        path.write_text(build_source(lines))
+
+        for minimap in (False, True):
+            name = "on" if minimap else "off"
+            window, tab = open_window(path, minimap)
+            text_area = tab.text_area
+            view = tab.minimap_view
+            if not minimap and view is not None:
+                # widgets made for the welcome tab, before the config was replaced
+                view.detach()
+                tab.widgets.minimap.pack_forget()
+                tab.minimap_view = view = None
+
+            def keystroke(text):
+                text_area.insert("insert", text)
+                window.update_idletasks()
+
+            text_area.mark_set("insert", f"{lines // 2}.8")
+            text_area.see("insert")
+            if view is not None:
+                start = time.perf_counter()
+                wait_for_tiles(window, view)
+                results.add("minimap.show", [(time.perf_counter() - start) * 1000])
+            window.update()
+
+            results.add(f"minimap.{name}.keystroke", [timed(keystroke, "x") for _ in range(iterations)])
+            results.add(f"minimap.{name}.newline", [timed(keystroke, "\n") for _ in range(iterations // 3)])
+            if view is not None:
+                # the tiles typed in, rendered again once typing stops
+                start = time.perf_counter()
+                wait_for_tiles(window, view)
+                results.add("minimap.rerender", [(time.perf_counter() - start) * 1000])
+                # dragging through the whole file, one scroll per motion event
+                height = text_area.winfo_height()
+                samples = []
+                view._press(SimpleNamespace(y=0))
+                for y in range(0, height, 4):
+                    samples.append(timed(drag, view, window, y))
+                view._release(None)
+                results.add("minimap.drag", samples)
+            window.quit_editor()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["minimap*"]))
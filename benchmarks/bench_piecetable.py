@@ -0,0 +1,53 @@
+"""Micro-benchmarks for the PieceTable document model on a 100 MB document.
+
+Runs without a display:
+
+    python benchmarks/bench_piecetable.py
+"""
+import random
+import sys
+
+from harness import benchmark, main, timed
+
+from core.piecetable import PieceTable
+
+SIZE = 100 * 1024 * 1024
+ITERATIONS = 10_000
+
+
+def build_text(size):
+    line = "    result = compute_something(alpha, beta, gamma)  # comment\n"
+    return line * (size // len(line))
+
+
+@benchmark("piecetable")
+def bench_piecetable(results, quick):
+    random.seed(0)
+    size, iterations = (SIZE // 10, ITERATIONS // 10) if quick else (SIZE, ITERATIONS)
+    text = build_text(size)
+
+    results.add_value("piecetable.load", timed(PieceTable, text), "ms")
+    document = PieceTable(text)
+
+    inserts, deletes, typing, offset_lookups, line_lookups, snapshots = [], [], [], [], [], []
+    for _ in range(iterations):
+        inserts.append(timed(document.insert, random.randrange(len(document)), "inserted text\n"))
+        deletes.append(timed(document.delete, random.randrange(len(document) - 16), 16))
+        offset_lookups.append(timed(document.offset_to_position, random.randrange(len(document))))
+        line_lookups.append(timed(document.line_text, random.randrange(document.line_count)))
+        snapshots.append(timed(document.snapshot))
+
+    offset = random.randrange(len(document))
+    for n in range(iterations):
+        typing.append(timed(document.insert, offset + n, "x"))
+
+    results.add("piecetable.insert", inserts)
+    results.add("piecetable.insert.typing", typing)
+    results.add("piecetable.delete", deletes)
+    results.add("piecetable.offset_to_position", offset_lookups)
+    results.add("piecetable.line_text", line_lookups)
+    results.add("piecetable.snapshot", snapshots)
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["piecetable"]))
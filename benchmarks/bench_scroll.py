@@ -0,0 +1,92 @@
+"""Flinging the wheel through a 1M-line file: frames per second and the wheel events left waiting.
+
+Wheel events are queued at the rate a fast trackpad fling sends them, and
+the event loop is run once per iteration, the way it would handle them as
+they arrive. Runs with the editor's coalescing Scroller, then with the Tk
+Text bindings scrolling once per event for comparison.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_scroll.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main
+
+from main import MainWindow
+
+LINES = 1_000_000
+EVENT_RATE = 500  # wheel events per second
+DURATION = 3.0  # s
+
+SOURCE_LINE = "value_{n} = compute({n}, scale=2)\n"
+
+
+def open_file(window, path):
+    window.open_new_tab(path)
+    tab = window.current_tab
+    while tab.loading is not None:
+        window.update()
+    window.update()
+    return tab
+
+
+def fling(window, text_area, duration):
+    """Queue wheel events at EVENT_RATE for `duration`, returning (frame times in ms, backlogs)"""
+    frames, backlogs = [], []
+    sent = 0
+    start = time.perf_counter()
+    while True:
+        now = time.perf_counter()
+        if now - start > duration:
+            break
+        # the events that came in while the last frame was busy all wait in the queue
+        due = int((now - start) * EVENT_RATE)
+        backlogs.append(due - sent)
+        for _ in range(due - sent):
+            text_area.event_generate("<MouseWheel>", delta=-120, when="tail")
+        sent = due
+        window.update()
+        frames.append((time.perf_counter() - now) * 1000)
+    return frames, backlogs
+
+
+@benchmark("scroll", display=True)
+def bench_scroll(results, quick):
+    lines = LINES // 10 if quick else LINES
+    duration = DURATION / 3 if quick else DURATION
+    window = MainWindow()
+    window.geometry("1200x900")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.py"
+        path.write_text("".join(SOURCE_LINE.format(n=n) for n in range(lines)))
+        tab = open_file(window, path)
+        text_area = tab.text_area
+        scroller = tab.widgets.scroller
+
+        for name in ("coalesced", "per_event"):
+            if name == "per_event":
+                # back to the Text class bindings, one yview per event
+                for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                    text_area.unbind(sequence)
+            text_area.yview_moveto(0)
+            window.update()
+            frames_before = scroller.frames
+            start = time.perf_counter()
+            frames, backlogs = fling(window, text_area, duration)
+            elapsed = time.perf_counter() - start
+            results.add(f"scroll.{name}.frame", frames)
+            results.add(f"scroll.{name}.backlog", backlogs, unit="ev")
+            results.add_value(f"scroll.{name}.fps", len(frames) / elapsed, "fps", higher_is_better=True)
+            if name == "coalesced":
+                results.add_value("scroll.coalesced.scrolls", scroller.frames - frames_before, "yview")
+
+    window.quit_editor()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["scroll"]))
@@ -0,0 +1,84 @@
+"""Find in files with and without the trigram index, and searching a large buffer in the background.
+
+Runs without a display:
+
+    python benchmarks/bench_search.py
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main
+
+from core.piecetable import PieceTable
+from core.search import BufferSearch, FileSearch, TrigramIndex, compile_query
+
+FILES = 5000
+LINES_PER_FILE = 200
+BUFFER_LINES = 1_000_000
+RUNS = 5
+
+WORDS = ["self", "return", "value", "index", "def", "class", "import", "None", "for", "in", "if", "else", "data"]
+
+
+def build_corpus(root, files):
+    rng = random.Random(0)
+    paths = []
+    for n in range(files):
+        lines = (" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(LINES_PER_FILE))
+        text = "\n".join(lines)
+        if n % 100 == 0:
+            text += "\nraise UnexpectedFrobnication()"
+        path = f"dir{n % 50}/file{n}.py"
+        (root / path).parent.mkdir(exist_ok=True)
+        (root / path).write_text(text)
+        paths.append(path)
+    return paths
+
+
+def run_file_search(root, paths, query, index):
+    start = time.perf_counter()
+    search = FileSearch(str(root), paths, compile_query(query), index)
+    search.done.wait()
+    return (time.perf_counter() - start) * 1000, search.files_read, search.count
+
+
+@benchmark("search")
+def bench_search(results, quick):
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        paths = build_corpus(root, FILES // 10 if quick else FILES)
+
+        # every file is read by the first search, and indexed on the way
+        index = TrigramIndex()
+        first, read, count = run_file_search(root, paths, "Frobnication", index)
+        results.add("search.files.unindexed", [first])
+
+        indexed = [run_file_search(root, paths, "Frobnication", index) for _ in range(RUNS)]
+        results.add("search.files.indexed", [ms for ms, read, count in indexed])
+        results.add_value("search.files.indexed_files_read", indexed[-1][1], "files")
+
+        start = time.perf_counter()
+        TrigramIndex().refresh(str(root), paths)
+        results.add("search.files.build_index", [(time.perf_counter() - start) * 1000])
+
+    rng = random.Random(1)
+    document = PieceTable("\n".join(" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(
+        BUFFER_LINES // 10 if quick else BUFFER_LINES
+    )))
+    first_batches, totals = [], []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        search = BufferSearch(document.snapshot(), compile_query(r"\bindex\b", regex=True), 5000, 5060)
+        search.results.get()
+        first_batches.append((time.perf_counter() - start) * 1000)
+        search.done.wait()
+        totals.append((time.perf_counter() - start) * 1000)
+    results.add("search.buffer.first_batch", first_batches)
+    results.add("search.buffer.full", totals)
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["search"]))
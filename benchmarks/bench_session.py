@@ -0,0 +1,92 @@
+"""Restoring a session of 100 tabs: time to interactive, reading the rest in the background, and opening them eagerly.
+
+Time to interactive is from creating the window until it is drawn with
+every tab header and the selected tab's file is loaded. Frames are the
+event loop turns while the other files are read, which should stay short.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_session.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main, timed
+
+from core.session import TabState, write_session
+from main import DEFAULT_EDITOR_CONFIG, MainWindow
+
+TABS = 100
+LINES = 2000  # per file
+
+SOURCE_LINE = "    total = sum(value * {n} for value in values if value > 0)  # running total\n"
+
+
+def build_files(directory, count):
+    paths = []
+    for n in range(count):
+        path = Path(directory) / f"module{n}.py"
+        path.write_text("def compute(values):\n" + "".join(SOURCE_LINE.format(n=line) for line in range(LINES)))
+        paths.append(path)
+    return paths
+
+
+def restore(session_path):
+    os.environ["CODINGG_SESSION"] = str(session_path)
+    try:
+        start = time.perf_counter()
+        window = MainWindow()
+        window.update()
+        tab = window.current_tab
+        while tab.loading is not None or not tab.materialized:
+            window.update()
+        interactive = (time.perf_counter() - start) * 1000
+    finally:
+        os.environ["CODINGG_SESSION"] = ""
+    return window, interactive
+
+
+@benchmark("session", display=True)
+def bench_session(results, quick):
+    count = TABS // 5 if quick else TABS
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = build_files(directory, count)
+        session_path = Path(directory) / "session.json"
+        states = [
+            TabState(str(path), f"{rng.randrange(LINES)}.4", (), rng.randrange(LINES), rng.randrange(10 ** 9))
+            for path in paths
+        ]
+        write_session(session_path, states, count // 2)
+
+        window, interactive = restore(session_path)
+        results.add("session.interactive", [interactive])
+        results.add_value("session.tabs", len(window.open_tabs), "tabs")
+        start = time.perf_counter()
+        frames = []
+        while window.session_loader is not None:
+            frames.append(timed(window.update))
+        results.add("session.background", [(time.perf_counter() - start) * 1000])
+        results.add("session.frame", frames or [0.0])
+        results.add("session.save", [timed(window.save_session) for _ in range(10)])
+        window.quit_editor()
+
+        # the same tabs opened one after the other, as before sessions were restored
+        window = MainWindow()
+        window.editor_config = dict(DEFAULT_EDITOR_CONFIG, **{"show-welcome": False})
+        start = time.perf_counter()
+        for path in paths:
+            window.open_new_tab(path)
+        while any(tab.loading is not None for tab in window.open_tabs):
+            window.update()
+        results.add("session.eager", [(time.perf_counter() - start) * 1000])
+        window.quit_editor()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["session"]))
@@ -0,0 +1,38 @@
+"""Cold start time: from launching the interpreter to the first idle `mainloop` iteration.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_startup.py --limit startup.cold=500
+
+The run fails when the median start time is above the limit (in ms).
+"""
+import subprocess
+import sys
+
+from harness import SRC_PATH, benchmark, main, timed
+
+RUNS = 15
+
+# runs in a fresh interpreter so every sample pays for its own imports
+STARTUP_SCRIPT = """
+from main import MainWindow
+
+window = MainWindow()
+window.after_idle(window.destroy)
+window.mainloop()
+"""
+
+
+def start_once():
+    subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=SRC_PATH, check=True)
+
+
+@benchmark("startup", display=True)
+def bench_startup(results, quick):
+    # the first start may build the icon bundle, later ones should not need Pillow
+    results.add_value("startup.first", timed(start_once), "ms")
+    results.add("startup.cold", [timed(start_once) for _ in range(RUNS // 3 if quick else RUNS)])
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["startup"]))
@@ -0,0 +1,84 @@
+"""Symbol index build, incremental updates and fuzzy go-to-symbol queries over 100k symbols.
+
+Runs without a display:
+
+    python benchmarks/bench_symbols.py
+"""
+import random
+import sys
+import time
+
+from harness import benchmark, main, timed
+
+from core.highlight import language_for_path
+from core.piecetable import PieceTable
+from core.symbols import SymbolIndex, find_symbols
+
+TABS = 100
+SYMBOLS_PER_TAB = 1000
+RUNS = 20
+
+WORDS = (
+    "get", "set", "user", "name", "file", "path", "load", "save", "index", "cache", "parse", "token", "node", "tree",
+    "view", "model", "update", "render", "event", "handler", "config", "value", "item", "list", "buffer", "line",
+)
+QUERIES = ("g", "us", "load", "getuser", "parse_tok", "rndr", "cfgval", "hndlr", "zzz", "updatemodelview")
+
+
+def build_source(rng, symbols):
+    lines = []
+    for n in range(symbols):
+        name = "_".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        if n % 10 == 0:
+            lines.append(f"class {name.title().replace('_', '')}:")
+        else:
+            lines.append(f"    def {name}(self, value):")
+        lines.extend(("        result = value", "        return result", ""))
+    return "\n".join(lines)
+
+
+def build_indexes(documents, language):
+    indexes = [SymbolIndex(language) for _ in documents]
+    for index, document in zip(indexes, documents):
+        index.build(document.snapshot())
+    for index, document in zip(indexes, documents):
+        while not index.ready:
+            index.update(document)
+            time.sleep(0.001)
+    return indexes
+
+
+@benchmark("symbols")
+def bench_symbols(results, quick):
+    rng = random.Random(0)
+    language = language_for_path("bench.py")
+    tabs = TABS // 10 if quick else TABS
+    documents = [PieceTable(build_source(rng, SYMBOLS_PER_TAB)) for _ in range(tabs)]
+
+    start = time.perf_counter()
+    indexes = build_indexes(documents, language)
+    results.add("symbols.build", [(time.perf_counter() - start) * 1000])
+
+    samples = []
+    for query in QUERIES:
+        samples.extend(timed(find_symbols, indexes, query) for _ in range(RUNS))
+    results.add("symbols.query", samples)
+
+    # typing a new method at the top of a tab: only the edited line is scanned again
+    document, index = documents[0], indexes[0]
+    samples = []
+    for n, char in enumerate("    def typed_method(self):\n" * 20):
+        offset = document.line_start(1) + n
+        samples.append(timed(_type, document, index, offset, char))
+    results.add("symbols.keystroke_update", samples)
+
+
+def _type(document, index, offset, char):
+    document.insert(offset, char)
+    line = document.offset_to_position(offset)[0]
+    index.edit(line, 0, char.count("\n"))
+    index.update(document)
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["symbols"]))
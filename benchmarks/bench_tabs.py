@@ -0,0 +1,43 @@
+"""Memory use per open tab and tab-switch latency with 500 open tabs.
+
+Needs a display, run it under Xvfb on headless machines:
+
+    xvfb-run python benchmarks/bench_tabs.py
+"""
+import random
+import sys
+
+from harness import benchmark, main, rss_mb, timed
+
+from main import MainWindow
+
+TABS = 500
+SWITCHES = 300
+TAB_TEXT = "".join(f"    value_{n} = compute(value_{n - 1}, {n})  # line {n}\n" for n in range(2000))
+
+
+@benchmark("tabs", display=True)
+def bench_tabs(results, quick):
+    tabs, switches = (TABS // 5, SWITCHES // 3) if quick else (TABS, SWITCHES)
+    window = MainWindow()
+    window.update()
+    baseline = rss_mb()
+
+    def open_tab(n):
+        window.open_new_tab(text=TAB_TEXT, title=f"tab {n}")
+        window.update()
+
+    results.add("tabs.open", [timed(open_tab, n) for n in range(tabs)])
+    results.add_value("tabs.memory_per_tab", (rss_mb() - baseline) * 1024 / tabs, "KB")
+
+    def switch(index):
+        window.notebook.select(index)
+        window.update()
+
+    random.seed(0)
+    results.add("tabs.switch", [timed(switch, random.randrange(len(window.open_tabs))) for _ in range(switches)])
+    window.destroy()
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["tabs"]))
@@ -0,0 +1,73 @@
+"""Time to first entries and full index time of the folder scanner on a synthetic 500k-file tree.
+
+Runs without a display:
+
+    python benchmarks/bench_workspace.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark, main
+
+from core.workspace import WorkspaceScanner
+
+FILES = 500_000
+TOP_DIRECTORIES = 50
+SUBDIRECTORIES = 20
+RUNS = 3
+
+
+def build_tree(root, files):
+    per_directory = files // (TOP_DIRECTORIES * SUBDIRECTORIES)
+    for top in range(TOP_DIRECTORIES):
+        for sub in range(SUBDIRECTORIES):
+            directory = root / f"package{top}" / f"module{sub}"
+            directory.mkdir(parents=True)
+            for n in range(per_directory):
+                os.close(os.open(directory / f"file{n}.py", os.O_CREAT | os.O_WRONLY))
+        # ignored through the .gitignore, never listed
+        (root / f"package{top}" / "build" / "out").mkdir(parents=True)
+    (root / ".gitignore").write_text("build/\n*.pyc\n")
+
+
+def scan(root, cache_dir):
+    """Return (ms to the first listing, ms to the full index, directories read from disk)"""
+    start = time.perf_counter()
+    scanner = WorkspaceScanner(root, cache_dir=cache_dir)
+    scanner.results.get()
+    first = (time.perf_counter() - start) * 1000
+    scanner.done.wait()
+    return first, (time.perf_counter() - start) * 1000, scanner.directories_read
+
+
+@benchmark("workspace")
+def bench_workspace(results, quick):
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "tree"
+        cache_dir = Path(directory) / "cache"
+        build_tree(root, FILES // 10 if quick else FILES)
+
+        cold = [scan(root, None) for _ in range(RUNS)]
+        results.add("workspace.cold.first_entries", [first for first, total, read in cold])
+        results.add("workspace.cold.full_index", [total for first, total, read in cold])
+
+        scan(root, cache_dir)
+        warm = [scan(root, cache_dir) for _ in range(RUNS)]
+        results.add("workspace.cached.first_entries", [first for first, total, read in warm])
+        results.add("workspace.cached.full_index", [total for first, total, read in warm])
+
+        # a few changed directories are read again, the rest comes from the cache
+        changed = []
+        for run in range(RUNS):
+            for top in range(0, TOP_DIRECTORIES, 10):
+                (root / f"package{top}" / "module0" / f"new{run}.py").touch()
+            changed.append(scan(root, cache_dir))
+        results.add("workspace.changed.full_index", [total for first, total, read in changed])
+        results.add_value("workspace.changed.directories_read", changed[-1][2], "dirs")
+
+
+if __name__ == "__main__":
+    sys.exit(main(patterns=["workspace"]))
@@ -0,0 +1,219 @@
+"""Runs the editor benchmarks and compares their results against a baseline.
+
+Every `bench_*.py` module in this directory registers its benchmarks with
+`@benchmark`. Results are written as JSON, with percentiles for every
+metric, so two runs can be compared:
+
+    xvfb-run python benchmarks/harness.py --output baseline.json
+    ... change the editor ...
+    xvfb-run python benchmarks/harness.py --baseline baseline.json
+
+The comparison exits with status 1 when a metric got slower (or bigger)
+than the baseline by more than `--threshold`, and so does a metric going
+over an absolute `--limit`. Benchmarks that need a display are skipped
+when there is none.
+"""
+import argparse
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BENCHMARKS_PATH = Path(__file__).resolve().parent
+SRC_PATH = BENCHMARKS_PATH.parent / "src"
+sys.path.insert(0, str(SRC_PATH))
+# windows opened by the benchmarks neither restore nor overwrite the session of the editor in use
+os.environ.setdefault("CODINGG_SESSION", "")
+
+# name -> (function, whether it needs a display)
+BENCHMARKS = {}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def benchmark(name, display=False):
+    """Register `func(results, quick)` to run as benchmark `name`"""
+
+    def register(func):
+        BENCHMARKS[name] = (func, display)
+        return func
+
+    return register
+
+
+def percentile(ordered, percent):
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, unit, higher_is_better=False):
+    ordered = sorted(samples)
+    summary = {
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+        "count": len(ordered),
+        "min": ordered[0],
+        "mean": statistics.mean(ordered),
+        "max": ordered[-1],
+    }
+    for percent in PERCENTILES:
+        summary[f"p{percent}"] = percentile(ordered, percent)
+    summary["median"] = summary["p50"]
+    return summary
+
+
+def timed(func, *args):
+    """Call `func(*args)`, returning how long it took in ms"""
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def rss_mb():
+    """Resident set size of this process, Linux only"""
+    with open("/proc/self/statm") as fp:
+        pages = int(fp.read().split()[1])
+    return pages * 4096 / 1024 / 1024
+
+
+class Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, samples, unit="ms", higher_is_better=False):
+        self.metrics[name] = summarize(samples, unit, higher_is_better)
+        summary = self.metrics[name]
+        print(f"  {name:<40} median {summary['median']:10.4f} {unit:<4} p95 {summary['p95']:10.4f} {unit}")
+
+    def add_value(self, name, value, unit, higher_is_better=False):
+        """Record a single measurement, like memory use"""
+        self.add(name, [value], unit, higher_is_better)
+
+    def to_json(self, quick):
+        import tkinter
+
+        return {
+            "meta": {
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "tk": tkinter.TkVersion,
+                "platform": platform.platform(),
+                "quick": quick,
+            },
+            "metrics": self.metrics,
+        }
+
+
+def load_benchmarks():
+    for path in sorted(BENCHMARKS_PATH.glob("bench_*.py")):
+        importlib.import_module(path.stem)
+
+
+def has_display():
+    import tkinter
+
+    try:
+        tkinter.Tk().destroy()
+    except tkinter.TclError:
+        return False
+    return True
+
+
+def run(patterns, quick=False):
+    """Run the benchmarks whose names match any of `patterns`"""
+    load_benchmarks()
+    display = None
+    results = Results()
+    for name, (func, needs_display) in BENCHMARKS.items():
+        if not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        if needs_display:
+            if display is None:
+                display = has_display()
+            if not display:
+                print(f"{name}: skipped, needs a display (run it under xvfb-run)")
+                continue
+        print(f"{name}:")
+        func(results, quick)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Print how `current` metrics changed since `baseline`, returning the names of regressions"""
+    regressions = []
+    print(f"\n{'metric':<42} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, summary in current["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None:
+            print(f"{name:<42} {'-':>10} {summary['median']:10.4f}      new")
+            continue
+        # medians of a single sample are noisy enough as it is, p95 is compared too when there are more
+        keys = ("median", "p95") if summary["count"] > 1 else ("median",)
+        changes = [summary[key] / old[key] - 1 if old[key] else 0.0 for key in keys]
+        if summary.get("higher_is_better"):
+            changes = [-change for change in changes]
+        # positive changes are always for the worse
+        change = max(changes)
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<42} {old['median']:10.4f} {summary['median']:10.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None, patterns=("*",)):
+    parser = argparse.ArgumentParser(description="Run the editor benchmarks.")
+    parser.add_argument("patterns", nargs="*", default=list(patterns), help="benchmark names, wildcards allowed")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer iterations")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare the results against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 is 10%%")
+    parser.add_argument(
+        "--limit",
+        action="append",
+        default=[],
+        metavar="METRIC=VALUE",
+        help="fail when the median of METRIC is above VALUE, can be given more than once",
+    )
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        load_benchmarks()
+        for name, (func, needs_display) in BENCHMARKS.items():
+            print(f"{name}{'  (display)' if needs_display else ''}")
+        return 0
+
+    results = run(args.patterns, quick=args.quick).to_json(args.quick)
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nwrote {args.output}")
+
+    status = 0
+    for limit in args.limit:
+        name, value = limit.split("=")
+        median = results["metrics"].get(name, {}).get("median")
+        if median is not None and median > float(value):
+            print(f"{name}: median {median:.3f} is above the limit of {value}")
+            status = 1
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    # the benchmark modules register with `harness`, not with this `__main__` copy of it
+    import harness
+
+    sys.exit(harness.main())
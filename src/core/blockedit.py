@@ -0,0 +1,47 @@
+"""The edits indenting, outdenting or commenting out a block of lines, for `TextArea.bulk_edit`.
+
+Every function takes the text of consecutive lines, the first of them being
+line `first` (numbered from 1 like Tk indices), and returns the
+(start, end, text) replacements to make, at most one per line. Blank lines
+are left alone.
+"""
+import re
+
+_INDENT = re.compile(r"[ \t]*")
+
+
+def indent_edits(lines, first, unit):
+    """Put `unit` (a tab or spaces) in front of every line"""
+    return [(f"{n}.0", f"{n}.0", unit) for n, line in enumerate(lines, first) if line.strip()]
+
+
+def outdent_edits(lines, first, tabsize):
+    """Take a level of indentation off every line: a tab, or up to `tabsize` spaces"""
+    edits = []
+    for n, line in enumerate(lines, first):
+        if line.startswith("\t"):
+            width = 1
+        else:
+            width = min(len(line) - len(line.lstrip(" ")), tabsize)
+        if width:
+            edits.append((f"{n}.0", f"{n}.{width}", ""))
+    return edits
+
+
+def comment_edits(lines, first, marker):
+    """Comment the lines out with the line comment `marker`, or uncomment them when all of them are"""
+    numbered = [(n, line, len(_INDENT.match(line).group())) for n, line in enumerate(lines, first) if line.strip()]
+    if not numbered:
+        return []
+    if all(line.startswith(marker, indent) for _, line, indent in numbered):
+        edits = []
+        for n, line, indent in numbered:
+            end = indent + len(marker)
+            # the space put after the marker when commenting
+            if line.startswith(" ", end):
+                end += 1
+            edits.append((f"{n}.{indent}", f"{n}.{end}", ""))
+        return edits
+    # lined up at the indentation of the least indented line, so the block keeps its shape
+    column = min(indent for _, _, indent in numbered)
+    return [(f"{n}.{column}", f"{n}.{column}", marker + " ") for n, _, _ in numbered]
@@ -0,0 +1,267 @@
+"""Syntax and lint diagnostics, computed in a pool of processes.
+
+A checker is a function `checker(text, path)` returning `Diagnostic`s for
+the text of a document (`path` is the file it came from, or None). Checkers
+are registered per language name with `register_checker`. They are called
+in another process, so they have to be defined at the top level of a module
+that process can import, and what they return has to be picklable.
+
+`DiagnosticsRunner` hands the documents to a `ProcessPoolExecutor`, so
+checking a large file never holds the GIL the Tk thread needs. It is given
+a snapshot of the document, whose text is put together in a thread of its
+own, as is sending it to the pool. Every job
+is tagged with the version of the document it checked: submitting a newer
+version cancels the job still waiting for the older one, and results of a
+version that was superseded while it ran are dropped.
+"""
+import ast
+import json
+import multiprocessing
+import sys
+import threading
+import warnings
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# severities
+ERROR = "error"
+WARNING = "warning"
+
+DEFAULT_WORKERS = 2
+
+# lines and columns are 0-based, the range ends at (end_line, end_column)
+Diagnostic = namedtuple("Diagnostic", "line column end_line end_column severity message")
+
+# language name -> checkers
+CHECKERS = {}
+
+
+def register_checker(language, checker):
+    """Run `checker` on the documents in the language named `language`"""
+    CHECKERS.setdefault(language, []).append(checker)
+
+
+def run_checkers(checkers, text, path=None):
+    """All the diagnostics of `checkers` for `text`, in the order they appear. Runs in a worker process"""
+    diagnostics = []
+    for checker in checkers:
+        diagnostics.extend(checker(text, path))
+    diagnostics.sort(key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+    return diagnostics
+
+
+def _line_end(text, line):
+    """Length of the 0-based `line` of `text`"""
+    start = 0
+    for _ in range(line):
+        start = text.find("\n", start) + 1
+        if start == 0:
+            return 0
+    end = text.find("\n", start)
+    return (len(text) if end == -1 else end) - start
+
+
+def _syntax_error(exc, text):
+    line = max((exc.lineno or 1) - 1, 0)
+    column = max((exc.offset or 1) - 1, 0)
+    end_line, end_column = line, _line_end(text, line)
+    # the exact range is only known since Python 3.10
+    if getattr(exc, "end_lineno", None) and getattr(exc, "end_offset", None):
+        end_line, end_column = exc.end_lineno - 1, exc.end_offset - 1
+    return Diagnostic(line, column, end_line, end_column, ERROR, exc.msg)
+
+
+def _warnings(caught):
+    for warning in caught:
+        if issubclass(warning.category, SyntaxWarning) and warning.lineno:
+            yield Diagnostic(warning.lineno - 1, 0, warning.lineno - 1, 0, WARNING, str(warning.message))
+
+
+def _unused_imports(tree, path):
+    # a module's package exports what it imports
+    if path is not None and str(path).endswith("__init__.py"):
+        return
+    imported = {}
+    used = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                continue
+            for alias in node.names:
+                # `import a as a` is the conventional re-export
+                if alias.name == "*" or alias.asname == alias.name:
+                    continue
+                name = alias.asname or alias.name.split(".")[0]
+                imported[name] = (node, alias)
+        elif isinstance(node, ast.Assign):
+            # names listed in __all__ count as used
+            if any(isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets):
+                if isinstance(node.value, (ast.List, ast.Tuple)):
+                    used.update(
+                        element.value for element in node.value.elts
+                        if isinstance(element, ast.Constant) and isinstance(element.value, str)
+                    )
+
+    for name, (node, alias) in imported.items():
+        if name in used:
+            continue
+        # aliases know where they are since Python 3.10
+        line = getattr(alias, "lineno", node.lineno) - 1
+        column = getattr(alias, "col_offset", node.col_offset)
+        end_line = getattr(alias, "end_lineno", None)
+        end_column = getattr(alias, "end_col_offset", None)
+        if end_line is None or end_column is None:
+            end_line, end_column = line, column + len(alias.asname or alias.name)
+        else:
+            end_line -= 1
+        yield Diagnostic(line, column, end_line, end_column, WARNING, f"'{name}' imported but unused")
+
+
+def check_python(text, path=None):
+    """Syntax errors and warnings Python reports compiling `text`, and unused imports"""
+    filename = str(path) if path is not None else "<document>"
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            tree = compile(text, filename, "exec", ast.PyCF_ONLY_AST, dont_inherit=True)
+            # some errors (like `return` outside a function) and warnings only come up generating code
+            compile(tree, filename, "exec", dont_inherit=True)
+        except SyntaxError as exc:
+            return [_syntax_error(exc, text)]
+        except ValueError as exc:
+            # source code containing null bytes
+            return [Diagnostic(0, 0, 0, 0, ERROR, str(exc))]
+    return list(_warnings(caught)) + list(_unused_imports(tree, path))
+
+
+def check_json(text, path=None):
+    """The first syntax error of a JSON document"""
+    # JSON with comments does not go through a strict parser
+    if (path is not None and str(path).endswith(".jsonc")) or not text.strip():
+        return []
+    try:
+        json.loads(text)
+    except json.JSONDecodeError as exc:
+        line, column = exc.lineno - 1, exc.colno - 1
+        return [Diagnostic(line, column, line, _line_end(text, line), ERROR, exc.msg)]
+    return []
+
+
+register_checker("Python", check_python)
+register_checker("JSON", check_json)
+
+
+class DiagnosticsRunner:
+    """Checks documents in a pool of processes, keeping only the newest result per document.
+
+    Jobs are submitted under a `key` identifying the document, with its
+    `version`. `take(key)` returns the (version, diagnostics) of the
+    newest job that finished, once.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        # key -> (version, future) of the job running for a document
+        self._jobs = {}
+        # key -> (version, diagnostics) not taken yet
+        self._results = {}
+
+    @staticmethod
+    def has_checker(language):
+        return bool(CHECKERS.get(language))
+
+    def _pool(self):
+        if self._executor is None:
+            # started on first use, and not forked: the editor is a Tk process running threads
+            if sys.version_info >= (3, 7):
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            else:
+                self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def submit(self, key, version, language, snapshot, path=None):
+        """Check the text of `snapshot` (of a `PieceTable`), replacing the job of an older version of the document"""
+        checkers = CHECKERS.get(language)
+        if not checkers:
+            return
+        self.cancel(key)
+        # stands for the job until the text is sent to the pool, and is cancelled like it
+        placeholder = Future()
+        with self._lock:
+            self._jobs[key] = (version, placeholder)
+        threading.Thread(
+            target=self._start,
+            args=(key, version, placeholder, list(checkers), snapshot, path),
+            name="diagnostics",
+            daemon=True,
+        ).start()
+
+    def _start(self, key, version, placeholder, checkers, snapshot, path):
+        text = snapshot.get_text()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job[1] is not placeholder:
+                # cancelled or superseded meanwhile
+                return
+            try:
+                future = self._pool().submit(run_checkers, checkers, text, path)
+            except BrokenProcessPool:
+                # a worker died, start over with a new pool
+                self._executor = None
+                future = self._pool().submit(run_checkers, checkers, text, path)
+            self._jobs[key] = (version, future)
+        future.add_done_callback(lambda future: self._finished(key, version, future))
+
+    def _finished(self, key, version, future):
+        # called in a thread of the executor
+        if future.cancelled():
+            return
+        try:
+            diagnostics = future.result()
+        except BrokenProcessPool:
+            self._executor = None
+            diagnostics = []
+        except Exception as exc:
+            # a checker failing is reported, not raised in the editor
+            diagnostics = [Diagnostic(0, 0, 0, 0, ERROR, f"checker failed: {exc!r}")]
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job[1] is not future:
+                # superseded by a newer version while it ran
+                return
+            del self._jobs[key]
+            self._results[key] = (version, diagnostics)
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._jobs or key in self._results
+
+    def take(self, key):
+        """(version, diagnostics) of the newest finished job for `key`, or None"""
+        with self._lock:
+            return self._results.pop(key, None)
+
+    def cancel(self, key):
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            self._results.pop(key, None)
+        # a job already running can not be stopped, its result is dropped when it finishes
+        if job is not None:
+            job[1].cancel()
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+            self._results.clear()
+        for version, future in jobs:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,227 @@
+"""Lines added, modified and deleted since the last commit, kept up to date as a document is edited.
+
+`HeadBlobs` reads the committed version of a file with `git show` once,
+and keeps it until HEAD moves. `LineDiff` holds the hunks between those
+lines and the document. After an edit only the region around it is
+compared again: the hunks it touches are replaced by the diff of that
+region, and the ones below are shifted.
+"""
+import codecs
+import difflib
+import os
+import subprocess
+import threading
+from bisect import bisect_right
+from pathlib import Path
+
+# marker kinds
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+# unchanged lines compared again around an edit, so a changed line lines up with the best match nearby
+CONTEXT = 3
+GIT_TIMEOUT = 10  # s
+
+
+def _normalize(text):
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def find_git_dir(path):
+    """The git directory of the repository holding `path`, or None"""
+    for directory in Path(path).resolve().parents:
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # worktrees and submodules point to their git directory
+            try:
+                with open(dot_git, encoding="utf-8") as fp:
+                    line = fp.readline().strip()
+            except OSError:
+                return None
+            if line.startswith("gitdir:"):
+                return (directory / line[len("gitdir:"):].strip()).resolve()
+            return None
+    return None
+
+
+def _head_stamp(git_dir):
+    # the reflog of HEAD is appended to by every commit, checkout and reset
+    for name in ("logs/HEAD", "HEAD"):
+        try:
+            return os.stat(git_dir / name).st_mtime_ns
+        except OSError:
+            continue
+    return None
+
+
+def read_head(path, encoding="utf-8"):
+    """Lines of the file at `path` as committed at HEAD, None when it is not committed"""
+    path = Path(path)
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(path.parent), "show", f"HEAD:./{path.name}"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        # no git, or it hangs
+        return None
+    if result.returncode != 0:
+        return None
+    text = codecs.decode(result.stdout, encoding, errors="replace")
+    return _normalize(text).split("\n")
+
+
+class HeadBlobs:
+    """The committed lines of files, read once per file and HEAD"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # resolved path -> (HEAD stamp, lines)
+        self._cache = {}
+
+    def get(self, path, encoding="utf-8"):
+        path = Path(path).resolve()
+        git_dir = find_git_dir(path)
+        if git_dir is None:
+            return None
+        stamp = _head_stamp(git_dir)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        lines = read_head(path, encoding)
+        with self._lock:
+            self._cache[path] = (stamp, lines)
+        return lines
+
+
+def _diff(old, new, old_start, new_start):
+    """Hunks (new start, new length, old start, old length) between the lines `old` and `new`"""
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old, new = old[prefix:len(old) - suffix], new[prefix:len(new) - suffix]
+    old_start += prefix
+    new_start += prefix
+    if not old or not new:
+        return [(new_start, len(new), old_start, len(old))] if old or new else []
+
+    matcher = difflib.SequenceMatcher(None, old, new)
+    return [
+        (new_start + j1, j2 - j1, old_start + i1, i2 - i1)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def merge_edit(region, line, removed, added):
+    """Widen the edited `region` with an edit of `line` that removed and added newlines.
+
+    `region` is (first line, end before the edits, end after the edits),
+    or None when nothing was edited yet. `line` is in the coordinates
+    after the edits so far.
+    """
+    edited_end = line + removed + 1
+    if region is None:
+        return line, edited_end, line + added + 1
+    first, old_end, new_end = region
+    if new_end > line + removed:
+        end = new_end + added - removed
+    else:
+        end = line + added + 1
+    if edited_end > new_end:
+        # the edit reaches past the region, where lines are only shifted
+        old_end = edited_end - (new_end - old_end)
+    return min(first, line), old_end, end
+
+
+class Markers:
+    """The marker kind of document lines, for hunks taken at one point in time"""
+
+    __slots__ = ("hunks", "starts", "line_count")
+
+    def __init__(self, hunks, line_count):
+        self.hunks = hunks
+        self.starts = [hunk[0] for hunk in hunks]
+        self.line_count = line_count
+
+    def __bool__(self):
+        return bool(self.hunks)
+
+    def get(self, line, default=None):
+        n = bisect_right(self.starts, line) - 1
+        if n >= 0:
+            start, length, old_start, old_length = self.hunks[n]
+            if start <= line < start + length:
+                return ADDED if not old_length else MODIFIED
+            if not length and start == line:
+                return DELETED
+        # lines deleted at the very end are shown on the last line
+        if self.hunks and line == self.line_count - 1:
+            start, length = self.hunks[-1][:2]
+            if not length and start >= self.line_count:
+                return DELETED
+        return default
+
+
+class LineDiff:
+    """Hunks between `base` (lines) and a document, see the module documentation"""
+
+    def __init__(self, base, snapshot):
+        self.base = base
+        self.line_count = snapshot.line_count
+        # (new start, new length, old start, old length), in document order
+        self.hunks = _diff(base, snapshot.get_text().split("\n"), 0, 0)
+
+    def update(self, snapshot, region):
+        """Catch up with `snapshot`, which differs from the last one within `region` (see `merge_edit`)"""
+        first, old_end, new_end = region
+        hunks = self.hunks
+        delta = new_end - old_end
+        start = max(first - CONTEXT, 0)
+        end = min(old_end + CONTEXT, self.line_count)
+
+        # the hunks touching the region are diffed again with it
+        i = 0
+        while i < len(hunks) and hunks[i][0] + hunks[i][1] < start:
+            i += 1
+        j = i
+        while j < len(hunks) and hunks[j][0] <= end:
+            j += 1
+        if j > i:
+            start = min(start, hunks[i][0])
+            end = max(end, hunks[j - 1][0] + hunks[j - 1][1])
+
+        # lines outside of the region are unchanged, shifted by the hunks before them
+        offset = 0
+        if i:
+            before = hunks[i - 1]
+            offset = before[2] + before[3] - before[0] - before[1]
+        old_first = start + offset
+        if j > i:
+            last = hunks[j - 1]
+            offset = last[2] + last[3] - last[0] - last[1]
+        old_last = end + offset
+
+        end += delta
+        if end > start:
+            text = snapshot.get_text(snapshot.line_start(start), snapshot.line_end(end - 1))
+            new = text.split("\n")
+        else:
+            new = []
+        replacement = _diff(self.base[old_first:old_last], new, old_first, start)
+        shifted = [(hunk[0] + delta,) + hunk[1:] for hunk in hunks[j:]]
+        self.hunks = hunks[:i] + replacement + shifted
+        self.line_count = snapshot.line_count
+
+    def markers(self):
+        return Markers(self.hunks, self.line_count)
@@ -0,0 +1,486 @@
+import re
+from pathlib import Path
+
+# token kinds, every one of them gets its own tag in the TextArea
+COMMENT = "comment"
+STRING = "string"
+KEYWORD = "keyword"
+BUILTIN = "builtin"
+NUMBER = "number"
+DEFINITION = "definition"
+
+KINDS = (COMMENT, STRING, KEYWORD, BUILTIN, NUMBER, DEFINITION)
+
+NUMBER_PATTERN = r"\b(?:0[xXbBoO][0-9a-fA-F_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)\b"
+
+
+def words(*words):
+    return r"\b(?:%s)\b" % "|".join(words)
+
+
+def quoted(quote):
+    """A single-line string delimited by `quote`, running to the end of the line when unterminated"""
+    quote = re.escape(quote)
+    return rf"{quote}(?:[^{quote}\\]|\\.)*(?:{quote}|$)"
+
+
+C_LIKE_KEYWORDS = (
+    "if", "else", "for", "while", "do", "switch", "case", "default", "break", "continue", "return", "goto",
+    "struct", "union", "enum", "typedef", "const", "static", "extern", "sizeof", "void", "char", "short",
+    "int", "long", "float", "double", "signed", "unsigned", "volatile", "inline",
+)
+
+
+class Language:
+    """Lexical rules for one language.
+
+    `rules` is a sequence of (kind, pattern) pairs tried in order on a single
+    line. `blocks` are (kind, start, end) patterns for constructs that may
+    span lines, such as block comments and multi-line strings; they take
+    precedence over `rules`.
+    """
+
+    def __init__(self, name, extensions, rules, blocks=(), line_comment=None):
+        self.name = name
+        self.extensions = extensions
+        self.rules = rules
+        self.blocks = blocks
+        self.line_comment = line_comment
+        self._lexer = None
+
+    @property
+    def lexer(self):
+        # compiling the patterns is deferred until a file of this language is opened
+        if self._lexer is None:
+            self._lexer = Lexer(self)
+        return self._lexer
+
+
+class Lexer:
+    """Splits lines into (start, end, kind) tokens.
+
+    The state passed between lines is None outside multi-line constructs, or
+    the index of the block the line ends in.
+    """
+
+    def __init__(self, language):
+        patterns = []
+        self._kinds = {}
+        self._blocks = []
+        for n, (kind, start, end) in enumerate(language.blocks):
+            patterns.append(f"(?P<b{n}>{start})")
+            self._blocks.append((kind, re.compile(end)))
+        for n, (kind, pattern) in enumerate(language.rules):
+            patterns.append(f"(?P<r{n}>{pattern})")
+            self._kinds[f"r{n}"] = kind
+        self._regex = re.compile("|".join(patterns) or "(?!)")
+
+    def tokenize(self, line, state=None):
+        """Return the tokens on `line` and the state at the end of it"""
+        tokens = []
+        position = 0
+        if state is not None:
+            kind, end_regex = self._blocks[state]
+            match = end_regex.search(line)
+            if match is None:
+                return ([(0, len(line), kind)] if line else []), state
+            tokens.append((0, match.end(), kind))
+            position = match.end()
+
+        search = self._regex.search
+        while True:
+            match = search(line, position)
+            if match is None:
+                return tokens, None
+
+            name = match.lastgroup
+            start, end = match.span()
+            if name[0] == "b":
+                block = int(name[1:])
+                kind, end_regex = self._blocks[block]
+                closing = end_regex.search(line, end)
+                if closing is None:
+                    tokens.append((start, len(line), kind))
+                    return tokens, block
+                end = closing.end()
+            else:
+                kind = self._kinds[name]
+
+            if end == start:
+                position = end + 1
+                continue
+            tokens.append((start, end, kind))
+            position = end
+
+
+class LineStates:
+    """Cache of the lexer state at the start of every line of a document.
+
+    `states[:valid_until]` are known to be correct. After an edit, lines are
+    re-lexed from the edit onwards until the state at the start of a line
+    matches the one cached before the edit, at which point the rest of the
+    cache is known to be correct again.
+    """
+
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.states = [None]
+        self.valid_until = 1
+        # cached states in [clean_from, candidate_until) were correct before the
+        # pending edits, and are correct again once re-lexing reproduces one of them
+        self.clean_from = 0
+        self.candidate_until = 1
+
+    def edit(self, line, removed, added):
+        """Account for an edit on `line` that removed `removed` and added `added` line breaks"""
+        first = line + 1
+        delta = added - removed
+        if first <= len(self.states):
+            self.states[first:first + removed] = [None] * added
+
+        if self.candidate_until > first + removed:
+            self.candidate_until += delta
+        else:
+            self.candidate_until = min(self.candidate_until, first)
+        if self.clean_from > first + removed:
+            self.clean_from += delta
+        self.clean_from = max(self.clean_from, first + added)
+        self.valid_until = min(self.valid_until, first)
+
+    def _settle(self):
+        # only once every candidate was re-lexed: the ones past `valid_until` may be stale since an edit
+        if self.valid_until >= self.candidate_until:
+            self.clean_from = 0
+            self.candidate_until = max(self.candidate_until, self.valid_until)
+
+    def update(self, get_line, last_line):
+        """Make the states correct up to and including `last_line`, lexing lines from `get_line(n)`"""
+        states = self.states
+        while self.valid_until <= last_line:
+            line = self.valid_until - 1
+            _, state = self.lexer.tokenize(get_line(line), states[line])
+            following = line + 1
+            if following < len(states):
+                if self.clean_from <= following < self.candidate_until and states[following] == state:
+                    # converged with the states from before the edits
+                    self.valid_until = self.candidate_until
+                    continue
+                states[following] = state
+                # lexed from the current text, no longer a state from before the edits
+                self.clean_from = max(self.clean_from, following + 1)
+            else:
+                states.append(state)
+            self.valid_until = following + 1
+        self._settle()
+
+    def merge(self, first_line, states):
+        """Store states for the lines following `first_line`, computed elsewhere from the current text"""
+        end = first_line + 1 + len(states)
+        self.states[first_line + 1:end] = states
+        self.valid_until = max(self.valid_until, end)
+        self.clean_from = max(self.clean_from, end)
+        self._settle()
+
+
+def lex_states(lexer, lines, state):
+    """Return the states at the start of each line following `lines`, starting in `state`"""
+    tokenize = lexer.tokenize
+    states = []
+    for line in lines:
+        state = tokenize(line, state)[1]
+        states.append(state)
+    return states
+
+
+C_BLOCK_COMMENT = (COMMENT, r"/\*", r"\*/")
+C_RULES = (
+    (COMMENT, r"//.*"),
+    (STRING, quoted('"')),
+    (STRING, quoted("'")),
+    (NUMBER, NUMBER_PATTERN),
+)
+
+LANGUAGES = (
+    Language(
+        "Python", (".py", ".pyw", ".pyi"),
+        (
+            (COMMENT, r"#.*"),
+            (STRING, r"[rRbBuUfF]{0,2}" + quoted('"')),
+            (STRING, r"[rRbBuUfF]{0,2}" + quoted("'")),
+            (DEFINITION, r"(?<=\bdef )\w+|(?<=\bclass )\w+"),
+            (KEYWORD, words(
+                "False", "None", "True", "and", "as", "assert", "async", "await", "break", "class", "continue",
+                "def", "del", "elif", "else", "except", "finally", "for", "from", "global", "if", "import", "in",
+                "is", "lambda", "nonlocal", "not", "or", "pass", "raise", "return", "try", "while", "with", "yield",
+            )),
+            (BUILTIN, words(
+                "print", "len", "range", "self", "cls", "super", "isinstance", "int", "str", "float", "list",
+                "dict", "set", "tuple", "bool", "open", "enumerate", "zip", "map", "filter", "object", "type",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=((STRING, r'[rRbBuUfF]{0,2}"""', r'"""'), (STRING, r"[rRbBuUfF]{0,2}'''", r"'''")),
+        line_comment="#",
+    ),
+    Language(
+        "JavaScript", (".js", ".mjs", ".cjs", ".jsx", ".ts", ".tsx"),
+        C_RULES[:3] + (
+            (STRING, quoted("`")),
+            (DEFINITION, r"(?<=\bfunction )\w+|(?<=\bclass )\w+"),
+            (KEYWORD, words(
+                "var", "let", "const", "function", "return", "if", "else", "for", "while", "do", "switch", "case",
+                "default", "break", "continue", "new", "delete", "typeof", "instanceof", "in", "of", "class",
+                "extends", "super", "this", "import", "export", "from", "async", "await", "yield", "try", "catch",
+                "finally", "throw", "null", "undefined", "true", "false", "static", "get", "set",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "HTML", (".html", ".htm", ".xml", ".svg"),
+        (
+            (KEYWORD, r"</?[\w:-]+|/?>"),
+            (BUILTIN, r"[\w:-]+(?==)"),
+            (STRING, quoted('"')),
+            (STRING, quoted("'")),
+        ),
+        blocks=((COMMENT, r"<!--", r"-->"),),
+    ),
+    Language(
+        "CSS", (".css", ".scss", ".less"),
+        (
+            (STRING, quoted('"')),
+            (STRING, quoted("'")),
+            (KEYWORD, r"@[\w-]+|![\w]+"),
+            (BUILTIN, r"[\w-]+(?=\s*:)"),
+            (NUMBER, r"#[0-9a-fA-F]{3,8}\b|-?\d*\.?\d+(?:px|em|rem|%|vh|vw|s|ms|deg)?"),
+            (DEFINITION, r"[.#][\w-]+"),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+    ),
+    Language(
+        "Markdown", (".md", ".markdown"),
+        (
+            (KEYWORD, r"^#{1,6}\s.*"),
+            (STRING, r"`[^`]+`"),
+            (BUILTIN, r"\*\*[^*]+\*\*|__[^_]+__"),
+            (DEFINITION, r"\[[^\]]+\](?=\()"),
+            (NUMBER, r"^\s*(?:[-*+]|\d+\.)(?=\s)"),
+        ),
+        blocks=((STRING, r"^```", r"^```"), (COMMENT, r"<!--", r"-->")),
+    ),
+    Language(
+        "PHP", (".php",),
+        C_RULES + (
+            (COMMENT, r"#.*"),
+            (BUILTIN, r"\$\w+"),
+            (DEFINITION, r"(?<=\bfunction )\w+|(?<=\bclass )\w+"),
+            (KEYWORD, words(
+                "abstract", "and", "array", "as", "break", "case", "catch", "class", "const", "continue",
+                "default", "do", "echo", "else", "elseif", "extends", "final", "finally", "for", "foreach",
+                "function", "global", "if", "implements", "include", "instanceof", "interface", "namespace", "new",
+                "or", "private", "protected", "public", "require", "return", "static", "switch", "throw", "trait",
+                "try", "use", "var", "while", "null", "true", "false",
+            )),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "Java", (".java", ".kt"),
+        C_RULES + (
+            (BUILTIN, r"@\w+"),
+            (DEFINITION, r"(?<=\bclass )\w+|(?<=\binterface )\w+"),
+            (KEYWORD, words(
+                "abstract", "boolean", "byte", "catch", "class", "extends", "final", "finally", "implements",
+                "import", "instanceof", "interface", "native", "new", "package", "private", "protected", "public",
+                "super", "synchronized", "this", "throw", "throws", "try", "var", "null", "true", "false",
+                *C_LIKE_KEYWORDS,
+            )),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "C", (".c", ".h"),
+        C_RULES + (
+            (BUILTIN, r"^\s*#\s*\w+"),
+            (KEYWORD, words("NULL", "true", "false", "bool", *C_LIKE_KEYWORDS)),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "C++", (".cpp", ".cc", ".cxx", ".hpp", ".hh", ".hxx"),
+        C_RULES + (
+            (BUILTIN, r"^\s*#\s*\w+"),
+            (DEFINITION, r"(?<=\bclass )\w+|(?<=\bnamespace )\w+"),
+            (KEYWORD, words(
+                "auto", "bool", "catch", "class", "constexpr", "delete", "explicit", "false", "friend",
+                "namespace", "new", "noexcept", "nullptr", "operator", "override", "private", "protected",
+                "public", "template", "this", "throw", "true", "try", "typename", "using", "virtual",
+                *C_LIKE_KEYWORDS,
+            )),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "C#", (".cs",),
+        C_RULES + (
+            (BUILTIN, r"^\s*#\s*\w+"),
+            (DEFINITION, r"(?<=\bclass )\w+|(?<=\binterface )\w+|(?<=\bnamespace )[\w.]+"),
+            (KEYWORD, words(
+                "abstract", "async", "await", "base", "bool", "byte", "catch", "class", "decimal", "delegate",
+                "event", "false", "finally", "foreach", "get", "in", "interface", "internal", "is", "namespace",
+                "new", "null", "object", "out", "override", "private", "protected", "public", "readonly", "ref",
+                "sealed", "set", "string", "this", "throw", "true", "try", "using", "var", "virtual",
+                *C_LIKE_KEYWORDS,
+            )),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "Go", (".go",),
+        C_RULES[:3] + (
+            (STRING, r"`[^`]*`"),
+            (DEFINITION, r"(?<=\bfunc )\w+|(?<=\btype )\w+"),
+            (KEYWORD, words(
+                "break", "case", "chan", "const", "continue", "default", "defer", "else", "fallthrough", "for",
+                "func", "go", "goto", "if", "import", "interface", "map", "package", "range", "return", "select",
+                "struct", "switch", "type", "var", "nil", "true", "false",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "Ruby", (".rb", ".rake", ".gemspec"),
+        (
+            (COMMENT, r"#.*"),
+            (STRING, quoted('"')),
+            (STRING, quoted("'")),
+            (BUILTIN, r":\w+|@{1,2}\w+"),
+            (DEFINITION, r"(?<=\bdef )[\w.?!]+|(?<=\bclass )\w+|(?<=\bmodule )\w+"),
+            (KEYWORD, words(
+                "alias", "and", "begin", "break", "case", "class", "def", "defined", "do", "else", "elsif", "end",
+                "ensure", "false", "for", "if", "in", "module", "next", "nil", "not", "or", "redo", "rescue",
+                "retry", "return", "self", "super", "then", "true", "undef", "unless", "until", "when", "while",
+                "yield",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=((COMMENT, r"^=begin", r"^=end"),),
+        line_comment="#",
+    ),
+    Language(
+        "Rust", (".rs",),
+        (
+            (COMMENT, r"//.*"),
+            (STRING, quoted('"')),
+            (STRING, r"'(?:[^'\\]|\\.)'"),
+            (BUILTIN, r"\w+!|#!?\[[^\]]*\]"),
+            (DEFINITION, r"(?<=\bfn )\w+|(?<=\bstruct )\w+|(?<=\benum )\w+|(?<=\btrait )\w+"),
+            (KEYWORD, words(
+                "as", "async", "await", "break", "const", "continue", "crate", "dyn", "else", "enum", "extern",
+                "false", "fn", "for", "if", "impl", "in", "let", "loop", "match", "mod", "move", "mut", "pub", "ref",
+                "return", "self", "Self", "static", "struct", "super", "trait", "true", "type", "unsafe", "use",
+                "where", "while",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=(C_BLOCK_COMMENT,),
+        line_comment="//",
+    ),
+    Language(
+        "Swift", (".swift",),
+        C_RULES[:2] + (
+            (BUILTIN, r"@\w+"),
+            (DEFINITION, r"(?<=\bfunc )\w+|(?<=\bclass )\w+|(?<=\bstruct )\w+|(?<=\bprotocol )\w+"),
+            (KEYWORD, words(
+                "as", "associatedtype", "break", "case", "catch", "class", "continue", "default", "defer", "do",
+                "else", "enum", "extension", "fallthrough", "false", "for", "func", "guard", "if", "import", "in",
+                "init", "inout", "is", "let", "nil", "private", "protocol", "public", "repeat", "return", "self",
+                "static", "struct", "subscript", "super", "switch", "throw", "throws", "true", "try", "var",
+                "where", "while",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=((STRING, r'"""', r'"""'), C_BLOCK_COMMENT),
+        line_comment="//",
+    ),
+    Language(
+        "Lua", (".lua",),
+        (
+            (COMMENT, r"--(?!\[\[).*"),
+            (STRING, quoted('"')),
+            (STRING, quoted("'")),
+            (DEFINITION, r"(?<=\bfunction )[\w.:]+"),
+            (KEYWORD, words(
+                "and", "break", "do", "else", "elseif", "end", "false", "for", "function", "goto", "if", "in",
+                "local", "nil", "not", "or", "repeat", "return", "then", "true", "until", "while",
+            )),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=((COMMENT, r"--\[\[", r"\]\]"), (STRING, r"\[\[", r"\]\]")),
+        line_comment="--",
+    ),
+    Language(
+        "YAML", (".yaml", ".yml"),
+        (
+            (COMMENT, r"(?:^|(?<=\s))#.*"),
+            (STRING, quoted('"')),
+            (STRING, quoted("'")),
+            (DEFINITION, r"^\s*(?:- )?[\w.-]+(?=\s*:)"),
+            (KEYWORD, words("true", "false", "null", "yes", "no", "on", "off") + r"|^---$|^\.\.\.$"),
+            (BUILTIN, r"[&*][\w-]+|!!?\w+"),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        line_comment="#",
+    ),
+    Language(
+        "JSON", (".json", ".jsonc", ".geojson"),
+        (
+            (DEFINITION, quoted('"') + r"(?=\s*:)"),
+            (STRING, quoted('"')),
+            (KEYWORD, words("true", "false", "null")),
+            (NUMBER, r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"),
+        ),
+    ),
+    Language(
+        "TOML", (".toml",),
+        (
+            (COMMENT, r"#.*"),
+            (KEYWORD, r"^\s*\[\[?[^\]]*\]\]?"),
+            (DEFINITION, r"^\s*[\w.\"'-]+(?=\s*=)"),
+            (STRING, quoted('"')),
+            (STRING, r"'[^']*'?"),
+            (BUILTIN, words("true", "false")),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        blocks=((STRING, r'"""', r'"""'), (STRING, r"'''", r"'''")),
+        line_comment="#",
+    ),
+    Language(
+        "INI", (".ini", ".cfg", ".conf", ".properties"),
+        (
+            (COMMENT, r"^\s*[;#].*"),
+            (KEYWORD, r"^\s*\[[^\]]*\]"),
+            (DEFINITION, r"^\s*[^=:\s][^=:]*(?=[=:])"),
+            (STRING, quoted('"')),
+            (NUMBER, NUMBER_PATTERN),
+        ),
+        line_comment=";",
+    ),
+)
+
+_LANGUAGES_BY_EXTENSION = {extension: language for language in LANGUAGES for extension in language.extensions}
+
+
+def language_for_path(path):
+    """Return the `Language` of the file at `path`, None for plain text"""
+    return _LANGUAGES_BY_EXTENSION.get(Path(path).suffix.lower())
@@ -0,0 +1,182 @@
+"""Opt-in timing of the editor's callbacks.
+
+While instrumentation is enabled `recorder` holds a `Recorder`, and
+everything run from the event loop is timed through `Recorder.call` (see
+`ui.instrument`, which hooks it into Tk). When it is disabled `recorder`
+is None and callers skip the timing altogether.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ROLLING_SAMPLES = 1000  # durations kept per callback for its percentiles
+TRACE_LIMIT = 200_000  # spans kept for the trace export, oldest dropped first
+SLOW_FRAME_LIMIT = 100  # slow frames remembered
+
+# the `Recorder` in use, None while instrumentation is off
+recorder = None
+
+
+def callback_name(func):
+    """A readable name for a callback, like "TextArea.flush_changes" """
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    return name.replace(".<locals>", "")
+
+
+def timed(name, func):
+    """`func`, timed as `name` when instrumentation is on (for callbacks not registered through tkinter)"""
+    if recorder is None:
+        return func
+    current = recorder
+
+    def timed_func(*args):
+        return current.call(name, func, *args)
+
+    return timed_func
+
+
+class Histogram:
+    """Durations (in ms) of the latest `ROLLING_SAMPLES` calls of a callback"""
+
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self):
+        self.samples = deque(maxlen=ROLLING_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, duration):
+        self.samples.append(duration)
+        self.count += 1
+        self.total += duration
+
+    def percentile(self, percent):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Recorder:
+    """Collects the duration of every call made through `call`.
+
+    A call made directly from the event loop (not from inside another timed
+    call) is a frame: the time Tk is blocked before it can handle input or
+    repaint. Frames longer than `slow_frame` ms are remembered in
+    `slow_frames`.
+    """
+
+    def __init__(self, slow_frame=50.0):
+        self.slow_frame = slow_frame
+        self.histograms = {}
+        self.frames = Histogram()
+        self.slow_frames = deque(maxlen=SLOW_FRAME_LIMIT)
+        # (name, start, duration, thread id), times in ms since `origin`
+        self.spans = deque(maxlen=TRACE_LIMIT)
+        self.origin = time.perf_counter()
+        self._depth = 0
+        self._tk_thread = threading.get_ident()
+
+    def call(self, name, func, *args):
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            return func(*args)
+        finally:
+            end = time.perf_counter()
+            self._depth -= 1
+            self._add(name, start, end)
+
+    def _add(self, name, start, end):
+        duration = (end - start) * 1000
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(duration)
+
+        start = (start - self.origin) * 1000
+        self.spans.append((name, start, duration, threading.get_ident()))
+        if self._depth == 0:
+            self.frames.add(duration)
+            if duration > self.slow_frame:
+                self.slow_frames.append((name, start, duration))
+
+    def span(self, name):
+        """Time a block of code, for work that does not run as a callback (like background threads)"""
+        return _Span(self, name)
+
+    def slowest(self, count, percent=95):
+        """The `count` callbacks with the highest `percent` percentile, as (name, ms) pairs"""
+        ranked = ((name, histogram.percentile(percent)) for name, histogram in self.histograms.items())
+        return sorted(ranked, key=lambda item: item[1], reverse=True)[:count]
+
+    def reset(self):
+        self.__init__(self.slow_frame)
+
+    def trace_events(self):
+        """The recorded spans in the Chrome trace event format, which Perfetto opens too"""
+        pid = os.getpid()
+        # trace timestamps are in microseconds
+        events = [dict(name="thread_name", ph="M", pid=pid, tid=self._tk_thread, args={"name": "Tk"})]
+        for name, start, duration, tid in list(self.spans):
+            events.append(
+                dict(name=name, cat="callback", ph="X", ts=start * 1000, dur=duration * 1000, pid=pid, tid=tid)
+            )
+        for name, start, duration in list(self.slow_frames):
+            events.append(
+                dict(
+                    name=f"slow frame: {name}",
+                    cat="slow",
+                    ph="i",
+                    s="t",
+                    ts=(start + duration) * 1000,
+                    pid=pid,
+                    tid=self._tk_thread,
+                    args={"ms": round(duration, 3)},
+                )
+            )
+        return events
+
+    def export_trace(self, path):
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, fp)
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "start", "on_tk_thread")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.on_tk_thread = threading.get_ident() == recorder._tk_thread
+
+    def __enter__(self):
+        if self.on_tk_thread:
+            self.recorder._depth += 1
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        recorder = self.recorder
+        if self.on_tk_thread:
+            recorder._depth -= 1
+            recorder._add(self.name, self.start, end)
+        else:
+            # other threads don't make the event loop wait, they only show up in the trace
+            start = (self.start - recorder.origin) * 1000
+            recorder.spans.append((self.name, start, (end - self.start) * 1000, threading.get_ident()))
+
+
+def enable(slow_frame=50.0):
+    global recorder
+    if recorder is None:
+        recorder = Recorder(slow_frame)
+    return recorder
+
+
+def disable():
+    global recorder
+    recorder = None
@@ -0,0 +1,250 @@
+"""Append-only edit journals, for autosave and crash recovery.
+
+Every file open for editing gets a journal: a header line describing the
+file on disk the edits apply to, followed by one JSON line per edit
+(`["i", offset, text]` or `["d", offset, length]`). Appending an edit costs
+as much as the edit itself, whatever the size of the file.
+
+Compacting a journal writes the whole document to the file (to a temporary
+file first, renamed over the original) and starts the journal over. All
+file access happens on the `JournalWriter` thread, in the order it was
+requested, so the Tk thread never waits for the disk.
+"""
+import codecs
+import hashlib
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+# journals left over when their file changed on disk in the meantime
+ORPHANED_SUFFIX = ".orphaned"
+
+DEFAULT_JOURNAL_DIR = Path.home() / ".codingg" / "journal"
+
+WRITE_CHUNK_SIZE = 1 << 20  # characters encoded and written at a time when compacting
+
+
+def journal_path(directory, path):
+    """Where the journal of the file at `path` is kept"""
+    digest = hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()
+    return Path(directory) / f"{digest}{JOURNAL_SUFFIX}"
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_journal(path):
+    """Return the header and the edits of the journal at `path`.
+
+    A crash can leave the last line half written, it is ignored.
+    """
+    with open(path, encoding="utf-8") as fp:
+        header = json.loads(fp.readline())
+        edits = []
+        for line in fp:
+            try:
+                edits.append(json.loads(line))
+            except ValueError:
+                break
+    return header, edits
+
+
+def unfinished_journals(directory):
+    """Yield (journal path, header, edits) for the journals holding edits that were never saved.
+
+    Journals without edits are removed on the way.
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+    for path in sorted(directory.glob(f"*{JOURNAL_SUFFIX}")):
+        try:
+            header, edits = read_journal(path)
+        except (OSError, ValueError):
+            continue
+        if header.get("version") != JOURNAL_VERSION:
+            continue
+        if edits:
+            yield path, header, edits
+        else:
+            path.unlink()
+
+
+class JournalWriter:
+    """The thread doing the file work of every `Journal`, in the order it was asked for"""
+
+    def __init__(self):
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args):
+        self._tasks.put((func, args))
+
+    def _run(self):
+        while True:
+            func, args = self._tasks.get()
+            if func is None:
+                return
+            func(*args)
+
+            # flush once per batch of appends rather than once per keystroke
+            if self._tasks.empty():
+                for journal in list(Journal.open_journals):
+                    journal.flush()
+
+    def close(self):
+        """Finish the work submitted so far and stop the thread"""
+        self._tasks.put((None, ()))
+        self._thread.join()
+
+
+class Journal:
+    """The journal of one file, see the module documentation.
+
+    `dirty` tells whether edits were appended since the file was last
+    written. Errors from the writer thread end up in `error`, for the Tk
+    thread to report.
+    """
+
+    # journals with a file open on the writer thread
+    open_journals = set()
+
+    def __init__(self, writer, path, file_path, encoding, newline, resume=False):
+        self.writer = writer
+        self.path = Path(path)
+        self.file_path = Path(file_path)
+        self.encoding = encoding
+        self.newline = newline
+        self.dirty = resume
+        self.error = None
+        self._file = None
+        # (size, mtime_ns) of the file when the document last matched it
+        self.stamp = file_stamp(file_path)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        writer.submit(self._open, resume, self.stamp)
+
+    def _header(self, stamp):
+        size, mtime_ns = stamp
+        return {
+            "version": JOURNAL_VERSION,
+            "path": str(self.file_path),
+            "encoding": self.encoding,
+            "newline": self.newline,
+            "size": size,
+            "mtime_ns": mtime_ns,
+        }
+
+    def _open(self, resume, stamp):
+        self.stamp = stamp
+        try:
+            if resume:
+                self._file = open(self.path, "a", encoding="utf-8")
+            else:
+                self._file = open(self.path, "w", encoding="utf-8")
+                self._file.write(json.dumps(self._header(stamp)) + "\n")
+        except OSError as exc:
+            self.error = exc
+            return
+        Journal.open_journals.add(self)
+
+    def _append(self, record):
+        self.dirty = True
+        self.writer.submit(self._write, json.dumps(record) + "\n")
+
+    def insert(self, offset, text):
+        self._append(["i", offset, text])
+
+    def delete(self, offset, length):
+        self._append(["d", offset, length])
+
+    def _write(self, line):
+        if self._file is None:
+            return
+        try:
+            self._file.write(line)
+        except OSError as exc:
+            self.error = exc
+
+    def flush(self):
+        if self._file is not None:
+            try:
+                self._file.flush()
+            except OSError as exc:
+                self.error = exc
+
+    def compact(self, snapshot):
+        """Write `snapshot` (of the document) to the file and start the journal over"""
+        self.dirty = False
+        self.writer.submit(self._compact, snapshot)
+
+    def _compact(self, snapshot):
+        temp_path = self.file_path.with_name(f".{self.file_path.name}.codingg-tmp")
+        try:
+            encoder = codecs.getincrementalencoder(self.encoding)()
+            with open(temp_path, "wb") as fp:
+                for start in range(0, len(snapshot), WRITE_CHUNK_SIZE):
+                    text = snapshot.get_text(start, start + WRITE_CHUNK_SIZE)
+                    if self.newline != "\n":
+                        text = text.replace("\n", self.newline)
+                    fp.write(encoder.encode(text))
+                fp.write(encoder.encode("", final=True))
+                fp.flush()
+                os.fsync(fp.fileno())
+            if self.file_path.exists():
+                os.chmod(temp_path, os.stat(self.file_path).st_mode)
+            os.replace(temp_path, self.file_path)
+        except (OSError, UnicodeEncodeError) as exc:
+            # the edits stay in the journal
+            self.error = exc
+            self.dirty = True
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return
+
+        if self._file is not None:
+            self._file.close()
+        self._open(False, file_stamp(self.file_path))
+        self.error = None
+
+    def restart(self, stamp, encoding=None):
+        """Start the journal over, the document now matches the file as it was at `stamp`.
+
+        `encoding` is the one the file is saved in from now on, when it changed.
+        """
+        self.dirty = False
+        self.stamp = stamp
+        if encoding is not None:
+            self.encoding = encoding
+        self.writer.submit(self._restart, stamp)
+
+    def _restart(self, stamp):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        Journal.open_journals.discard(self)
+        self._open(False, stamp)
+
+    def close(self, remove=False):
+        """Stop journaling, removing the journal file when `remove` is set"""
+        self.writer.submit(self._close, remove)
+
+    def _close(self, remove):
+        Journal.open_journals.discard(self)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,87 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count
+from operator import add
+from pathlib import Path
+
+INDEX_CHUNK_SIZE = 1 << 22  # 4 MiB
+
+
+class LargeFile:
+    """A read-only, memory-mapped file with a line-offset index built in the background.
+
+    `offsets[n]` is the byte offset line `n` (0-based) starts at. The index
+    grows while the worker thread scans the file; `indexed` is set once it
+    covers the whole file.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = Path(path)
+        self.encoding = encoding
+
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # an empty file can not be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+        self.offsets = array("Q", [0])
+        self.indexed_bytes = 0
+        self.indexed = threading.Event()
+        self._cancelled = threading.Event()
+
+        self._indexer = threading.Thread(target=self._build_index, name=f"index {self.path.name}", daemon=True)
+        self._indexer.start()
+
+    def _build_index(self):
+        position = 0
+        while position < self.size and not self._cancelled.is_set():
+            block = self._map[position:position + INDEX_CHUNK_SIZE]
+            lines = block.split(b"\n")
+            # start of the next line = bytes before the newline + the newlines seen so far
+            self.offsets.extend(map(add, accumulate(map(len, lines[:-1])), count(position + 1)))
+            position += len(block)
+            self.indexed_bytes = position
+        self.indexed.set()
+
+    @property
+    def line_count(self):
+        """Number of lines indexed so far"""
+        return len(self.offsets)
+
+    @property
+    def estimated_line_count(self):
+        """Number of lines, extrapolated from the indexed part while indexing is still running"""
+        if self.indexed.is_set() or not self.indexed_bytes:
+            return self.line_count
+        return max(self.line_count, int(self.line_count * self.size / self.indexed_bytes))
+
+    def line_at_offset(self, offset):
+        return bisect_right(self.offsets, offset) - 1
+
+    def read_lines(self, first, count):
+        """Decode `count` lines starting at line `first` (0-based), as far as they are indexed"""
+        line_count = self.line_count
+        first = max(0, min(first, line_count - 1))
+        last = first + count
+        start = self.offsets[first]
+        end = self.offsets[last] - 1 if last < line_count else self._end_of_indexed_lines()
+        text = self._map[start:max(start, end)].decode(self.encoding, errors="replace")
+        if text.endswith("\r"):
+            text = text[:-1]
+        return text.replace("\r\n", "\n")
+
+    def _end_of_indexed_lines(self):
+        if self.indexed.is_set():
+            # don't show the line ending of the last line
+            return self.size - 1 if self._map[-1:] == b"\n" else self.size
+        return self.offsets[-1] - 1
+
+    def close(self):
+        self._cancelled.set()
+        self._indexer.join()
+        if self.size:
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,134 @@
+import codecs
+import queue
+import threading
+from pathlib import Path
+
+SNIFF_SIZE = 64 * 1024
+READ_CHUNK_SIZE = 1 << 20  # 1 MiB
+# decoded chunks waiting to be picked up, the reader blocks when there are more
+QUEUE_SIZE = 8
+# put on `FileLoader.chunks` when the file turns out not to be in the encoding sniffed: the text received
+# so far is to be thrown away, the file is read again from the start as latin-1
+RESTART = object()
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def sniff_encoding(head):
+    """Guess the encoding of a file from its first bytes"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    try:
+        # not final, the sample may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        # every byte is valid latin-1, so the file can be saved back unchanged
+        return "latin-1"
+    return "utf-8"
+
+
+def detect_newline(text):
+    """Return the most common line ending in `text`, "\\n" when there is none"""
+    crlf = text.count("\r\n")
+    counts = {"\r\n": crlf, "\n": text.count("\n") - crlf, "\r": text.count("\r") - crlf}
+    newline = max(counts, key=counts.get)
+    return newline if counts[newline] else "\n"
+
+
+class FileLoader:
+    """Reads and decodes a file in a worker thread.
+
+    Decoded text, with line endings normalized to "\\n", is put on `chunks`
+    and the end of the file is marked by a None. `encoding` and `newline`
+    are known once the first chunk is available; `error` is set if the
+    file could not be read.
+
+    Only the start of the file is sniffed, and nothing is ever decoded
+    with replacement characters, those would be saved over the original
+    bytes. Past a byte the encoding sniffed cannot decode, `RESTART` is put
+    on `chunks` and the whole file is read again as latin-1.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.size = self.path.stat().st_size
+        self.bytes_read = 0
+        self.encoding = None
+        self.newline = None
+        self.error = None
+
+        self.chunks = queue.Queue(maxsize=QUEUE_SIZE)
+        self._cancelled = threading.Event()
+        self._reader = threading.Thread(target=self._read, name=f"load {self.path.name}", daemon=True)
+        self._reader.start()
+
+    @property
+    def progress(self):
+        return self.bytes_read / self.size if self.size else 1.0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _put(self, item):
+        # wait for room, but give up as soon as the load is cancelled
+        while not self._cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self):
+        try:
+            with open(self.path, "rb") as fp:
+                data = fp.read(SNIFF_SIZE)
+                try:
+                    self._decode(fp, data, sniff_encoding(data))
+                except UnicodeDecodeError:
+                    if not self._put(RESTART):
+                        return
+                    fp.seek(0)
+                    self.bytes_read = 0
+                    self.newline = None
+                    self._decode(fp, fp.read(SNIFF_SIZE), "latin-1")
+        except (OSError, LookupError) as exc:
+            self.error = exc
+        self._put(None)
+
+    def _decode(self, fp, data, encoding):
+        """Decode the file from `data`, its first bytes, on, putting the text on `chunks`"""
+        self.encoding = encoding
+        decoder = codecs.getincrementaldecoder(encoding)()
+
+        carry = ""
+        while not self._cancelled.is_set():
+            final = not data
+            text = carry + decoder.decode(data, final=final)
+            # a "\r" at the end may be the first half of a "\r\n"
+            carry = ""
+            if not final and text.endswith("\r"):
+                text, carry = text[:-1], "\r"
+
+            if self.newline is None and ("\n" in text or "\r" in text or final):
+                self.newline = detect_newline(text)
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+            if text and not self._put(text):
+                return
+            self.bytes_read += len(data)
+            if final:
+                break
+            data = fp.read(READ_CHUNK_SIZE)
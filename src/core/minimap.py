@@ -0,0 +1,79 @@
+"""Overview images of a document for the minimap, rendered a tile (a block of lines) at a time.
+
+Every line is a row of pixels, one per column, colored by the kind of
+character there, followed by an empty row. Tiles are PNG images encoded for
+`tk.PhotoImage`, so they can be rendered in a background thread and only
+turned into a Tk image on the Tk thread. Pillow is imported on the first
+render, in the thread doing it.
+"""
+import base64
+from io import BytesIO
+
+TILE_LINES = 128
+LINE_HEIGHT = 2  # px: the line, then a gap
+COLUMNS = 80  # characters shown of each line, one px each
+
+# character kinds, the colors of the palette
+BACKGROUND = 0
+WORD = 1
+SYMBOL = 2
+
+# lines are read one at a time when the tile is longer than this, for files with very long lines
+BULK_READ_LIMIT = TILE_LINES * COLUMNS * 8
+
+
+class _Kinds(dict):
+    """`str.translate` table turning every character into the kind of pixel it is drawn as"""
+
+    def __missing__(self, code):
+        char = chr(code)
+        if char.isspace():
+            kind = BACKGROUND
+        elif char.isalnum() or char == "_":
+            kind = WORD
+        else:
+            kind = SYMBOL
+        self[code] = kind
+        return kind
+
+
+_KINDS = _Kinds()
+
+
+def _hex_rgb(color):
+    return [int(color[n:n + 2], 16) for n in (1, 3, 5)]
+
+
+def _tile_lines(snapshot, tile):
+    first = tile * TILE_LINES
+    last = min(first + TILE_LINES, snapshot.line_count)
+    if first >= last:
+        return []
+    start = snapshot.line_start(first)
+    end = snapshot.line_end(last - 1)
+    if end - start <= BULK_READ_LIMIT:
+        return snapshot.get_text(start, end).split("\n")
+    lines = []
+    for line in range(first, last):
+        start = snapshot.line_start(line)
+        lines.append(snapshot.get_text(start, min(snapshot.line_end(line), start + COLUMNS * 4)))
+    return lines
+
+
+def render_tile(snapshot, tile, colors, tabsize=4):
+    """The lines of `tile` in `snapshot` as base64 PNG data, `colors` being "#rrggbb" per character kind"""
+    from PIL import Image
+
+    blank = bytes(COLUMNS)
+    rows = []
+    for text in _tile_lines(snapshot, tile):
+        text = text[:COLUMNS * 2].expandtabs(tabsize)[:COLUMNS].ljust(COLUMNS)
+        rows.append(text.translate(_KINDS).encode("latin-1"))
+        rows.append(blank)
+    rows.append(blank * (TILE_LINES * LINE_HEIGHT - len(rows)))
+
+    image = Image.frombytes("P", (COLUMNS, TILE_LINES * LINE_HEIGHT), b"".join(rows))
+    image.putpalette([channel for color in colors for channel in _hex_rgb(color)])
+    buffered = BytesIO()
+    image.save(buffered, format="PNG", compress_level=1)
+    return base64.b64encode(buffered.getvalue()).decode("ascii")
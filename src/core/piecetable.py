@@ -0,0 +1,291 @@
+import random
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, count
+from operator import add
+
+# inserts at least this long get a buffer of their own instead of being copied
+OWN_BUFFER_SIZE = 4096
+# the add buffer is only grown up to this size, after that a new one is started
+ADD_BUFFER_LIMIT = 1 << 16
+
+
+def newline_positions(text, base=0):
+    """Return an array with the position of every newline in `text`, shifted by `base`"""
+    parts = text.split("\n")
+    return array("Q", map(add, accumulate(map(len, parts[:-1])), count(base)))
+
+
+class _Node:
+    """A piece of one of the buffers, and the treap node holding it.
+
+    Nodes are never modified once built: edits copy the path from the root
+    to the changed nodes, which is what makes snapshots free.
+    """
+
+    __slots__ = ("buffer", "start", "length", "newlines", "priority", "left", "right", "total_length", "total_newlines")
+
+    def __init__(self, buffer, start, length, newlines, priority, left=None, right=None):
+        self.buffer = buffer
+        self.start = start
+        self.length = length
+        self.newlines = newlines
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.total_length = length
+        self.total_newlines = newlines
+        if left is not None:
+            self.total_length += left.total_length
+            self.total_newlines += left.total_newlines
+        if right is not None:
+            self.total_length += right.total_length
+            self.total_newlines += right.total_newlines
+
+    def with_children(self, left, right):
+        return _Node(self.buffer, self.start, self.length, self.newlines, self.priority, left, right)
+
+
+def _length(node):
+    return node.total_length if node is not None else 0
+
+
+def _newlines(node):
+    return node.total_newlines if node is not None else 0
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        return left.with_children(left.left, _merge(left.right, right))
+    return right.with_children(_merge(left, right.left), right.right)
+
+
+class PieceTable:
+    """A text document stored as pieces of immutable buffers.
+
+    Pieces live in a persistent treap keyed by position, every node knowing
+    the length and newline count of its subtree, so edits and conversions
+    between offsets and (line, column) positions take O(log n). Lines and
+    columns are 0-based.
+
+    The text the table starts with, as well as any large insert, is kept as
+    its own buffer and never copied. Small inserts are appended to a shared
+    add buffer.
+    """
+
+    def __init__(self, text=""):
+        self._buffers = []
+        self._newline_positions = []
+        self._add_buffer = None  # index of the buffer this table appends to
+        self._root = None
+        if text:
+            self._root = self._new_piece(self._add_own_buffer(text), 0, len(text))
+
+    def _add_own_buffer(self, text):
+        self._buffers.append(text)
+        self._newline_positions.append(newline_positions(text))
+        return len(self._buffers) - 1
+
+    def _append(self, text):
+        """Store `text` in a buffer, returning (buffer, start)"""
+        if len(text) >= OWN_BUFFER_SIZE:
+            return self._add_own_buffer(text), 0
+
+        if self._add_buffer is None or len(self._buffers[self._add_buffer]) + len(text) > ADD_BUFFER_LIMIT:
+            self._add_buffer = self._add_own_buffer("")
+
+        buffer = self._add_buffer
+        start = len(self._buffers[buffer])
+        # growing a buffer keeps every existing piece (and snapshot) of it valid
+        self._buffers[buffer] += text
+        self._newline_positions[buffer].extend(newline_positions(text, start))
+        return buffer, start
+
+    def _count_newlines(self, buffer, start, end):
+        positions = self._newline_positions[buffer]
+        return bisect_left(positions, end) - bisect_left(positions, start)
+
+    def _new_piece(self, buffer, start, length, priority=None):
+        if priority is None:
+            priority = random.random()
+        return _Node(buffer, start, length, self._count_newlines(buffer, start, start + length), priority)
+
+    def _split(self, node, offset):
+        """Split `node` into the pieces before and after `offset`"""
+        if node is None:
+            return None, None
+
+        left_length = _length(node.left)
+        if offset <= left_length:
+            left, right = self._split(node.left, offset)
+            return left, node.with_children(right, node.right)
+
+        offset -= left_length
+        if offset >= node.length:
+            left, right = self._split(node.right, offset - node.length)
+            return node.with_children(node.left, left), right
+
+        # the offset is inside this piece, cut it in two
+        head = self._new_piece(node.buffer, node.start, offset, node.priority)
+        tail = self._new_piece(node.buffer, node.start + offset, node.length - offset, node.priority)
+        return head.with_children(node.left, None), tail.with_children(None, node.right)
+
+    def _extend_last(self, node, buffer, start, length):
+        """Grow the last piece of `node` if the new text directly follows it in the same buffer"""
+        if node is None:
+            return None
+
+        if node.right is not None:
+            right = self._extend_last(node.right, buffer, start, length)
+            return node.with_children(node.left, right) if right is not None else None
+
+        if node.buffer != buffer or node.start + node.length != start:
+            return None
+        grown = self._new_piece(buffer, node.start, node.length + length, node.priority)
+        return grown.with_children(node.left, None)
+
+    def __len__(self):
+        return _length(self._root)
+
+    @property
+    def line_count(self):
+        return _newlines(self._root) + 1
+
+    def insert(self, offset, text):
+        if not text:
+            return
+        if not 0 <= offset <= len(self):
+            raise IndexError(f"offset {offset} out of range")
+
+        buffer, start = self._append(text)
+        left, right = self._split(self._root, offset)
+        grown = self._extend_last(left, buffer, start, len(text))
+        if grown is not None:
+            self._root = _merge(grown, right)
+        else:
+            self._root = _merge(_merge(left, self._new_piece(buffer, start, len(text))), right)
+
+    def delete(self, offset, length):
+        if length <= 0:
+            return
+        if not 0 <= offset <= offset + length <= len(self):
+            raise IndexError(f"range {offset}:{offset + length} out of range")
+
+        left, right = self._split(self._root, offset)
+        _, right = self._split(right, length)
+        self._root = _merge(left, right)
+
+    def chunks(self, start=0, end=None):
+        """Yield the text between `start` and `end` piece by piece"""
+        if end is None:
+            end = len(self)
+
+        stack = []
+        node, base = self._root, 0
+        while stack or node is not None:
+            # walk down to the leftmost piece that may overlap the range
+            while node is not None:
+                if base >= end:
+                    node = None
+                    break
+                piece_end = base + _length(node.left) + node.length
+                if piece_end <= start:
+                    # this piece and everything left of it come before the range
+                    node, base = node.right, piece_end
+                    continue
+                stack.append((node, base))
+                node = node.left
+
+            if not stack:
+                break
+            node, base = stack.pop()
+            piece_start = base + _length(node.left)
+            piece_end = piece_start + node.length
+            if piece_start >= end:
+                break
+            if piece_end > start:
+                text_start = node.start + max(start, piece_start) - piece_start
+                text_end = node.start + min(end, piece_end) - piece_start
+                yield self._buffers[node.buffer][text_start:text_end]
+            node, base = node.right, piece_end
+
+    def get_text(self, start=0, end=None):
+        return "".join(self.chunks(start, end))
+
+    def line_start(self, line):
+        """Offset of the first character on `line`"""
+        if line == 0:
+            return 0
+        if not 0 < line < self.line_count:
+            raise IndexError(f"line {line} out of range")
+
+        node, base, wanted = self._root, 0, line
+        while True:
+            left_newlines = _newlines(node.left)
+            if wanted <= left_newlines:
+                node = node.left
+                continue
+
+            wanted -= left_newlines
+            base += _length(node.left)
+            if wanted <= node.newlines:
+                positions = self._newline_positions[node.buffer]
+                position = positions[bisect_left(positions, node.start) + wanted - 1]
+                return base + position - node.start + 1
+
+            wanted -= node.newlines
+            base += node.length
+            node = node.right
+
+    def line_end(self, line):
+        """Offset of the newline ending `line` (or the end of the document)"""
+        if line + 1 < self.line_count:
+            return self.line_start(line + 1) - 1
+        return len(self)
+
+    def line_text(self, line):
+        return self.get_text(self.line_start(line), self.line_end(line))
+
+    def offset_to_position(self, offset):
+        if not 0 <= offset <= len(self):
+            raise IndexError(f"offset {offset} out of range")
+
+        node, line, remaining = self._root, 0, offset
+        while node is not None:
+            left_length = _length(node.left)
+            if remaining <= left_length:
+                node = node.left
+                continue
+
+            line += _newlines(node.left)
+            remaining -= left_length
+            if remaining <= node.length:
+                line += self._count_newlines(node.buffer, node.start, node.start + remaining)
+                break
+
+            line += node.newlines
+            remaining -= node.length
+            node = node.right
+
+        return line, offset - self.line_start(line)
+
+    def position_to_offset(self, line, column):
+        return self.line_start(line) + column
+
+    def unchanged_since(self, snapshot):
+        """Whether the document was not edited since `snapshot` was taken of it"""
+        return snapshot._root is self._root
+
+    def snapshot(self):
+        """Return a copy of the document in its current state, in O(1)"""
+        snapshot = PieceTable.__new__(PieceTable)
+        # buffers are only ever appended to, so they can be shared
+        snapshot._buffers = self._buffers
+        snapshot._newline_positions = self._newline_positions
+        snapshot._add_buffer = None
+        snapshot._root = self._root
+        return snapshot
@@ -0,0 +1,135 @@
+"""Working out how a file changed on disk, as edits to the document showing it.
+
+`read_changes` compares the file with a snapshot of the document, which
+held what the file contained when its stamp was `stamp` (see
+`core.journal.file_stamp`). A file that only grew, like a log, has just
+the bytes past the old end read and decoded. Anything else is read whole
+and compared line by line, and only the lines that differ are replaced.
+
+Like `core.loader.FileLoader`, nothing is decoded with replacement
+characters: a file the encoding of its tab no longer decodes is read whole
+again as latin-1, so saving it writes back the bytes it holds.
+"""
+import codecs
+import difflib
+import os
+from collections import namedtuple
+
+# characters at the end of the document compared to the file, to tell whether it was only appended to
+TAIL_CHECK = 1024
+# lines of each side past which SequenceMatcher is too slow, and everything between the common
+# start and end is replaced instead
+DIFF_LIMIT = 20_000
+
+# encodings where the end of a file can be encoded and decoded on its own
+_TAIL_ENCODINGS = {"utf-8": "utf-8", "utf-8-sig": "utf-8", "ascii": "ascii", "iso8859-1": "latin-1"}
+
+# `kind` is "unchanged", "append" (`edits` is the text to add) or "patch" (`edits` are the hunks to apply),
+# `stamp` what the file's stamp was when it was read, `encoding` the one to save the document in from now on
+Changes = namedtuple("Changes", "kind edits stamp encoding")
+
+
+def _normalize(text):
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _lines(text):
+    """Lines of `text` with their "\\n", as a Tk text widget counts them"""
+    lines = text.split("\n")
+    return [line + "\n" for line in lines[:-1]] + [lines[-1]]
+
+
+def line_hunks(old, new):
+    """The (first line, lines removed, text inserted) turning `old` into `new`, last first.
+
+    Lines are 0-based and counted in `old`. Applying the hunks in order
+    keeps the lines of the ones still to apply where they were.
+    """
+    a, b = _lines(old), _lines(new)
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < limit - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a and not b:
+        return []
+    if len(a) > DIFF_LIMIT or len(b) > DIFF_LIMIT:
+        return [(start, len(a), "".join(b))]
+
+    hunks = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag != "equal":
+            hunks.append((start + i1, i2 - i1, "".join(b[j1:j2])))
+    return hunks
+
+
+def read_changes(path, snapshot, stamp, encoding, newline):
+    """What changed in the file at `path` since it held `snapshot`, as `Changes`. Runs in a worker thread"""
+    with open(path, "rb") as fp:
+        stat = os.fstat(fp.fileno())
+        current = (stat.st_size, stat.st_mtime_ns)
+        if current == tuple(stamp):
+            return Changes("unchanged", None, current, encoding)
+
+        appended = _read_appended(fp, snapshot, stamp, stat.st_size, encoding, newline)
+        if appended is not None:
+            text, consumed = appended
+            return Changes("append", text, (consumed, stat.st_mtime_ns), encoding)
+
+        # only what was there when the file was stat'ed, a file still growing is read again next time
+        fp.seek(0)
+        data = fp.read(stat.st_size)
+
+    try:
+        text = codecs.decode(data, encoding)
+    except UnicodeDecodeError:
+        # every byte is valid latin-1
+        encoding = "latin-1"
+        text = codecs.decode(data, encoding)
+    text = _normalize(text)
+    old = snapshot.get_text()
+    if text == old:
+        return Changes("unchanged", None, current, encoding)
+    return Changes("patch", line_hunks(old, text), current, encoding)
+
+
+def _read_appended(fp, snapshot, stamp, size, encoding, newline):
+    """(text, size read up to) when the file was only appended to since `stamp`, else None.
+
+    None as well when the bytes appended do not decode, the whole file is read again then.
+    """
+    old_size = stamp[0]
+    tail_encoding = _TAIL_ENCODINGS.get(codecs.lookup(encoding).name)
+    if tail_encoding is None or size <= old_size:
+        return None
+
+    # the end of the document, as it would be stored, has to be what the file holds before the old end
+    tail = snapshot.get_text(max(len(snapshot) - TAIL_CHECK, 0))
+    if newline != "\n":
+        tail = tail.replace("\n", newline)
+    try:
+        expected = tail.encode(tail_encoding)
+    except UnicodeEncodeError:
+        return None
+    if len(expected) > old_size:
+        return None
+    fp.seek(old_size - len(expected))
+    if fp.read(len(expected)) != expected:
+        return None
+
+    data = fp.read(size - old_size)
+    decoder = codecs.getincrementaldecoder(tail_encoding)()
+    try:
+        text = decoder.decode(data)
+    except UnicodeDecodeError:
+        return None
+    # a character cut in two, or a "\r" that may be half of a "\r\n", is left for the next read
+    consumed = old_size + len(data) - len(decoder.getstate()[0])
+    if text.endswith("\r"):
+        text = text[:-1]
+        consumed -= 1
+    return _normalize(text), consumed
@@ -0,0 +1,398 @@
+"""Searching documents and folders without blocking the Tk thread.
+
+`BufferSearch` runs a regex over a snapshot of a document in a worker
+thread. It searches the lines around the viewport first, so their matches
+can be shown before the rest of the document is done.
+
+`FileSearch` searches the files of a folder. A `TrigramIndex` records the
+trigrams (three-character substrings) of every file it has seen, and a file
+lacking one of the trigrams a query needs cannot match, so it is skipped
+without being read. Files the index does not know yet, or that changed since
+they were indexed, are always read, and indexed on the way.
+
+Both stream their results to a `results` queue in batches, ending with a
+None, and stop early once cancelled.
+"""
+import os
+import queue
+import re
+import threading
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # before Python 3.11
+    import sre_parse
+
+BATCH_SIZE = 500  # matches per batch put on the results queue
+CHUNK_LINES = 20_000  # lines a buffer search covers between checks for cancellation
+# files bigger than this are searched but not indexed, and neither are binary files
+INDEX_SIZE_LIMIT = 1 << 20
+MAX_FILE_MATCHES = 1000  # matches reported per file
+MAX_LINE_LENGTH = 300  # characters of a matching line kept for display
+
+
+def compile_query(pattern, regex=False, case_sensitive=True):
+    """Compile a search query, raising `re.error` when it is an invalid regex"""
+    if not regex:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.MULTILINE | (0 if case_sensitive else re.IGNORECASE))
+
+
+def required_literals(compiled):
+    """Strings every match of the compiled regex must contain.
+
+    Only runs of plain characters at the top level of the pattern are
+    considered, so this errs on the side of returning too little.
+    """
+    if compiled.flags & re.VERBOSE:
+        return []
+    try:
+        parsed = sre_parse.parse(compiled.pattern, compiled.flags)
+    except (re.error, TypeError):
+        return []
+
+    literals = []
+    run = []
+    for op, value in parsed:
+        if op == sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if run:
+            literals.append("".join(run))
+            run = []
+    if run:
+        literals.append("".join(run))
+    return literals
+
+
+def trigrams(text):
+    """The set of (lowercased) three-character substrings of `text`"""
+    text = text.lower()
+    # zipping shifted copies is faster than slicing at every position
+    return set(map("".join, zip(text, text[1:], text[2:])))
+
+
+def query_trigrams(compiled):
+    """Trigrams a file has to contain to hold a match of `compiled`"""
+    needed = set()
+    for literal in required_literals(compiled):
+        needed.update(trigrams(literal))
+    return needed
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class TrigramIndex:
+    """Maps trigrams to the files containing them, updated one file at a time.
+
+    Paths are kept as given, the index does not care whether they are
+    relative or absolute. Every file is recorded with the (size, mtime) it
+    had when indexed, see `refresh`. Safe to use from several threads.
+    """
+
+    def __init__(self):
+        # trigram -> ids of the files containing it
+        self._postings = {}
+        # path -> (id, stamp, trigrams)
+        self._files = {}
+        self._next_id = 0
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def add(self, path, text, stamp):
+        grams = trigrams(text)
+        with self._lock:
+            self._remove(path)
+            file_id = self._next_id
+            self._next_id += 1
+            self._files[path] = (file_id, stamp, grams)
+            self._paths[file_id] = path
+            postings = self._postings
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = {file_id}
+                else:
+                    ids.add(file_id)
+
+    def remove(self, path):
+        with self._lock:
+            self._remove(path)
+
+    def _remove(self, path):
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return
+        file_id, _, grams = entry
+        del self._paths[file_id]
+        for gram in grams:
+            ids = self._postings[gram]
+            ids.discard(file_id)
+            if not ids:
+                del self._postings[gram]
+
+    def stamp(self, path):
+        entry = self._files.get(path)
+        return entry[1] if entry is not None else None
+
+    def candidates(self, paths, needed, root=""):
+        """The files among `paths` (relative to `root`) that may contain all of the trigrams `needed`.
+
+        Files that are not indexed are always candidates, and so are the
+        ones whose stamp changed since they were indexed. The order of
+        `paths` is kept.
+        """
+        if not needed:
+            return list(paths)
+        with self._lock:
+            postings = [self._postings.get(gram, ()) for gram in needed]
+            postings.sort(key=len)
+            matching = set(postings[0])
+            for ids in postings[1:]:
+                matching.intersection_update(ids)
+                if not matching:
+                    break
+            files = self._files
+            # stamps of the files the index rules out
+            excluded = {}
+            for path in paths:
+                entry = files.get(path)
+                if entry is not None and entry[0] not in matching:
+                    excluded[path] = entry[1]
+
+        result = []
+        for path in paths:
+            if path in excluded:
+                # stat outside of the lock, only a file that was rewritten since can match after all
+                try:
+                    if file_stamp(os.path.join(root, path)) == excluded[path]:
+                        continue
+                except OSError:
+                    continue
+            result.append(path)
+        return result
+
+    def refresh(self, root, paths, cancelled=lambda: False):
+        """Re-index the files among `paths` (relative to `root`) that changed, and forget the deleted ones"""
+        wanted = set(paths)
+        with self._lock:
+            for path in [path for path in self._files if path not in wanted]:
+                self._remove(path)
+        for path in paths:
+            if cancelled():
+                return
+            self.index_file(root, path)
+
+    def index_file(self, root, path, stamp=None):
+        """Index the file at `path` (relative to `root`) unless it is indexed as it is, returning its text.
+
+        Returns None when the file is unchanged, can not be read or is not
+        worth indexing.
+        """
+        full_path = os.path.join(root, path)
+        try:
+            if stamp is None:
+                stamp = file_stamp(full_path)
+            if self.stamp(path) == stamp:
+                return None
+            text = read_text(full_path)
+        except OSError:
+            self.remove(path)
+            return None
+        if text is None:
+            self.remove(path)
+            return None
+        if stamp[0] <= INDEX_SIZE_LIMIT:
+            self.add(path, text, stamp)
+        return text
+
+
+def read_text(path):
+    """The contents of the file at `path`, or None for a binary file"""
+    with open(path, "rb") as fp:
+        data = fp.read()
+    if b"\0" in data[:8192]:
+        return None
+    text = data.decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class BufferSearch:
+    """Searches a snapshot of a `core.piecetable.PieceTable` in a worker thread.
+
+    Each batch put on `results` is a list of (start, end) indices in Tk's
+    "line.col" format. Lines `first` to `last` (0-based) are searched
+    first, then the rest of the document from the top.
+    """
+
+    def __init__(self, snapshot, compiled, first=0, last=0):
+        self.results = queue.Queue()
+        self.count = 0
+        self.done = threading.Event()
+        self._cancelled = False
+        self._thread = threading.Thread(
+            target=self._run, args=(snapshot, compiled, first, last), name="search", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _run(self, snapshot, compiled, first, last):
+        try:
+            last_line = snapshot.line_count - 1
+            first, last = max(0, min(first, last_line)), max(0, min(last, last_line))
+            ranges = [(first, last)]
+            # the rest, cut in chunks so a cancelled search stops soon
+            for start, end in ((0, first - 1), (last + 1, last_line)):
+                for chunk in range(start, end + 1, CHUNK_LINES):
+                    ranges.append((chunk, min(chunk + CHUNK_LINES - 1, end)))
+
+            for start, end in ranges:
+                if self._cancelled:
+                    return
+                self._search_lines(snapshot, compiled, start, end)
+        finally:
+            self.results.put(None)
+            self.done.set()
+
+    def _search_lines(self, snapshot, compiled, first, last):
+        base = snapshot.line_start(first)
+        text = snapshot.get_text(base, snapshot.line_end(last))
+        line, line_start = first, 0
+        batch = []
+        for match in compiled.finditer(text):
+            start, end = match.span()
+            if start == end:
+                continue
+            # lines are counted from the previous match on, never from the top of the chunk
+            newlines = text.count("\n", line_start, start)
+            if newlines:
+                line += newlines
+                line_start = text.rindex("\n", 0, start) + 1
+            start_index = f"{line + 1}.{start - line_start}"
+            end_line, end_line_start = line, line_start
+            newlines = text.count("\n", start, end)
+            if newlines:
+                end_line += newlines
+                end_line_start = text.rindex("\n", 0, end) + 1
+            batch.append((start_index, f"{end_line + 1}.{end - end_line_start}"))
+
+            if len(batch) >= BATCH_SIZE:
+                self.count += len(batch)
+                self.results.put(batch)
+                batch = []
+                if self._cancelled:
+                    return
+        if batch:
+            self.count += len(batch)
+            self.results.put(batch)
+
+
+class FileSearch:
+    """Searches the files at `paths` (relative to `root`) in a worker thread.
+
+    Each batch put on `results` is a list of (path, line, column, text)
+    matches, with 0-based lines and columns and the text of the matching
+    line. `documents` maps paths to the `PieceTable` snapshots to search
+    instead of the file, for files open with unsaved edits.
+    """
+
+    def __init__(self, root, paths, compiled, index, documents=None):
+        self.results = queue.Queue()
+        self.count = 0
+        # files read, the rest were skipped thanks to the index
+        self.files_read = 0
+        self.files_total = len(paths)
+        self.done = threading.Event()
+        self._cancelled = False
+        self._thread = threading.Thread(
+            target=self._run, args=(root, list(paths), compiled, index, documents or {}), name="search", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _run(self, root, paths, compiled, index, documents):
+        try:
+            needed = query_trigrams(compiled)
+            candidates = index.candidates(paths, needed, root)
+            if documents:
+                candidates_set = set(candidates)
+                candidates.extend(path for path in documents if path not in candidates_set)
+
+            batch = []
+            for path in candidates:
+                if self._cancelled:
+                    return
+                document = documents.get(path)
+                if document is not None:
+                    text = document.get_text()
+                else:
+                    text = self._read(root, path, index)
+                if text is None:
+                    continue
+                self.files_read += 1
+                batch.extend(self._search_text(path, text, compiled))
+                if len(batch) >= BATCH_SIZE:
+                    self.count += len(batch)
+                    self.results.put(batch)
+                    batch = []
+            if batch:
+                self.count += len(batch)
+                self.results.put(batch)
+        finally:
+            self.results.put(None)
+            self.done.set()
+
+    def _read(self, root, path, index):
+        try:
+            stamp = file_stamp(os.path.join(root, path))
+        except OSError:
+            index.remove(path)
+            return None
+        # files the index knows as they are were only kept because they may match
+        text = index.index_file(root, path, stamp)
+        if text is None and index.stamp(path) == stamp:
+            try:
+                text = read_text(os.path.join(root, path))
+            except OSError:
+                return None
+        return text
+
+    def _search_text(self, path, text, compiled):
+        matches = []
+        line, line_start = 0, 0
+        for match in compiled.finditer(text):
+            start = match.start()
+            if match.end() == start:
+                continue
+            newlines = text.count("\n", line_start, start)
+            if newlines:
+                line += newlines
+                line_start = text.rindex("\n", 0, start) + 1
+            line_end = text.find("\n", start)
+            if line_end == -1:
+                line_end = len(text)
+            matches.append((path, line, start - line_start, text[line_start:line_end][:MAX_LINE_LENGTH]))
+            if len(matches) >= MAX_FILE_MATCHES:
+                break
+        return matches
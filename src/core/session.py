@@ -0,0 +1,57 @@
+"""The tabs open in the editor, saved as it runs and reopened the next time it starts.
+
+A session is one line of JSON: the index of the tab selected, and for every
+tab its path, cursor and selection (Tk indices), the first line shown and
+when it was last viewed (seconds since the epoch). Tabs are lists rather
+than objects, so a hundred of them still make a small file. It is written
+to a temporary file renamed over the old one, a crash never leaves half a
+session behind.
+"""
+import json
+from collections import namedtuple
+from pathlib import Path
+
+SESSION_VERSION = 1
+DEFAULT_SESSION_PATH = Path.home() / ".codingg" / "session.json"
+
+TabState = namedtuple("TabState", "path cursor selection top_line viewed")
+
+
+def read_session(path):
+    """The (tab states, index of the selected one) saved at `path`, None when there is no session to restore"""
+    try:
+        with open(path, encoding="utf-8") as fp:
+            data = json.load(fp)
+        if data.get("version") != SESSION_VERSION:
+            return None
+        tabs = [
+            TabState(str(tab_path), str(cursor), tuple(map(str, selection)), int(top_line), float(viewed))
+            for tab_path, cursor, selection, top_line, viewed in data["tabs"]
+        ]
+        return tabs, int(data["selected"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_session(path, tabs, selected):
+    """Save the `TabState`s `tabs` to `path`, `selected` being the index of the one selected"""
+    path = Path(path)
+    data = {
+        "version": SESSION_VERSION,
+        "selected": selected,
+        "tabs": [[tab.path, tab.cursor, list(tab.selection), tab.top_line, round(tab.viewed)] for tab in tabs],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as fp:
+        json.dump(data, fp, separators=(",", ":"))
+    temp_path.replace(path)
+
+
+def likely_order(viewed, selected):
+    """Indices of the tabs last `viewed` at these times, in the order they are likely to be viewed again.
+
+    The tab `selected` comes first, then the ones viewed most recently, the
+    nearest to it first among the ones viewed at the same time.
+    """
+    return sorted(range(len(viewed)), key=lambda n: (n != selected, -viewed[n], abs(n - selected)))
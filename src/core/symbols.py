@@ -0,0 +1,433 @@
+"""Symbols (functions, classes, headings, keys...) of a document, and fuzzy matching over them.
+
+`SymbolIndex` keeps the symbols found on every line of a document. It is
+built in a background thread from a snapshot, and afterwards only the lines
+touched by edits are scanned again. Symbols below an edit that added or
+removed lines are not touched either: the shift is logged, and applied
+when their line is asked for.
+
+`find_symbols` matches a query against the symbols of several indexes.
+Each index keeps the names of its symbols lowercased in one string, one
+per line and ordered by length, so every matching tier (prefix, substring,
+then the query's characters in order) is a single regex search that finds
+the shortest names first, and stops as soon as enough were found.
+"""
+import heapq
+import re
+import sys
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+
+# symbol kinds
+FUNCTION = "function"
+CLASS = "class"
+HEADING = "heading"
+KEY = "key"
+SECTION = "section"
+SELECTOR = "selector"
+ANCHOR = "anchor"
+
+# "name" stands for the name of the symbol. Patterns are matched from the start of a line, so they
+# must not match across lines: whitespace is written [ \t] rather than \s
+_FUNCTION_MODIFIERS = r"(?:(?:public|private|protected|internal|static|final|abstract|virtual|override|async|" \
+    r"synchronized|native|extern|inline|open|suspend|unsafe|const|sealed|partial|new)[ \t]+)*"
+_C_FUNCTION = r"(?![ \t#])[\w \t*&:<>,~\[\]]*?\b(?P<name>[A-Za-z_~][\w:~]*)[ \t]*\([^;\n]*$"
+_METHOD = rf"[ \t]*{_FUNCTION_MODIFIERS}(?:<[^>\n]+>[ \t]+)?[\w<>\[\],.?]+[ \t]+(?P<name>\w+)[ \t]*\([^;\n]*$"
+
+SYMBOL_RULES = {
+    "Python": (
+        (FUNCTION, r"[ \t]*(?:async[ \t]+)?def[ \t]+(?P<name>\w+)"),
+        (CLASS, r"[ \t]*class[ \t]+(?P<name>\w+)"),
+    ),
+    "JavaScript": (
+        (FUNCTION, r"[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?function[ \t]*\*?[ \t]*(?P<name>[\w$]+)"),
+        (CLASS, r"[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:abstract[ \t]+)?"
+                r"(?:class|interface|enum|type)[ \t]+(?P<name>[\w$]+)"),
+        (FUNCTION, r"[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<name>[\w$]+)[ \t]*=[ \t]*(?:async[ \t]*)?"
+                   r"(?:function\b|\([^)\n]*\)[ \t]*=>|[\w$]+[ \t]*=>)"),
+        (FUNCTION, r"[ \t]+(?:(?:static|async|get|set|public|private|protected)[ \t]+)*(?P<name>[\w$]+)"
+                   r"[ \t]*\([^)\n]*\)[ \t]*(?::[^{\n]*)?\{[ \t]*$"),
+    ),
+    "HTML": (
+        (ANCHOR, r"[^\n]*?\bid[ \t]*=[ \t]*[\"'](?P<name>[^\"'\n]+)"),
+    ),
+    "CSS": (
+        (SELECTOR, r"[ \t]*(?P<name>[^ \t\n{}/;][^{};\n]*?)[ \t]*\{"),
+    ),
+    "Markdown": (
+        (HEADING, r"#{1,6}[ \t]+(?P<name>[^\n]+?)[ \t]*#*[ \t]*$"),
+    ),
+    "PHP": (
+        (FUNCTION, rf"[ \t]*{_FUNCTION_MODIFIERS}function[ \t]+&?(?P<name>\w+)"),
+        (CLASS, r"[ \t]*(?:(?:abstract|final)[ \t]+)?(?:class|interface|trait|enum)[ \t]+(?P<name>\w+)"),
+    ),
+    "Java": (
+        (CLASS, rf"[ \t]*{_FUNCTION_MODIFIERS}(?:data[ \t]+)?(?:class|interface|enum|record|object)"
+                rf"[ \t]+(?P<name>\w+)"),
+        (FUNCTION, rf"[ \t]*{_FUNCTION_MODIFIERS}fun[ \t]+(?:<[^>\n]+>[ \t]*)?(?:[\w.]+\.)?(?P<name>\w+)"),
+        (FUNCTION, _METHOD),
+    ),
+    "C": (
+        (SECTION, r"[ \t]*#[ \t]*define[ \t]+(?P<name>\w+)"),
+        (CLASS, r"[ \t]*(?:typedef[ \t]+)?(?:struct|union|enum)[ \t]+(?P<name>\w+)[ \t]*\{?[ \t]*$"),
+        (FUNCTION, _C_FUNCTION),
+    ),
+    "C++": (
+        (SECTION, r"[ \t]*#[ \t]*define[ \t]+(?P<name>\w+)"),
+        (CLASS, r"[ \t]*(?:template[ \t]*<[^>\n]*>[ \t]*)?(?:typedef[ \t]+)?(?:class|struct|union|enum|namespace)"
+                r"(?:[ \t]+class)?[ \t]+(?P<name>\w+)[^;\n]*$"),
+        (FUNCTION, _C_FUNCTION),
+    ),
+    "C#": (
+        (CLASS, rf"[ \t]*{_FUNCTION_MODIFIERS}(?:class|interface|struct|enum|record|namespace)[ \t]+(?P<name>[\w.]+)"),
+        (FUNCTION, _METHOD),
+    ),
+    "Go": (
+        (FUNCTION, r"func[ \t]+(?:\([^)\n]*\)[ \t]*)?(?P<name>\w+)"),
+        (CLASS, r"[ \t]*type[ \t]+(?P<name>\w+)"),
+    ),
+    "Ruby": (
+        (FUNCTION, r"[ \t]*def[ \t]+(?P<name>[\w.?!=]+)"),
+        (CLASS, r"[ \t]*(?:class|module)[ \t]+(?P<name>[\w:]+)"),
+    ),
+    "Rust": (
+        (FUNCTION, r"[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:(?:async|const|unsafe|extern[ \t]+\"[^\"\n]*\")[ \t]+)*"
+                   r"fn[ \t]+(?P<name>\w+)"),
+        (CLASS, r"[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:struct|enum|trait|mod|type|union)[ \t]+(?P<name>\w+)"),
+        (CLASS, r"[ \t]*impl(?:<[^>\n]*>)?[ \t]+(?P<name>[\w:<>, ]+?)[ \t]*(?:\{|where|$)"),
+    ),
+    "Swift": (
+        (FUNCTION, rf"[ \t]*{_FUNCTION_MODIFIERS}(?:@\w+[ \t]+)*func[ \t]+(?P<name>\w+)"),
+        (CLASS, rf"[ \t]*{_FUNCTION_MODIFIERS}(?:class|struct|protocol|enum|extension|actor)[ \t]+(?P<name>[\w.]+)"),
+    ),
+    "Lua": (
+        (FUNCTION, r"[ \t]*(?:local[ \t]+)?function[ \t]+(?P<name>[\w.:]+)"),
+        (FUNCTION, r"[ \t]*(?:local[ \t]+)?(?P<name>[\w.]+)[ \t]*=[ \t]*function\b"),
+    ),
+    "YAML": (
+        (KEY, r"[ \t]*(?:-[ \t]+)?(?P<name>[\w.-]+|\"[^\"\n]*\"|'[^'\n]*')[ \t]*:(?:[ \t]|$)"),
+    ),
+    "JSON": (
+        (KEY, r"[ \t]*[{\[,]?[ \t]*\"(?P<name>(?:[^\"\\\n]|\\.)*)\"[ \t]*:"),
+    ),
+    "TOML": (
+        (SECTION, r"[ \t]*\[\[?[ \t]*(?P<name>[^\]\n]+?)[ \t]*\]\]?"),
+        (KEY, r"[ \t]*(?P<name>[\w.\"'-]+)[ \t]*="),
+    ),
+    "INI": (
+        (SECTION, r"[ \t]*\[(?P<name>[^\]\n]+)\]"),
+        (KEY, r"[ \t]*(?P<name>[^=:;#\[ \t\n][^=:\n]*?)[ \t]*[=:]"),
+    ),
+}
+
+# names the looser patterns pick up from statements that look like definitions
+STOP_NAMES = frozenset(("if", "for", "while", "switch", "catch", "return", "else", "do", "sizeof", "new", "elif"))
+
+_compiled = {}
+
+
+def symbol_regex(language):
+    """The rules for `language` as a single regex, None when there are none for it.
+
+    Rule n is the group `k<n>`, the name it matched the group `n<n>`.
+    """
+    if language.name not in _compiled:
+        rules = SYMBOL_RULES.get(language.name)
+        if not rules:
+            _compiled[language.name] = None
+        else:
+            alternatives = [
+                f"(?P<k{n}>{pattern.replace('(?P<name>', f'(?P<n{n}>')})" for n, (_, pattern) in enumerate(rules)
+            ]
+            regex = re.compile("^(?:" + "|".join(alternatives) + ")", re.MULTILINE)
+            _compiled[language.name] = (regex, tuple(kind for kind, _ in rules))
+    return _compiled[language.name]
+
+
+class Symbol:
+    __slots__ = ("name", "kind", "line", "column", "epoch", "alive")
+
+    def __init__(self, name, kind, line, column, epoch=0):
+        self.name = name
+        self.kind = kind
+        # the line as of shift `epoch` of the index, see `SymbolIndex.line_of`
+        self.line = line
+        self.column = column
+        self.epoch = epoch
+        self.alive = True
+
+
+def extract(compiled, text, first_line=0, epoch=0):
+    """Return [(line, symbols), ...] for the lines of `text` (starting at `first_line`) holding symbols"""
+    regex, kinds = compiled
+    found = []
+    line, line_start = first_line, 0
+    for match in regex.finditer(text):
+        start = match.start()
+        newlines = text.count("\n", line_start, start)
+        if newlines:
+            line += newlines
+            line_start = text.rindex("\n", 0, start) + 1
+        rule = int(match.lastgroup[1:])
+        group = f"n{rule}"
+        name = match.group(group)
+        if not name or name in STOP_NAMES:
+            continue
+        symbol = Symbol(name, kinds[rule], line, match.start(group) - line_start, epoch)
+        if found and found[-1][0] == line:
+            found[-1][1].append(symbol)
+        else:
+            found.append((line, [symbol]))
+    return found
+
+
+# the fuzzy pattern never has to give back what a quantifier took, which
+# Python 3.11 and later can be told so they don't try
+_POSSESSIVE = "+" if sys.version_info >= (3, 11) else ""
+
+# newline-changing edits logged before the lines of all symbols are brought up to date
+SHIFT_LIMIT = 256
+# symbols found since the catalog was built that are matched separately, before it is rebuilt
+PENDING_LIMIT = 2000
+
+
+class SymbolIndex:
+    """The symbols of one document, see the module documentation.
+
+    `build` starts indexing a snapshot in a background thread. From then on
+    `edit` has to be told about every edit made to the document, and
+    `update` brings the index up to date, on the thread making the edits.
+    """
+
+    def __init__(self, language):
+        self.compiled = symbol_regex(language)
+        # symbols per line, None for lines without any, or None while the index is not built yet
+        self.lines = None
+        self.version = 0
+        self._built = None
+        # lines to scan again, and (line, delta) shifts of the lines below the edits
+        self._dirty = set()
+        self._shifts = []
+        # symbols from the build or from the last time the catalog was rebuilt, the symbols
+        # found since, and the number of symbols that disappeared since
+        self._catalog = _Catalog()
+        self._pending = []
+        self._pending_catalog = None
+        self._dead = 0
+
+    @property
+    def ready(self):
+        return self.lines is not None
+
+    def build(self, snapshot):
+        """Index the whole of `snapshot` in the background, the result is taken in by `update`"""
+        if self.compiled is None:
+            return
+        version = self.version
+        threading.Thread(target=self._build, args=(version, snapshot), name="symbols", daemon=True).start()
+
+    def _build(self, version, snapshot):
+        lines = [None] * snapshot.line_count
+        for line, symbols in extract(self.compiled, snapshot.get_text()):
+            lines[line] = tuple(symbols)
+        self._built = (version, lines)
+
+    def edit(self, line, removed, added):
+        """Account for an edit on `line` that removed `removed` and added `added` line breaks"""
+        self.version += 1
+        if self.lines is None:
+            return
+
+        for symbols in self.lines[line:line + removed + 1]:
+            if symbols:
+                for symbol in symbols:
+                    symbol.alive = False
+                self._dead += len(symbols)
+        self.lines[line:line + removed + 1] = [None] * (added + 1)
+
+        delta = added - removed
+        if delta:
+            self._shifts.append((line + removed, delta))
+            self._dirty = {dirty + delta if dirty > line + removed else dirty for dirty in self._dirty
+                           if not line < dirty <= line + removed}
+        self._dirty.update(range(line, line + added + 1))
+
+    def update(self, document):
+        """Take in the result of the background build, and scan the lines edited since"""
+        if self.compiled is None:
+            return
+        if self._built is not None:
+            version, lines = self._built
+            self._built = None
+            if version == self.version:
+                self._install(lines)
+            else:
+                # edited while building
+                self.build(document.snapshot())
+
+        if self.lines is None or not self._dirty:
+            return
+        epoch = len(self._shifts)
+        line_count = document.line_count
+        for first, last in _runs(sorted(line for line in self._dirty if line < line_count)):
+            text = document.get_text(document.line_start(first), document.line_end(last))
+            for line, symbols in extract(self.compiled, text, first, epoch):
+                self.lines[line] = tuple(symbols)
+                self._pending.extend(symbols)
+                self._pending_catalog = None
+        self._dirty = set()
+        if len(self._shifts) > SHIFT_LIMIT:
+            self._apply_shifts()
+
+    def _install(self, lines):
+        self.lines = lines
+        self._shifts = []
+        self._dirty = set()
+        self._catalog = _Catalog(symbol for symbols in lines if symbols for symbol in symbols)
+        self._pending = []
+        self._pending_catalog = None
+        self._dead = 0
+
+    def _apply_shifts(self):
+        for line, symbols in enumerate(self.lines):
+            if symbols:
+                for symbol in symbols:
+                    symbol.line = line
+                    symbol.epoch = 0
+        self._shifts = []
+
+    def line_of(self, symbol):
+        """The line `symbol` is on now"""
+        line = symbol.line
+        for after, delta in self._shifts[symbol.epoch:]:
+            if line > after:
+                line += delta
+        return line
+
+    def __len__(self):
+        return len(self._catalog.symbols) + len(self._pending) - self._dead
+
+    def symbols(self):
+        """All the symbols, in document order"""
+        if self.lines is None:
+            return []
+        return [symbol for symbols in self.lines if symbols for symbol in symbols]
+
+    def _build_catalog(self):
+        symbols = [symbol for symbol in self._catalog.symbols if symbol.alive]
+        symbols.extend(symbol for symbol in self._pending if symbol.alive)
+        self._catalog = _Catalog(symbols)
+        self._pending = []
+        self._pending_catalog = None
+        self._dead = 0
+
+    def candidates(self, regex):
+        """Yield the live symbols whose lowercased name `regex` finds, shortest names first"""
+        if len(self._pending) > PENDING_LIMIT or self._dead > len(self._catalog.symbols) // 4 + PENDING_LIMIT:
+            self._build_catalog()
+        if not self._pending:
+            return self._catalog.candidates(regex)
+        # symbols found since the catalog was built have a small catalog of their own
+        if self._pending_catalog is None:
+            self._pending_catalog = _Catalog(self._pending)
+        return heapq.merge(
+            self._catalog.candidates(regex),
+            self._pending_catalog.candidates(regex),
+            key=lambda symbol: len(symbol.name),
+        )
+
+
+class _Catalog:
+    """Symbols ordered by name length, with their lowercased names in a single string.
+
+    The string starts with a newline and every name is followed by one, so
+    a name starts with the query where "\n" + query is found.
+    """
+
+    __slots__ = ("symbols", "names", "offsets")
+
+    def __init__(self, symbols=()):
+        self.symbols = sorted(symbols, key=lambda symbol: len(symbol.name))
+        names = [symbol.name.lower().replace("\n", " ") for symbol in self.symbols]
+        self.names = "\n" + "\n".join(names) + "\n"
+        # where the newline before every name is in `names`
+        self.offsets = list(accumulate([0] + [len(name) + 1 for name in names[:-1]])) if names else []
+
+    def candidates(self, regex):
+        symbols, offsets = self.symbols, self.offsets
+        last = None
+        for match in regex.finditer(self.names):
+            symbol = symbols[bisect_right(offsets, match.start()) - 1]
+            # a name can be found more than once
+            if symbol is not last and symbol.alive:
+                last = symbol
+                yield symbol
+
+
+def _runs(lines):
+    """Group sorted line numbers in (first, last) runs of consecutive lines"""
+    runs = []
+    for line in lines:
+        if runs and runs[-1][1] == line - 1:
+            runs[-1][1] = line
+        else:
+            runs.append([line, line])
+    return runs
+
+
+def query_tiers(query):
+    """The regexes a query is matched with, best matches first.
+
+    They all start with a literal, which lets the regex engine skip ahead
+    to where it is found.
+    """
+    query = query.lower().replace("\n", " ")
+    escaped = re.escape(query)
+    tiers = [re.compile(f"\\n{escaped}"), re.compile(escaped)]
+    if len(query) > 1:
+        fuzzy = re.escape(query[0])
+        for char in query[1:]:
+            char = re.escape(char)
+            fuzzy += f"[^{char}\\n]*{_POSSESSIVE}{char}"
+        tiers.append(re.compile(fuzzy))
+    return tiers
+
+
+def find_symbols(indexes, query, limit=50):
+    """Return up to `limit` (index, symbol) pairs matching `query`, best first.
+
+    `indexes` is a sequence of `SymbolIndex`. Names starting with the query
+    come first, then those containing it and last those containing its
+    characters in order, each group with the shortest names first.
+    """
+    if not query:
+        return []
+    results = []
+    seen = set()
+    for regex in query_tiers(query):
+        wanted = limit - len(results)
+        # (-length, order, index, symbol): the longest name kept so far is on top, and is
+        # the bound past which the other indexes, yielding shortest first, can stop
+        tier = []
+        order = 0
+        for index in indexes:
+            if not index.ready:
+                continue
+            for symbol in index.candidates(regex):
+                if symbol in seen:
+                    continue
+                length = len(symbol.name)
+                if len(tier) == wanted:
+                    if length >= -tier[0][0]:
+                        break
+                    heapq.heapreplace(tier, (-length, order, index, symbol))
+                else:
+                    heapq.heappush(tier, (-length, order, index, symbol))
+                order += 1
+        for _, _, index, symbol in sorted(tier, key=lambda item: (-item[0], item[1])):
+            results.append((index, symbol))
+            seen.add(symbol)
+        if len(results) >= limit:
+            break
+    return results
@@ -0,0 +1,308 @@
+import itertools
+import json
+import sys
+import tempfile
+import time
+import weakref
+import zlib
+from collections import deque
+
+# typing pauses longer than this start a new undo group
+GROUP_IDLE_TIME = 1.0  # s
+
+# rough cost of an edit besides its text: the list holding it, its index string, ...
+EDIT_OVERHEAD = 200  # bytes
+
+
+def _end_index(index, text):
+    line, col = map(int, index.split("."))
+    newlines = text.count("\n")
+    if newlines:
+        last_col = len(text) - text.rindex("\n") - 1
+        return f"{line + newlines}.{last_col}"
+    return f"{line}.{col + len(text)}"
+
+
+class UndoGroup:
+    """Edits undone and redone together.
+
+    Every edit is a list `[action, start, text]`, where `action` is "insert"
+    or "delete" and `start` the "line.col" index the text was inserted at
+    (or removed from). Consecutive keystrokes are merged into a single edit.
+    """
+
+    __slots__ = ("edits", "size", "sequence")
+
+    def __init__(self, sequence, edits=None):
+        self.edits = edits if edits is not None else []
+        self.size = sum(sys.getsizeof(text) + EDIT_OVERHEAD for _, _, text in self.edits)
+        self.sequence = sequence
+
+    def try_merge(self, action, start, text):
+        """Extend the last edit with a keystroke next to it, returning whether that worked"""
+        if not self.edits or len(text) != 1:
+            return False
+        last = self.edits[-1]
+        if last[0] != action:
+            return False
+
+        if action == "insert" and _end_index(last[1], last[2]) == start:
+            # a new word starts a new group, trailing whitespace stays with the previous word
+            if last[2][-1].isspace() and not text.isspace():
+                return False
+            last[2] += text
+        elif action == "delete" and start == last[1]:
+            # forward delete
+            last[2] += text
+        elif action == "delete" and _end_index(start, text) == last[1]:
+            # backspace
+            last[1] = start
+            last[2] = text + last[2]
+        else:
+            return False
+        self.size += 1
+        return True
+
+    def add(self, action, start, text):
+        self.edits.append([action, start, text])
+        self.size += sys.getsizeof(text) + EDIT_OVERHEAD
+
+    def to_bytes(self):
+        return zlib.compress(json.dumps([self.sequence, self.edits]).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data):
+        sequence, edits = json.loads(zlib.decompress(data).decode("utf-8"))
+        return cls(sequence, edits)
+
+
+class UndoJournal:
+    """Compressed undo groups evicted from memory, kept in a temporary file.
+
+    Groups leave memory oldest first and come back newest first, so the file
+    is used as a stack: `pop` reads the last group back and truncates the
+    file before it.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="codingg-undo-")
+        self._offsets = []
+        self.size = 0
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def push(self, group):
+        data = group.to_bytes()
+        self._file.seek(self.size)
+        self._file.write(data)
+        self._offsets.append(self.size)
+        self.size += len(data)
+
+    def pop(self):
+        if not self._offsets:
+            return None
+        offset = self._offsets.pop()
+        self._file.seek(offset)
+        data = self._file.read(self.size - offset)
+        self._file.truncate(offset)
+        self.size = offset
+        return UndoGroup.from_bytes(data)
+
+    def clear(self):
+        self._file.truncate(0)
+        self._offsets = []
+        self.size = 0
+
+    def close(self):
+        self._file.close()
+
+
+class UndoBudget:
+    """A memory budget shared by the `UndoHistory` of every tab.
+
+    When the histories together hold more than `limit` bytes, redo groups
+    are dropped first, then the oldest group of any of them is evicted.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        self._histories = weakref.WeakSet()
+        self._sequence = itertools.count()
+
+    def next_sequence(self):
+        return next(self._sequence)
+
+    def register(self, history):
+        self._histories.add(history)
+
+    def unregister(self, history):
+        self._histories.discard(history)
+        self.size -= history.size
+
+    def enforce(self):
+        while self.size > self.limit:
+            redoing = next((history for history in self._histories if history.redo_stack), None)
+            if redoing is not None:
+                redoing.drop_redo()
+                continue
+            oldest = min(
+                (history for history in self._histories if history.undo_stack),
+                key=lambda history: history.undo_stack[0].sequence,
+                default=None,
+            )
+            if oldest is None:
+                break
+            oldest.evict_oldest()
+
+
+class UndoHistory:
+    """Undo and redo stacks for one document, kept below a memory budget.
+
+    Edits are grouped by `record`: keystrokes typed (or deleted) next to each
+    other without a pause are one group, pastes and other bigger edits get
+    their own. Once the history holds more than `limit` bytes, or the shared
+    `budget` is exceeded, undone groups are dropped from the redo stack,
+    those furthest from being redone first. Then the oldest groups are
+    evicted, into a compressed `UndoJournal` on disk when `spill` is set and
+    dropped otherwise.
+    """
+
+    def __init__(self, limit, budget=None, spill=False):
+        self.limit = limit
+        self.budget = budget
+        self.journal = UndoJournal() if spill else None
+
+        self.undo_stack = deque()
+        self.redo_stack = deque()
+        self.size = 0
+        # whether the next edit may join the last group, and whether that was a keystroke
+        self._joinable = False
+        self._keystroke = False
+        self._last_edit_time = 0
+        self._sequence = -1
+
+        if budget is not None:
+            budget.register(self)
+
+    def _next_sequence(self):
+        if self.budget is not None:
+            return self.budget.next_sequence()
+        self._sequence += 1
+        return self._sequence
+
+    def _resize(self, delta):
+        self.size += delta
+        if self.budget is not None:
+            self.budget.size += delta
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack) or bool(self.journal)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def record(self, action, start, text, compound=False):
+        """Record an edit made at `start`, "line.col", right after it was made.
+
+        `compound` edits belong with the edit recorded before them, for
+        example a paste that replaces the selection is a delete and an
+        insert that are undone together.
+        """
+        now = time.monotonic()
+        if self.redo_stack:
+            self._resize(-sum(group.size for group in self.redo_stack))
+            self.redo_stack.clear()
+
+        group = self.undo_stack[-1] if self.undo_stack and self._joinable else None
+        if group is not None:
+            size = group.size
+            if compound:
+                if not group.try_merge(action, start, text):
+                    group.add(action, start, text)
+            elif not (
+                self._keystroke
+                and now - self._last_edit_time <= GROUP_IDLE_TIME
+                and group.try_merge(action, start, text)
+            ):
+                group = None
+            if group is not None:
+                self._resize(group.size - size)
+
+        if group is None:
+            group = UndoGroup(self._next_sequence())
+            group.add(action, start, text)
+            self.undo_stack.append(group)
+            self._resize(group.size)
+
+        self._joinable = True
+        # pastes and other bigger edits are never extended by typing
+        self._keystroke = len(text) == 1
+        self._last_edit_time = now
+        self._enforce()
+
+    def separator(self):
+        """Make the next edit start a new group"""
+        self._joinable = False
+
+    def undo(self):
+        """Pop the last group, returning it for the caller to revert, or None"""
+        self._joinable = False
+        if not self.undo_stack and self.journal:
+            group = self.journal.pop()
+            self._resize(group.size)
+        elif self.undo_stack:
+            group = self.undo_stack.pop()
+        else:
+            return None
+        self.redo_stack.append(group)
+        # a group read back from the journal counts again
+        self._enforce()
+        return group
+
+    def redo(self):
+        """Pop the last undone group, returning it for the caller to apply again, or None"""
+        self._joinable = False
+        if not self.redo_stack:
+            return None
+        group = self.redo_stack.pop()
+        self.undo_stack.append(group)
+        return group
+
+    def drop_redo(self):
+        """Drop the undone group furthest from being redone"""
+        group = self.redo_stack.popleft()
+        self._resize(-group.size)
+
+    def evict_oldest(self):
+        group = self.undo_stack.popleft()
+        self._resize(-group.size)
+        if self.journal is not None:
+            self.journal.push(group)
+
+    def _enforce(self):
+        # the group undone last can still be redone
+        while self.size > self.limit and len(self.redo_stack) > 1:
+            self.drop_redo()
+        while self.size > self.limit and len(self.undo_stack) > 1:
+            self.evict_oldest()
+        if self.budget is not None:
+            self.budget.enforce()
+
+    def clear(self):
+        self._resize(-self.size)
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._joinable = False
+        if self.journal is not None:
+            self.journal.clear()
+
+    def close(self):
+        self.clear()
+        if self.budget is not None:
+            self.budget.unregister(self)
+        if self.journal is not None:
+            self.journal.close()
@@ -0,0 +1,179 @@
+"""Notices files being changed on disk by other programs.
+
+`FileWatcher` puts the path of every watched file that changed on its
+`changes` queue, from a background thread. On Linux the directories of the
+watched files are watched with inotify (called through ctypes), which also
+catches files replaced by a rename, the way formatters and version control
+write them. Elsewhere, or when inotify is out of watches, the files are
+polled: their stat results are cached and compared every `poll_interval`.
+
+The same change can be reported more than once, consumers are expected to
+coalesce them.
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+POLL_INTERVAL = 1.0  # s
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+def _load_inotify():
+    """libc when it has inotify, else None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def stat_stamp(path):
+    """What polling compares, None for a file that is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class FileWatcher:
+    """Reports changes to the files it watches on `changes`, see the module documentation"""
+
+    def __init__(self, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.poll_interval = poll_interval
+        self.changes = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        # path -> how many times it is watched
+        self._paths = {}
+        # directory -> inotify watch descriptor, and back
+        self._directories = {}
+        self._watched_directories = {}
+        # path -> stat stamp, for the files polled
+        self._polled = {}
+
+        self._libc = _load_inotify() if use_inotify else None
+        self._fd = None
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+
+        self._thread = threading.Thread(target=self._run, name="file watcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def backend(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    def watch(self, path):
+        path = Path(path).resolve()
+        with self._lock:
+            self._paths[path] = self._paths.get(path, 0) + 1
+            if self._paths[path] > 1:
+                return
+            directory = path.parent
+            if self._fd is not None and directory not in self._directories:
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+                if wd >= 0:
+                    self._directories[directory] = wd
+                    self._watched_directories[wd] = directory
+            if directory not in self._directories:
+                # no inotify, or out of watches
+                self._polled[path] = stat_stamp(path)
+
+    def unwatch(self, path):
+        path = Path(path).resolve()
+        with self._lock:
+            count = self._paths.get(path, 0) - 1
+            if count > 0:
+                self._paths[path] = count
+                return
+            self._paths.pop(path, None)
+            self._polled.pop(path, None)
+            directory = path.parent
+            wd = self._directories.get(directory)
+            if wd is not None and not any(other.parent == directory for other in self._paths):
+                del self._directories[directory]
+                del self._watched_directories[wd]
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def close(self):
+        # the thread closes the inotify descriptor on its way out
+        self._closed = True
+
+    def _run(self):
+        while not self._closed:
+            if self._fd is not None:
+                readable = select.select([self._fd], [], [], self.poll_interval)[0]
+                if readable:
+                    self._read_events()
+            else:
+                time.sleep(self.poll_interval)
+            self._poll()
+        if self._fd is not None:
+            os.close(self._fd)
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        changed = set()
+        with self._lock:
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost, any file may have changed
+                    changed.update(path for path in self._paths if path.parent in self._directories)
+                    continue
+                directory = self._watched_directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if path in self._paths:
+                    changed.add(path)
+        for path in changed:
+            self.changes.put(path)
+
+    def _poll(self):
+        with self._lock:
+            polled = list(self._polled.items())
+        for path, stamp in polled:
+            current = stat_stamp(path)
+            if current == stamp:
+                continue
+            with self._lock:
+                if path not in self._polled:
+                    continue
+                self._polled[path] = current
+            self.changes.put(path)
@@ -0,0 +1,175 @@
+"""Words of every open document, for completing the one being typed.
+
+`WordIndex` counts how often each word occurs over all the documents, and
+keeps the words in a sorted list: the completions of a prefix are the run
+of words starting at its `bisect` position. A word goes away when its
+count drops to 0.
+
+Each document has a `DocumentWords`, fed every edit as the text around it
+before and after (see `TextArea.event_proxy`): the words of the first are
+taken out of the index and the ones of the second put in, so the index is
+never built by scanning a document again. It also counts the document's
+own words, to take them out when the document is closed.
+"""
+import re
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+
+MIN_LENGTH = 3
+# longer words are not indexed, so the text around an edit never needs more than this of each side
+MAX_LENGTH = 48
+CONTEXT = MAX_LENGTH + 1
+# whole runs of word characters, not starting with a digit
+WORD_PATTERN = re.compile(r"(?<!\w)[^\W\d]\w{%d,%d}(?!\w)" % (MIN_LENGTH - 1, MAX_LENGTH - 1))
+
+# words added or removed at once past which the sorted list is rebuilt, rather than updated word by word
+REBUILD_THRESHOLD = 64
+# candidates looked at to rank the completions of a prefix by how often they occur
+RANK_CANDIDATES = 256
+# bytes taken by a word besides its string: the slots in the list and in the dict
+WORD_OVERHEAD = 8 + 100
+
+_WORD_END = re.compile(r"\w*\Z")
+_WORD_START = re.compile(r"\w*")
+
+
+def find_words(text):
+    return WORD_PATTERN.findall(text)
+
+
+def word_context(before, after):
+    """The word characters at the end of `before` and at the start of `after`, the text around an edit"""
+    return _WORD_END.search(before).group(), _WORD_START.match(after).group()
+
+
+class WordIndex:
+    """Counted words over all documents, see the module documentation.
+
+    Once the index takes `max_bytes`, words it does not have yet are not
+    added anymore (the counts of the ones it has still follow the edits).
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        # word -> number of occurrences
+        self.counts = {}
+        self.words = []
+        self.tokens = 0
+        self._word_bytes = 0
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def memory(self):
+        """Estimated bytes taken by the index"""
+        return sys.getsizeof(self.words) + sys.getsizeof(self.counts) + self._word_bytes
+
+    @property
+    def full(self):
+        return self.max_bytes is not None and self.memory >= self.max_bytes
+
+    def update(self, added, removed):
+        """Count the words in the Counters `added` and `removed`, returning the ones of `added` left out"""
+        counts = self.counts
+        new = []
+        gone = []
+        skipped = []
+        full = self.full
+        for word, n in added.items():
+            count = counts.get(word)
+            if count is None:
+                if full:
+                    skipped.append(word)
+                    continue
+                new.append(word)
+                counts[word] = n
+                self._word_bytes += sys.getsizeof(word) + WORD_OVERHEAD
+            else:
+                counts[word] = count + n
+            self.tokens += n
+        for word, n in removed.items():
+            count = counts.get(word)
+            if count is None:
+                # left out while the index was full
+                continue
+            n = min(n, count)
+            self.tokens -= n
+            if count > n:
+                counts[word] = count - n
+            else:
+                del counts[word]
+                gone.append(word)
+                self._word_bytes -= sys.getsizeof(word) + WORD_OVERHEAD
+
+        if len(new) + len(gone) > REBUILD_THRESHOLD:
+            # one sort of the runs already in order is cheaper than shifting the list for each word
+            if gone:
+                self.words = [word for word in self.words if word in counts]
+            if new:
+                self.words += new
+                self.words.sort()
+            return skipped
+        words = self.words
+        for word in gone:
+            del words[bisect_left(words, word)]
+        for word in new:
+            insort(words, word)
+        return skipped
+
+    def complete(self, prefix, limit=10):
+        """Up to `limit` words starting with `prefix` (other than itself), the most frequent first"""
+        words = self.words
+        counts = self.counts
+        candidates = []
+        n = bisect_left(words, prefix)
+        while n < len(words) and len(candidates) < RANK_CANDIDATES:
+            word = words[n]
+            if not word.startswith(prefix):
+                break
+            if word != prefix:
+                candidates.append(word)
+            n += 1
+        candidates.sort(key=lambda word: -counts[word])
+        return candidates[:limit]
+
+
+class DocumentWords:
+    """The words of one document in a `WordIndex`, kept up to date from its edits.
+
+    `counts` only holds the occurrences the index took in, so closing the
+    document takes out of the index what it put in and nothing more.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.counts = Counter()
+
+    def edit(self, before, after):
+        """Count the edit that turned the text `before` into `after`, both cut at word boundaries"""
+        removed = Counter(find_words(before)) if before else Counter()
+        added = Counter(find_words(after)) if after else Counter()
+        if removed and added:
+            if removed == added:
+                return
+            # words on both sides stay as they are
+            common = removed & added
+            removed -= common
+            added -= common
+        counts = self.counts
+        # words left out of the index while it was full are not the document's to take out
+        removed = Counter({word: min(n, counts[word]) for word, n in removed.items() if word in counts})
+        for word, n in removed.items():
+            if counts[word] > n:
+                counts[word] -= n
+            else:
+                del counts[word]
+        for word in self.index.update(added, removed):
+            del added[word]
+        counts.update(added)
+
+    def close(self):
+        """Take the words of the document out of the index"""
+        self.index.update(Counter(), self.counts)
+        self.counts = Counter()
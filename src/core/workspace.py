@@ -0,0 +1,263 @@
+"""Background scanning of a folder opened in the editor.
+
+`WorkspaceScanner` lists a folder tree from a pool of worker threads,
+skipping whatever `.gitignore` files exclude, and streams the listing of
+every directory to `results` as soon as it is read. Listings are kept in a
+persistent cache keyed by the directory's mtime, so scanning the folder
+again only reads the directories that changed since.
+"""
+import hashlib
+import os
+import pickle
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / ".codingg" / "scan-cache"
+CACHE_VERSION = 2
+
+# never listed, whatever the .gitignore files say
+ALWAYS_IGNORED = frozenset((".git", ".hg", ".svn"))
+
+
+def _translate(pattern):
+    """Turn a .gitignore glob into a regex matching paths relative to the .gitignore's directory"""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex = []
+    position = 0
+    while position < len(pattern):
+        char = pattern[position]
+        if pattern.startswith("**/", position):
+            regex.append("(?:.*/)?")
+            position += 3
+            continue
+        if pattern.startswith("/**", position) and position + 3 == len(pattern):
+            regex.append("/.*")
+            position += 3
+            continue
+        if char == "*":
+            regex.append(".*" if pattern.startswith("**", position) else "[^/]*")
+            position += 2 if pattern.startswith("**", position) else 1
+            continue
+        if char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", position + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[position + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                position = end
+        elif char == "\\" and position + 1 < len(pattern):
+            position += 1
+            regex.append(re.escape(pattern[position]))
+        else:
+            regex.append(re.escape(char))
+        position += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(f"{prefix}{''.join(regex)}\\Z")
+
+
+class IgnoreRules:
+    """The .gitignore rules that apply inside one directory.
+
+    Rules of a directory's .gitignore are added to those of its parent, and
+    like git the last rule matching a path decides whether it is ignored.
+    """
+
+    __slots__ = ("rules", "signature")
+
+    def __init__(self, rules=()):
+        # (directory the rule is relative to, regex, negated, directories only)
+        self.rules = tuple(rules)
+        # compares equal for the same rules, and survives being pickled in the cache
+        self.signature = tuple((directory, regex.pattern, negated, only) for directory, regex, negated, only in rules)
+
+    def extend(self, directory, text):
+        """Return the rules for `directory` (relative to the scan root), given its .gitignore `text`"""
+        rules = list(self.rules)
+        for line in text.splitlines():
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            directories_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line:
+                rules.append((directory, _translate(line), negated, directories_only))
+        return IgnoreRules(rules)
+
+    def ignored(self, path, is_dir):
+        """Whether `path`, relative to the scan root, is ignored"""
+        result = False
+        for directory, regex, negated, directories_only in self.rules:
+            if directories_only and not is_dir:
+                continue
+            if directory:
+                if not path.startswith(directory + "/"):
+                    continue
+                relative = path[len(directory) + 1:]
+            else:
+                relative = path
+            if regex.match(relative):
+                result = not negated
+        return result
+
+
+def _join(directory, name):
+    return f"{directory}/{name}" if directory else name
+
+
+class WorkspaceScanner:
+    """Lists the folder at `root` in the background, see the module documentation.
+
+    Each item on `results` is `(directory, directories, files)`, with paths
+    relative to `root` ("" is the root itself) and names sorted. A None marks
+    the end of the scan. `files` collects every file path found so far.
+    """
+
+    def __init__(self, root, cache_dir=DEFAULT_CACHE_DIR, workers=8):
+        self.root = Path(root).resolve()
+        self.results = queue.Queue()
+        self.files = []
+        self.directory_count = 0
+        # directories read from disk rather than from the cache
+        self.directories_read = 0
+        self.done = threading.Event()
+        self.error = None
+
+        self._cache_path = None
+        if cache_dir is not None:
+            digest = hashlib.sha1(str(self.root).encode("utf-8")).hexdigest()
+            self._cache_path = Path(cache_dir) / f"{digest}.pickle"
+        self._old_cache = {}
+        # directory -> (mtime_ns, .gitignore mtime_ns or None, [(name, is_dir), ...],
+        #               signature of the rules it was filtered with, directories, files)
+        self._new_cache = {}
+
+        self._cancelled = False
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        threading.Thread(target=self._start, name="scan", daemon=True).start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _start(self):
+        self._old_cache = self._load_cache()
+        self._submit("", IgnoreRules())
+
+    def _load_cache(self):
+        if self._cache_path is None:
+            return {}
+        try:
+            with open(self._cache_path, "rb") as fp:
+                version, cache = pickle.load(fp)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return {}
+        return cache if version == CACHE_VERSION else {}
+
+    def _save_cache(self):
+        if self._cache_path is None or self._cancelled:
+            return
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._cache_path.with_suffix(".tmp")
+            with open(temp_path, "wb") as fp:
+                pickle.dump((CACHE_VERSION, self._new_cache), fp, protocol=pickle.HIGHEST_PROTOCOL)
+            temp_path.replace(self._cache_path)
+        except OSError:
+            pass
+
+    def _submit(self, directory, rules):
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._scan_directory, directory, rules)
+
+    def _list(self, directory):
+        """Return the cache entry for `directory`, reusing the old one when the directory is unchanged"""
+        path = self.root / directory if directory else self.root
+        mtime = os.stat(path).st_mtime_ns
+        try:
+            gitignore_mtime = os.stat(path / ".gitignore").st_mtime_ns
+        except OSError:
+            gitignore_mtime = None
+
+        cached = self._old_cache.get(directory)
+        if cached is not None and cached[0] == mtime and cached[1] == gitignore_mtime:
+            return cached
+
+        with os.scandir(path) as scan:
+            entries = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in scan]
+        entries.sort(key=lambda entry: entry[0].lower())
+        with self._lock:
+            self.directories_read += 1
+        return mtime, gitignore_mtime, entries, None, None, None
+
+    def _filter(self, directory, entries, rules):
+        if rules.rules:
+            entries = [
+                (name, is_dir) for name, is_dir in entries if not rules.ignored(_join(directory, name), is_dir)
+            ]
+        directories = [name for name, is_dir in entries if is_dir and name not in ALWAYS_IGNORED]
+        files = [name for name, is_dir in entries if not is_dir]
+        return directories, files
+
+    def _scan_directory(self, directory, rules):
+        try:
+            if self._cancelled:
+                return
+            try:
+                mtime, gitignore_mtime, entries, signature, directories, files = self._list(directory)
+            except OSError as exc:
+                if not directory:
+                    self.error = exc
+                return
+
+            if gitignore_mtime is not None:
+                try:
+                    text = (self.root / directory / ".gitignore").read_text(encoding="utf-8", errors="replace")
+                except OSError:
+                    pass
+                else:
+                    rules = rules.extend(directory, text)
+
+            # filtering is skipped too when the rules did not change either
+            if signature != rules.signature or directories is None:
+                directories, files = self._filter(directory, entries, rules)
+            self._new_cache[directory] = (mtime, gitignore_mtime, entries, rules.signature, directories, files)
+
+            for name in directories:
+                self._submit(_join(directory, name), rules)
+            self.files.extend([_join(directory, name) for name in files])
+
+            with self._lock:
+                self.directory_count += 1
+            self.results.put((directory, directories, files))
+        finally:
+            self._finish_task()
+
+    def _finish_task(self):
+        with self._lock:
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self._save_cache()
+            self._executor.shutdown(wait=False)
+            self.results.put(None)
+            self.done.set()
@@ -1,11 +1,25 @@
+import importlib.util
+import os
+import time
 import tkinter as tk
 from pathlib import Path
-from tkinter import filedialog, ttk
 
-from ui.linegutter import LineGutter
-from ui.textarea import TextArea
+from core import instrumentation
+from core.journal import (
+    DEFAULT_JOURNAL_DIR,
+    ORPHANED_SUFFIX,
+    Journal,
+    JournalWriter,
+    file_stamp,
+    journal_path,
+    unfinished_journals,
+)
+from core.piecetable import PieceTable
+from core.session import DEFAULT_SESSION_PATH
+from core.undo import UndoBudget, UndoHistory
 from ui.filetab import FileTab
 from ui.notebook import CustomNotebook
+from ui.widgetpool import EditorWidgets, WidgetPool
 
 SRC_PATH = Path(__file__).parent.resolve()
 RESOURCES_PATH = SRC_PATH.joinpath("../resources/").resolve()
@@ -15,6 +29,53 @@ DEFAULT_EDITOR_CONFIG = {
     "tabsize": 4,
     "tab-to-spaces": True,
     "show-welcome": True,
+    # lines scrolled per wheel notch, and whether a notch glides there instead of jumping
+    "wheel-lines": 3,
+    "smooth-scrolling": False,
+    # files at least this big (in bytes) are opened read-only, memory-mapped
+    "large-file-size": 64 * 1024 * 1024,
+    # tabs keeping their widgets while in the background, the rest only keep their document
+    "max-live-tabs": 8,
+    # widgets kept around for reuse by the next tab that needs them
+    "widget-pool-size": 4,
+    # bytes of undo history kept in memory per tab and for all tabs together
+    "undo-tab-budget": 16 * 1024 * 1024,
+    "undo-total-budget": 64 * 1024 * 1024,
+    # move undo history over the budget to a compressed file instead of forgetting it
+    "undo-spill": True,
+    # edits are journaled as they are made, autosave writes the journaled files every interval (in s)
+    "autosave": True,
+    "autosave-interval": 30,
+    "journal-dir": str(DEFAULT_JOURNAL_DIR),
+    # folder scanning: worker threads, and where directory listings are cached between runs
+    "scan-workers": 8,
+    "scan-cache-dir": str(Path.home() / ".codingg" / "scan-cache"),
+    # time every callback, show the timings in the status bar and allow exporting a trace.
+    # can also be turned on with the CODINGG_INSTRUMENT environment variable
+    "instrumentation": False,
+    # event loop callbacks taking longer than this (in ms) are reported as slow frames
+    "slow-frame-ms": 50,
+    # check documents for errors in worker processes, this many ms after typing stops
+    "diagnostics": True,
+    "diagnostics-delay": 400,
+    "diagnostics-workers": 2,
+    # follow changes other programs make to open files, polling every interval (in s) where inotify is missing
+    "watch-files": True,
+    "watch-poll-interval": 1.0,
+    # mark the lines changed since the last commit in the gutter
+    "git-gutter": True,
+    # complete words from all open tabs as they are typed, the index of their words taking at most this many bytes
+    "completion": True,
+    "completion-memory": 64 * 1024 * 1024,
+    # lines longer than this are shown cut off, Tk takes seconds to lay out a minified file on one line.
+    # the rest of a line is shown by clicking where it is cut off, None always shows lines whole
+    "long-line-limit": 10_000,
+    # an overview of the document next to the scrollbar, click or drag it to scroll. needs Pillow
+    "minimap": True,
+    # reopen the tabs open when the editor was last closed, reading the files of the ones not shown in the background.
+    # the session is kept in this file, the CODINGG_SESSION environment variable overrides it ("" turns it off)
+    "restore-session": True,
+    "session-file": str(DEFAULT_SESSION_PATH),
 }
 
 WELCOME_MESSAGE = """Welcome to Codingg!
@@ -38,6 +99,45 @@ class MainWindow(tk.Tk):
         # load config
         self.editor_config = DEFAULT_EDITOR_CONFIG
 
+        # hooked in before any widget registers a callback, so all of them are timed
+        instrument = self.editor_config.get("instrumentation", DEFAULT_EDITOR_CONFIG["instrumentation"])
+        if instrument or os.environ.get("CODINGG_INSTRUMENT"):
+            from ui.instrument import install
+
+            slow_frame = self.editor_config.get("slow-frame-ms", DEFAULT_EDITOR_CONFIG["slow-frame-ms"])
+            install(instrumentation.enable(slow_frame))
+
+        self.journal_writer = JournalWriter()
+        # tab -> journaled edits to replay once its file is loaded
+        self.pending_recovery = {}
+        # tab -> (line, column) to move the cursor to once its file is loaded
+        self.pending_cursor = {}
+        # tabs restored from the last session, whose cursor, selection and scroll position are put back once loaded
+        self.pending_view = set()
+        # `ui.session.SessionLoader` reading the files of restored tabs, and the tabs in the order it reads them
+        self.session_loader = None
+        self.restore_order = []
+
+        # `core.gitdiff.HeadBlobs`, the committed version of the files opened
+        self.head_blobs = None
+        # `ui.filechanges.FileChanges`, started when the first file is loaded
+        self.file_changes = None
+        # `core.diagnostics.DiagnosticsRunner`, started when the first document it can check is opened
+        self.diagnostics_runner = None
+        # `core.words.WordIndex` of the words in all tabs, and the `ui.completion.CompletionPopup` once shown
+        self.word_index = None
+        self.completion = None
+        if self.editor_config.get("completion", DEFAULT_EDITOR_CONFIG["completion"]):
+            from core.words import WordIndex
+
+            self.word_index = WordIndex(
+                self.editor_config.get("completion-memory", DEFAULT_EDITOR_CONFIG["completion-memory"])
+            )
+
+        self.undo_budget = UndoBudget(
+            self.editor_config.get("undo-total-budget", DEFAULT_EDITOR_CONFIG["undo-total-budget"])
+        )
+
         # The `highlightthickness` option used below ensures that a border won't
         # be added to the sides of each widget when the window loses focus.
         # This behavior was only noticed on Linux machines (Arch/Ubuntu 18.04).
@@ -60,16 +160,54 @@ class MainWindow(tk.Tk):
             fg=self.status_bar["fg"],
             textvar=self.current_index,
         )
+        self.load_status = tk.StringVar()
+        self.diagnostic_message = tk.StringVar()
+        self.status_bar_diagnostic = tk.Label(
+            self.status_bar,
+            bg=self.status_bar["bg"],
+            fg=self.status_bar["fg"],
+            textvar=self.diagnostic_message,
+        )
+        self.status_bar_load = tk.Label(
+            self.status_bar,
+            bg=self.status_bar["bg"],
+            fg=self.status_bar["fg"],
+            textvar=self.load_status,
+        )
+
+        self.instrumentation_overlay = None
+        if instrumentation.recorder is not None:
+            from ui.instrument import InstrumentationOverlay
+
+            self.instrumentation_overlay = InstrumentationOverlay(
+                self.status_bar,
+                instrumentation.recorder,
+                bg=self.status_bar["bg"],
+                fg=self.status_bar["fg"],
+            )
+            self.instrumentation_overlay.bind("<Button-1>", self.export_trace)
 
         # menu bar
         self.menu_bar = self.create_menu_bar()
         self.configure(menu=self.menu_bar)
 
+        # `ui.folderpanel.FolderPanel` once a folder was opened
+        self.folder_panel = None
+        # `ui.findbar.FindBar` and `ui.searchpanel.SearchPanel`, created when first used
+        self.find_bar = None
+        self.search_panel = None
+
         self.open_tabs = []
+        # materialized tabs, least recently viewed first
+        self.live_tabs = []
         self.viewing_tab = None
 
         # create notebook for tabs
         self.notebook = CustomNotebook(self)
+        self.widget_pool = WidgetPool(
+            self.create_editor_widgets,
+            self.editor_config.get("widget-pool-size", DEFAULT_EDITOR_CONFIG["widget-pool-size"]),
+        )
         #self.notebook.enable_traversal()
 
         # TODO : re-implement the ttk style for scrollbar to give us more control
@@ -82,63 +220,506 @@ class MainWindow(tk.Tk):
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         self.status_bar_text.pack(side=tk.RIGHT, fill=tk.X, padx=8)
         self.status_bar_indent.pack(side=tk.RIGHT, fill=tk.X)
+        self.status_bar_load.pack(side=tk.LEFT, fill=tk.X, padx=8)
+        self.status_bar_diagnostic.pack(side=tk.LEFT, fill=tk.X, padx=8)
+        if self.instrumentation_overlay is not None:
+            self.instrumentation_overlay.pack(side=tk.LEFT, fill=tk.X, padx=8)
 
-        if self.editor_config["show-welcome"]:
+        restored = self.restore_session()
+        if self.editor_config["show-welcome"] and not restored:
             self.open_welcome_tab()
 
         # set up event handling
         self.bind_events()
 
-    def bind_new_tab_events(self, tab):
+        self.restore_journals()
+        if self.editor_config.get("autosave", DEFAULT_EDITOR_CONFIG["autosave"]):
+            self.after(self.autosave_interval, self.autosave)
+
+    def bind_editor_events(self, widgets):
         # status bar events
-        tab.text_area.bind("<KeyRelease>", self.update_index)  # update line and column
-        tab.text_area.bind("<ButtonRelease-1>", self.update_index)
+        widgets.text_area.add_change_listener(self.handle_text_changes)  # update line and column
 
         # context menu event
-        tab.text_area.bind("<Button-3>", self.show_context_menu)
+        widgets.text_area.bind("<Button-3>", self.show_context_menu)
+
+        # handle tab key, shift+tab outdents (ISO_Left_Tab is what X11 sends for it)
+        widgets.text_area.bind("<Tab>", self.insert_spaces)
+        for sequence in ("<Shift-Tab>", "<ISO_Left_Tab>"):
+            widgets.text_area.bind(sequence, self.outdent_block)
+        widgets.text_area.bind("<Control-slash>", self.toggle_comment)
+
+        # word completion, the keys choosing a word go to the popup while it is shown
+        if self.word_index is not None:
+            text_area = widgets.text_area
+            text_area.add_change_listener(lambda changes: self.complete_word(text_area, changes))
+            for sequence in ("<Up>", "<Down>", "<Return>", "<Escape>"):
+                text_area.bind(sequence, self.completion_key)
+
+    def create_editor_widgets(self):
+        widgets = EditorWidgets(
+            self.notebook,
+            text_options=dict(
+                bg="#282c34",
+                fg="#abb2bf",
+                insertbackground="#528bff",
+                borderwidth=0,
+                highlightthickness=0,  # disable highlighting this
+            ),
+            gutter_options=dict(
+                bg="#282c34",
+                fg="#4b5364",  # `fg` refers to the text widget within the LineGutter Canvas
+                borderwidth=0,
+                highlightthickness=0,
+                width=30,
+            ),
+            scroll_options=dict(
+                smooth=self.editor_config.get("smooth-scrolling", DEFAULT_EDITOR_CONFIG["smooth-scrolling"]),
+                wheel_lines=self.editor_config.get("wheel-lines", DEFAULT_EDITOR_CONFIG["wheel-lines"]),
+            ),
+            minimap_options=self.minimap_options(),
+        )
+        self.bind_editor_events(widgets)
+        return widgets
 
-        # handle tab key
-        tab.text_area.bind("<Tab>", self.insert_spaces)
+    def minimap_options(self):
+        """Options of the minimap Canvas, None when there is no minimap"""
+        if not self.editor_config.get("minimap", DEFAULT_EDITOR_CONFIG["minimap"]):
+            return None
+        if importlib.util.find_spec("PIL") is None:
+            # the tiles are rendered with Pillow
+            return None
+        return dict(borderwidth=0, highlightthickness=0, cursor="arrow")
 
     def open_new_tab(self, fp: Path = None, text: str = None, title: str = "untitled"):
-        tab = FileTab(self.notebook)
+        tab = self.add_tab(fp, text, title)
+        self.show_tab(tab)
+        if text is None and tab.large_file is None:
+            self.load_file(tab, fp)
+
+        # set focus to the text_area area and update line/column
+        self.notebook.select(tab)
+        tab.text_area.focus_set()
+        self.viewing_tab = tab
+        self.update_index()
+        return tab
+
+    def add_tab(self, fp: Path = None, text: str = None, title: str = "untitled"):
+        """Add a tab for `fp` (or showing `text`) to the notebook, without showing or reading anything"""
         title = fp.name if fp else title
-        tab.scrollbar = ttk.Scrollbar(tab, orient="vertical", command=self.scroll_text)
-        tab.text_area = TextArea(
-            tab,
-            bg="#282c34",
-            fg="#abb2bf",
-            insertbackground="#528bff",
-            borderwidth=0,
-            highlightthickness=0,  # disable highlighting this
-            undo=True,
-        )
+        tab = FileTab(self.notebook, path=fp, title=title)
+        tab.tabsize = self.editor_config.get("tabsize", DEFAULT_EDITOR_CONFIG["tabsize"])
+        self.notebook.add(tab, text=title)
 
-        tab.line_gutter = LineGutter(
-            tab,
+        self.open_tabs.append(tab)
+
+        large_file_size = self.editor_config.get("large-file-size", DEFAULT_EDITOR_CONFIG["large-file-size"])
+        # file support is imported on first use, the welcome tab does not need it
+        if text is None and fp.stat().st_size >= large_file_size:
+            from core.largefile import LargeFile
+
+            tab.large_file = LargeFile(fp)
+        else:
+            tab.document = PieceTable(text or "")
+            tab.long_line_limit = (
+                self.editor_config.get("long-line-limit", DEFAULT_EDITOR_CONFIG["long-line-limit"]) or None
+            )
+            tab.undo_history = UndoHistory(
+                self.editor_config.get("undo-tab-budget", DEFAULT_EDITOR_CONFIG["undo-tab-budget"]),
+                self.undo_budget,
+                spill=self.editor_config.get("undo-spill", DEFAULT_EDITOR_CONFIG["undo-spill"]),
+            )
+            if fp:
+                from core.highlight import language_for_path
+
+                tab.language = language_for_path(fp)
+                tab.diagnostics_runner = self.runner_for(tab.language)
+                tab.diagnostics_delay = self.editor_config.get(
+                    "diagnostics-delay", DEFAULT_EDITOR_CONFIG["diagnostics-delay"]
+                )
+            if self.word_index is not None:
+                from core.words import DocumentWords
+
+                tab.words = DocumentWords(self.word_index)
+                if text:
+                    tab.words.edit("", text)
+            if tab.language is not None:
+                from core.symbols import SymbolIndex
+
+                tab.symbols = SymbolIndex(tab.language)
+                if text is not None:
+                    tab.symbols.build(tab.document.snapshot())
+        return tab
+
+    def runner_for(self, language):
+        """The `core.diagnostics.DiagnosticsRunner` checking documents in `language`, if any does"""
+        if language is None or not self.editor_config.get("diagnostics", DEFAULT_EDITOR_CONFIG["diagnostics"]):
+            return None
+        from core.diagnostics import DiagnosticsRunner
+
+        if not DiagnosticsRunner.has_checker(language.name):
+            return None
+        if self.diagnostics_runner is None:
+            self.diagnostics_runner = DiagnosticsRunner(
+                self.editor_config.get("diagnostics-workers", DEFAULT_EDITOR_CONFIG["diagnostics-workers"])
+            )
+        return self.diagnostics_runner
+
+    def show_tab(self, tab):
+        """Give `tab` widgets if it has none, taking them from the tabs viewed least recently"""
+        tab.viewed = time.time()
+        if tab in self.live_tabs:
+            self.live_tabs.remove(tab)
+        else:
+            tab.materialize(self.widget_pool.acquire())
+            if tab.unloaded:
+                # shown before the session loader got to it, read it here where it can be seen coming in
+                tab.unloaded = False
+                self.pending_view.add(tab)
+                self.load_file(tab, tab.path)
+        self.live_tabs.append(tab)
+
+        max_live_tabs = self.editor_config.get("max-live-tabs", DEFAULT_EDITOR_CONFIG["max-live-tabs"])
+        for old_tab in self.live_tabs[:-1]:
+            if len(self.live_tabs) <= max_live_tabs:
+                break
+            # a tab keeps its widgets until its file is loaded
+            if old_tab.loading is None:
+                self.live_tabs.remove(old_tab)
+                self.widget_pool.release(old_tab.dehydrate())
+
+    def load_file(self, tab, fp: Path):
+        """Read `fp` in the background and stream it into the tab"""
+        from core.loader import FileLoader
+        from ui.progressiveload import ProgressiveLoad
+
+        try:
+            loader = FileLoader(fp)
+        except OSError as exc:
+            # deleted since the session was saved, the tab stays empty like one the session loader could not read
+            self.pending_view.discard(tab)
+            self.load_status.set(f"Could not read {fp.name}: {exc}")
+            return
+        tab.loading = ProgressiveLoad(
             tab.text_area,
-            bg="#282c34",
-            fg="#4b5364",  # `fg` refers to the text widget within the LineGutter Canvas
-            borderwidth=0,
-            highlightthickness=0,
-            width=30,
+            loader,
+            on_progress=lambda load: self.show_load_status(tab),
+            on_done=lambda load: self.handle_load_done(tab),
+            long_lines=tab.long_lines,
         )
-        self.notebook.add(tab, text=title)
 
-        self.bind_new_tab_events(tab)
+    def show_load_status(self, tab):
+        if tab is not self.viewing_tab:
+            return
+        if tab.loading is None:
+            self.load_status.set("")
+        else:
+            self.load_status.set(f"Loading {tab.loading.loader.path.name}... {tab.loading.progress:.0%}")
 
-        self.open_tabs.append(tab)
+    def handle_load_done(self, tab):
+        loader = tab.loading.loader
+        tab.loading = None
+        tab.encoding = loader.encoding
+        tab.newline = loader.newline
+        self.show_load_status(tab)
+        edits = self.pending_recovery.pop(tab, None)
+        if loader.error is not None:
+            self.load_status.set(f"Could not read {loader.path.name}: {loader.error}")
+        else:
+            if edits is not None:
+                self.replay_edits(tab, edits)
+            self.start_journal(tab, resume=edits is not None)
+            self.watch_file(tab)
+            self.show_git_changes(tab)
+            if tab.symbols is not None:
+                tab.symbols.build(tab.document.snapshot())
+        if tab in self.pending_view:
+            self.pending_view.discard(tab)
+            if tab.materialized:
+                tab.restore_view()
+        if tab in self.pending_cursor:
+            self.move_cursor(tab, *self.pending_cursor.pop(tab))
+        if tab is self.viewing_tab:
+            self.update_index()
 
-        tab.text_area.insert("1.0", text or fp.read_text(encoding="utf-8"))
+    @property
+    def session_path(self):
+        """Where the session is kept, None when sessions are turned off"""
+        if not self.editor_config.get("restore-session", DEFAULT_EDITOR_CONFIG["restore-session"]):
+            return None
+        path = os.environ.get("CODINGG_SESSION")
+        if path is None:
+            path = self.editor_config.get("session-file", DEFAULT_EDITOR_CONFIG["session-file"])
+        return Path(path) if path else None
 
-        # set focus to the text_area area and update line/column
-        if len(self.open_tabs) != 1:
-            self.notebook.select(len(self.open_tabs) - 1)
-        else:
-            self.notebook.select(0)
-        tab.text_area.focus_set()
+    def restore_session(self):
+        """Add a tab for every file open in the last session, returning whether there was any.
+
+        The tabs are only headers at first. The one selected reads its file
+        when it is shown, like any tab restored that is shown before the
+        `ui.session.SessionLoader` read it in the background.
+        """
+        if self.session_path is None:
+            return False
+        from core.session import likely_order, read_session
+
+        session = read_session(self.session_path)
+        if session is None:
+            return False
+        states, selected = session
+        tabs = []
+        selected_tab = None
+        for n, state in enumerate(states):
+            try:
+                tab = self.add_tab(Path(state.path))
+            except OSError:
+                # gone since
+                continue
+            tab.cursor = state.cursor
+            tab.selection = state.selection
+            tab.top_line = state.top_line
+            tab.viewed = state.viewed
+            tab.unloaded = tab.large_file is None
+            tabs.append(tab)
+            if n == selected or selected_tab is None:
+                selected_tab = tab
+        if not tabs:
+            return False
+
+        from ui.session import SessionLoader
+
+        order = likely_order([tab.viewed for tab in tabs], tabs.index(selected_tab))
+        self.restore_order = [tabs[n] for n in reversed(order)]
+        self.show_tab(selected_tab)
+        self.notebook.select(selected_tab)
+        selected_tab.text_area.focus_set()
+        self.viewing_tab = selected_tab
         self.update_index()
-        self.viewing_tab = tab
+        self.session_loader = SessionLoader(self, self.next_restored_tab, self.handle_restored_tab)
+        return True
+
+    def next_restored_tab(self):
+        """The tab for the `SessionLoader` to read next, None once all of them were read"""
+        while self.restore_order:
+            tab = self.restore_order.pop()
+            if tab.unloaded and tab in self.open_tabs:
+                return tab
+        self.session_loader = None
+        return None
+
+    def handle_restored_tab(self, tab, loader, document, text):
+        if not tab.unloaded or tab not in self.open_tabs:
+            # shown or closed while its file was being read
+            return
+        tab.unloaded = False
+        if loader is None or loader.error is not None:
+            self.load_status.set(f"Could not read {tab.path.name}: {loader.error if loader else 'no such file'}")
+            return
+        tab.document = document
+        tab.encoding = loader.encoding
+        tab.newline = loader.newline
+        if tab.words is not None:
+            tab.words.edit("", text)
+        self.start_journal(tab)
+        self.watch_file(tab)
+        self.show_git_changes(tab)
+        if tab.symbols is not None:
+            tab.symbols.build(document.snapshot())
+
+    def save_session(self):
+        """Save the tabs open, for `restore_session` to reopen the next time the editor starts"""
+        if self.session_path is None:
+            return
+        from core.session import TabState, write_session
+
+        states = []
+        selected = 0
+        for tab in self.open_tabs:
+            if tab.path is None:
+                continue
+            if tab is self.viewing_tab:
+                selected = len(states)
+            if tab.materialized and tab.loading is None:
+                tab.remember_view()
+            states.append(TabState(str(tab.path), tab.cursor, tab.selection, tab.top_line, tab.viewed))
+        try:
+            write_session(self.session_path, states, selected)
+        except OSError as exc:
+            self.load_status.set(f"Could not save the session: {exc}")
+
+    @property
+    def journal_dir(self):
+        return Path(self.editor_config.get("journal-dir", DEFAULT_EDITOR_CONFIG["journal-dir"]))
+
+    @property
+    def autosave_interval(self):
+        return int(self.editor_config.get("autosave-interval", DEFAULT_EDITOR_CONFIG["autosave-interval"]) * 1000)
+
+    def start_journal(self, tab, resume=False):
+        """Stream the edits made to `tab` to its journal from now on"""
+        try:
+            tab.journal = Journal(
+                self.journal_writer,
+                journal_path(self.journal_dir, tab.path),
+                tab.path,
+                tab.encoding,
+                tab.newline,
+                resume=resume,
+            )
+        except OSError as exc:
+            self.load_status.set(f"Edits to {tab.path.name} are not journaled: {exc}")
+
+    def watch_file(self, tab):
+        """Reload the parts of `tab` its file changes on disk"""
+        if not self.editor_config.get("watch-files", DEFAULT_EDITOR_CONFIG["watch-files"]):
+            return
+        if self.file_changes is None:
+            from ui.filechanges import FileChanges
+
+            self.file_changes = FileChanges(
+                self,
+                self.load_status.set,
+                self.editor_config.get("watch-poll-interval", DEFAULT_EDITOR_CONFIG["watch-poll-interval"]),
+            )
+        self.file_changes.watch(tab)
+
+    def show_git_changes(self, tab):
+        """Mark the lines of `tab` changed since the last commit, once its file is loaded"""
+        if not self.editor_config.get("git-gutter", DEFAULT_EDITOR_CONFIG["git-gutter"]):
+            return
+        if self.head_blobs is None:
+            from core.gitdiff import HeadBlobs
+
+            self.head_blobs = HeadBlobs()
+        tab.head_blobs = self.head_blobs
+        tab.show_git_changes()
+
+    def restore_journals(self):
+        """Reopen the files whose journals hold edits that were never saved, and replay them.
+
+        Files opened as a read-only `LargeFile` are left as they are on
+        disk, and their journals kept.
+        """
+        for path, header, edits in unfinished_journals(self.journal_dir):
+            file_path = Path(header["path"])
+            try:
+                unchanged = file_stamp(file_path) == (header["size"], header["mtime_ns"])
+            except OSError:
+                unchanged = False
+            if not unchanged:
+                # the edits no longer apply, keep them around without trying again
+                path.replace(path.with_suffix(ORPHANED_SUFFIX))
+                self.load_status.set(f"{file_path.name} changed on disk, its unsaved edits are kept in {path.parent}")
+                continue
+            tab = self.find_tab(file_path)
+            if tab is None:
+                tab = self.open_new_tab(file_path)
+            elif tab.unloaded:
+                # restored by the session, its file is read now so the edits can be replayed once it is in
+                self.show_tab(tab)
+            if tab.large_file is not None:
+                # shown read-only, the journal stays where it is for a start with a higher "large-file-size"
+                self.load_status.set(
+                    f"{file_path.name} is too large to edit, its unsaved edits were not restored and are kept in {path}"
+                )
+                continue
+            self.pending_recovery[tab] = edits
+
+    def replay_edits(self, tab, edits):
+        text_area = tab.text_area
+        for action, offset, value in edits:
+            line, col = tab.document.offset_to_position(offset)
+            index = tab.long_lines.index(line, col) if tab.long_lines is not None else f"{line + 1}.{col}"
+            if action == "i":
+                text_area.insert(index, value)
+            else:
+                text_area.delete(index, f"{index}+{value}c")
+            # the next offset is resolved against the document, so it has to catch up
+            text_area.flush_changes()
+        self.load_status.set(f"Restored unsaved changes to {tab.path.name}")
+
+    def save_tab(self, tab):
+        """Write the document of `tab` to its file, in the background"""
+        if tab.journal is None:
+            return
+        if tab.materialized:
+            tab.text_area.flush_changes()
+        tab.journal.compact(tab.document.snapshot())
+        if self.search_panel is not None:
+            self.search_panel.invalidate(tab.path)
+
+    def save_file(self, event=None):
+        if self.open_tabs:
+            self.save_tab(self.current_tab)
+        return "break"
+
+    def autosave(self):
+        for tab in self.open_tabs:
+            if tab.journal is None:
+                continue
+            if tab.journal.error is not None:
+                self.load_status.set(f"Could not save {tab.path.name}: {tab.journal.error}")
+            if tab.journal.dirty:
+                self.save_tab(tab)
+        # a crash loses the tabs opened since the last save at most
+        self.save_session()
+        self.after(self.autosave_interval, self.autosave)
+
+    def close_tab(self, tab):
+        self.pending_recovery.pop(tab, None)
+        self.pending_cursor.pop(tab, None)
+        self.pending_view.discard(tab)
+        if self.find_bar is not None and self.find_bar.tab is tab:
+            self.find_bar.detach()
+        if self.file_changes is not None and tab.path is not None:
+            self.file_changes.unwatch(tab)
+        if tab.loading is not None:
+            tab.loading.cancel()
+            tab.loading = None
+        if tab in self.live_tabs:
+            self.live_tabs.remove(tab)
+            self.widget_pool.release(tab.dehydrate())
+        if tab.large_file is not None:
+            tab.large_file.close()
+        if tab.undo_history is not None:
+            tab.undo_history.close()
+        if tab.words is not None:
+            tab.words.close()
+        if tab.journal is not None:
+            self.close_journal(tab)
+
+        self.open_tabs.remove(tab)
+        if tab is self.viewing_tab:
+            self.viewing_tab = None
+            self.load_status.set("")
+        tab.destroy()
+
+    def close_journal(self, tab):
+        # without autosave unsaved edits stay journaled, and come back the next time the editor starts
+        if tab.journal.dirty and self.editor_config.get("autosave", DEFAULT_EDITOR_CONFIG["autosave"]):
+            self.save_tab(tab)
+        tab.journal.close(remove=not tab.journal.dirty)
+        tab.journal = None
+
+    def quit_editor(self):
+        self.save_session()
+        if self.session_loader is not None:
+            self.session_loader.close()
+        for tab in self.open_tabs:
+            if tab.loading is not None:
+                tab.loading.cancel()
+            if tab.journal is not None:
+                self.close_journal(tab)
+        if self.diagnostics_runner is not None:
+            self.diagnostics_runner.shutdown()
+        if self.file_changes is not None:
+            self.file_changes.close()
+        # wait for the journals to reach the disk
+        self.journal_writer.close()
+        self.destroy()
+
+    def handle_tab_closed(self, event):
+        self.close_tab(self.notebook.closed_tab)
 
     def open_welcome_tab(self):
         self.open_new_tab(title="Welcome to Codingg", text=WELCOME_MESSAGE)
@@ -148,15 +729,21 @@ class MainWindow(tk.Tk):
         return self.open_tabs[self.notebook.index("current")]
 
     def handle_tab_changed(self, event):
-        self.viewing_tab.scrollbar.pack_forget()
-        self.viewing_tab.text_area.pack_forget()
-        self.viewing_tab.line_gutter.pack_forget()
+        if not self.open_tabs:
+            return
 
         self.viewing_tab = self.current_tab
-        self.viewing_tab.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        if self.completion is not None:
+            self.completion.hide()
+        self.show_tab(self.viewing_tab)
         self.notebook.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        self.viewing_tab.line_gutter.pack(side=tk.LEFT, fill=tk.Y)
-        self.viewing_tab.text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        if self.find_bar is not None:
+            self.find_bar.attach(self.viewing_tab)
+        if self.file_changes is not None:
+            self.file_changes.shown(self.viewing_tab)
+        self.viewing_tab.text_area.focus_set()
+        self.update_index()
+        self.show_load_status(self.viewing_tab)
 
     def toggle_fullscreen(self, event=None):
         self.attributes("-fullscreen", not self.attributes("-fullscreen"))
@@ -166,52 +753,149 @@ class MainWindow(tk.Tk):
         self.bind("<F11>", self.toggle_fullscreen)
         self.bind("<Control_L>n", lambda e: self.open_new_tab(text="Open new file or select a language.\nStart typing and save to create an new file."))
         self.notebook.bind("<<NotebookTabChanged>>", self.handle_tab_changed)
+        self.notebook.bind("<<NotebookTabClosed>>", self.handle_tab_closed)
+        self.bind("<Control-g>", self.goto_line)
+        self.bind("<Control-s>", self.save_file)
+        self.bind("<Control-f>", self.find)
+        self.bind("<Control-F>", self.find_in_files)
+        self.bind("<Control-O>", self.go_to_symbol)
+        self.protocol("WM_DELETE_WINDOW", self.quit_editor)
+
+    def complete_word(self, text_area, changes):
+        if self.completion is None:
+            if not any(change.is_edit for change in changes):
+                return
+            from ui.completion import CompletionPopup
+
+            self.completion = CompletionPopup(self, self.word_index)
+        self.completion.on_changes(text_area, changes)
+
+    def completion_key(self, event):
+        if self.completion is None:
+            return None
+        return self.completion.key(event)
+
+    @property
+    def indent_unit(self):
+        if self.editor_config.get("tab-to-spaces", DEFAULT_EDITOR_CONFIG["tab-to-spaces"]):
+            return " " * self.editor_config.get("tabsize", DEFAULT_EDITOR_CONFIG["tabsize"])
+        return "\t"
 
     def insert_spaces(self, event):
-        current_tab = self.current_tab
-        if self.editor_config.get(
-            "tab-to-spaces", DEFAULT_EDITOR_CONFIG["tab-to-spaces"]
-        ):
-            current_tab.text_area.insert(
-                tk.INSERT,
-                " " * self.editor_config.get("tabsize", DEFAULT_EDITOR_CONFIG["tabsize"]),
-            )
+        if self.completion_key(event) == "break":
             return "break"
+        current_tab = self.current_tab
+        multi_cursor = current_tab.widgets.multi_cursor
+        if multi_cursor.active:
+            multi_cursor.type(self.indent_unit)
+        elif self.selected_lines(current_tab.text_area, whole=False) is not None:
+            # a selection over several lines is indented as a block
+            self.indent_block()
         else:
-            current_tab.text_area.insert(tk.INSERT, "\t")
-            return "break"
+            current_tab.text_area.insert(tk.INSERT, self.indent_unit)
+        return "break"
 
-    def show_context_menu(self, event):
-        current_tab = self.current_tab
-        x = self.winfo_x() + current_tab.text_area.winfo_x() + event.x
-        y = self.winfo_y() + current_tab.text_area.winfo_y() + event.y
-        current_tab.context_menu.post(x, y)
+    def selected_lines(self, text_area, whole=True):
+        """(first line number, texts of the lines) the selection is on, or the cursor when there is none.
 
-    def scroll_text(self, *args):
-        if len(args) > 1:
-            self.current_tab.text_area.yview_moveto(args[1])
+        With `whole` unset, a selection within a single line is no block of
+        lines either, and gives None like no selection.
+        """
+        ranges = text_area.tag_ranges("sel")
+        if ranges:
+            first = int(str(ranges[0]).split(".")[0])
+            line, col = map(int, str(ranges[-1]).split("."))
+            # a selection ending at the start of a line leaves that line out
+            last = line - 1 if col == 0 and line > first else line
+        elif whole:
+            first = last = int(text_area.index(tk.INSERT).split(".")[0])
         else:
-            event = args[0]
-            if event.delta:
-                move = -1 * (event.delta / 120)
-            else:
-                if event.num == 5:
-                    move = 1
-                else:
-                    move = -1
+            return None
+        if not whole and first == last:
+            return None
+        return first, text_area.get(f"{first}.0", f"{last}.end").split("\n")
+
+    def edit_block(self, make_edits):
+        """Make the edits `make_edits(lines, first)` returns to the selected lines, as one undo step"""
+        if not self.open_tabs:
+            return "break"
+        text_area = self.current_tab.text_area
+        first, lines = self.selected_lines(text_area)
+        edits = make_edits(lines, first)
+        if not edits:
+            return "break"
+        text_area.bulk_edit(edits)
+        if text_area.tag_ranges("sel"):
+            # the whole lines stay selected, so the block can be edited again
+            text_area.tag_remove("sel", "1.0", tk.END)
+            text_area.tag_add("sel", f"{first}.0", f"{first + len(lines) - 1}.end")
+        return "break"
 
-            self.text_area.yview_scroll(int(move), "units")
+    def indent_block(self, event=None):
+        from core.blockedit import indent_edits
+
+        unit = self.indent_unit
+        return self.edit_block(lambda lines, first: indent_edits(lines, first, unit))
+
+    def outdent_block(self, event=None):
+        from core.blockedit import outdent_edits
+
+        tabsize = self.editor_config.get("tabsize", DEFAULT_EDITOR_CONFIG["tabsize"])
+        return self.edit_block(lambda lines, first: outdent_edits(lines, first, tabsize))
+
+    def toggle_comment(self, event=None):
+        if not self.open_tabs or self.current_tab.language is None:
+            return "break"
+        marker = self.current_tab.language.line_comment
+        if marker is None:
+            return "break"
+        from core.blockedit import comment_edits
+
+        return self.edit_block(lambda lines, first: comment_edits(lines, first, marker))
+
+    def show_context_menu(self, event):
+        self.context_menu.post(event.x_root, event.y_root)
+
+    def handle_text_changes(self, changes):
+        # scrolling alone never moves the cursor
+        if any(not change.view_only for change in changes):
+            self.update_index()
 
     def get_current_line_column(self):
-        cursor_position = self.current_tab.text_area.index(tk.INSERT)
+        tab = self.current_tab
+        text_area = tab.text_area
+        cursor_position = text_area.index(tk.INSERT)
         line, col = str(cursor_position).split(".")
-        return line, col
+        if tab.long_lines is not None:
+            # past where a long line is cut off, the columns hidden count too
+            col = tab.long_lines.document_column(int(line) - 1, int(col))
+        return int(line) + text_area.line_offset, col
 
     def update_index(self, event=None):
         line, col = self.get_current_line_column()
         self.current_index.set(f"Ln {line}, Col {int(col) + 1}")
+        view = self.current_tab.diagnostics_view
+        self.diagnostic_message.set((view is not None and view.message_at(line - 1)) or "")
+
+    def goto_line(self, event=None):
+        from tkinter import simpledialog
+
+        number = simpledialog.askinteger("Go to Line", "Line number:", parent=self, minvalue=1)
+        if number is None:
+            return
+
+        tab = self.current_tab
+        if tab.large_file_view is not None:
+            tab.large_file_view.goto_line(number)
+        else:
+            tab.text_area.mark_set(tk.INSERT, f"{number}.0")
+            tab.text_area.see(tk.INSERT)
+        tab.text_area.focus_set()
+        return "break"
 
     def open_file(self):
+        from tkinter import filedialog
+
         fp = filedialog.askopenfilename(
             filetypes=(
                 ("All files", "*.*"),
@@ -239,6 +923,156 @@ class MainWindow(tk.Tk):
         )
         self.open_new_tab(fp=Path(fp))
 
+    def open_folder(self, path=None):
+        from tkinter import filedialog
+
+        if path is None:
+            path = filedialog.askdirectory()
+            if not path:
+                return
+
+        if self.folder_panel is None:
+            from ui.folderpanel import FolderPanel
+
+            self.folder_panel = FolderPanel(
+                self,
+                self.open_path,
+                cache_dir=self.editor_config.get("scan-cache-dir", DEFAULT_EDITOR_CONFIG["scan-cache-dir"]),
+                workers=self.editor_config.get("scan-workers", DEFAULT_EDITOR_CONFIG["scan-workers"]),
+                width=260,
+            )
+            self.folder_panel.pack_propagate(False)
+            # to the left of the notebook, whether or not it is packed already
+            if self.notebook.winfo_manager():
+                self.folder_panel.pack(side=tk.LEFT, fill=tk.Y, before=self.notebook)
+            else:
+                self.folder_panel.pack(side=tk.LEFT, fill=tk.Y)
+
+        self.folder_panel.open_folder(path)
+        if self.search_panel is not None:
+            self.search_panel.set_scanner(self.folder_panel.scanner)
+        self.title(f"{Path(path).name} — Codingg")
+
+    def find_tab(self, fp: Path):
+        """The tab open on `fp`, if any"""
+        for tab in self.open_tabs:
+            if tab.path is not None and tab.path.resolve() == fp.resolve():
+                return tab
+        return None
+
+    def open_path(self, fp: Path, line=None, column=0):
+        """Show the tab of `fp`, opening it first when it is not open yet, with the cursor at `line` (0-based)"""
+        tab = self.find_tab(fp)
+        if tab is not None:
+            self.notebook.select(tab)
+        else:
+            tab = self.open_new_tab(fp)
+        if line is None:
+            return
+        if tab.loading is not None:
+            self.pending_cursor[tab] = (line, column)
+        else:
+            self.move_cursor(tab, line, column)
+
+    def move_cursor(self, tab, line, column):
+        if tab.large_file_view is not None:
+            tab.large_file_view.goto_line(line + 1)
+        elif tab.text_area is not None:
+            index = tab.long_lines.index(line, column) if tab.long_lines is not None else f"{line + 1}.{column}"
+            tab.text_area.mark_set(tk.INSERT, index)
+            tab.text_area.see(tk.INSERT)
+        else:
+            tab.cursor = f"{line + 1}.{column}"
+            tab.top_line = max(0, line - 5)
+
+    def _pack_bottom(self, widget):
+        # above the status bar, and packed before the notebook so it is never squeezed out
+        if self.notebook.winfo_manager():
+            widget.pack(side=tk.BOTTOM, fill=tk.X, before=self.notebook)
+        else:
+            widget.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def find(self, event=None):
+        if not self.open_tabs:
+            return "break"
+        if self.find_bar is None:
+            from ui.findbar import FindBar
+
+            self.find_bar = FindBar(self, bg=self.status_bar["bg"])
+            self.find_bar.attach(self.viewing_tab)
+        if not self.find_bar.winfo_ismapped():
+            self._pack_bottom(self.find_bar)
+        self.find_bar.show()
+        return "break"
+
+    def find_in_files(self, event=None):
+        if self.search_panel is None:
+            from ui.searchpanel import SearchPanel
+
+            self.search_panel = SearchPanel(self, self.open_path, bg=self.status_bar["bg"], height=220)
+            self.search_panel.pack_propagate(False)
+            self.search_panel.open_documents = self.unsaved_documents
+            if self.folder_panel is not None:
+                self.search_panel.set_scanner(self.folder_panel.scanner)
+        if not self.search_panel.winfo_ismapped():
+            self._pack_bottom(self.search_panel)
+        self.search_panel.focus_entry()
+        return "break"
+
+    def go_to_symbol(self, event=None):
+        from ui.symbolpalette import SymbolPalette
+
+        SymbolPalette(self, self.symbol_sources, self.go_to)
+        return "break"
+
+    def symbol_sources(self):
+        """(tab, symbol index) of the open tabs, the current one first"""
+        tabs = sorted(self.open_tabs, key=lambda tab: tab is not self.viewing_tab)
+        sources = []
+        for tab in tabs:
+            if tab.symbols is None:
+                continue
+            if tab.materialized:
+                tab.text_area.flush_changes()
+            tab.symbols.update(tab.document)
+            if tab.symbols.ready:
+                sources.append((tab, tab.symbols))
+        return sources
+
+    def go_to(self, tab, line, column):
+        self.notebook.select(tab)
+        self.move_cursor(tab, line, column)
+        if tab.text_area is not None:
+            tab.text_area.focus_set()
+
+    def unsaved_documents(self):
+        """Snapshots of the documents with unsaved edits in the open folder, by path relative to it"""
+        documents = {}
+        root = self.folder_panel.root if self.folder_panel is not None else None
+        for tab in self.open_tabs:
+            if root is None or tab.journal is None or not tab.journal.dirty:
+                continue
+            try:
+                relative = tab.path.resolve().relative_to(root)
+            except ValueError:
+                continue
+            if tab.materialized:
+                tab.text_area.flush_changes()
+            documents[relative.as_posix()] = tab.document.snapshot()
+        return documents
+
+    def export_trace(self, event=None):
+        """Save the callback timings as a Chrome trace, to open in chrome://tracing or Perfetto"""
+        from tkinter import filedialog
+
+        fp = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            initialfile="codingg-trace.json",
+            filetypes=(("Trace files", "*.json"), ("All files", "*.*")),
+        )
+        if fp:
+            instrumentation.recorder.export_trace(fp)
+
     def create_menu_bar(self):
         # without re-implementing the Menu object
         # properties like `background` are managed by the
@@ -252,12 +1086,16 @@ class MainWindow(tk.Tk):
         file_menu.add_command(label="New Window")
         file_menu.add_command(label="New File")
         file_menu.add_command(label="Open File...", command=self.open_file)
-        file_menu.add_command(label="Open Folder...")
+        file_menu.add_command(label="Open Folder...", command=self.open_folder)
+        file_menu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         file_menu.add_separator()
         file_menu.add_command(label="Settings")
         file_menu.add_separator()
-        file_menu.add_command(label="Exit")
+        file_menu.add_command(label="Exit", command=self.quit_editor)
         file_menu.add_command(label="Close All Tabs")
+        if instrumentation.recorder is not None:
+            file_menu.add_separator()
+            file_menu.add_command(label="Export Performance Trace...", command=self.export_trace)
 
         # Create "Edit" option
         edit_menu = tk.Menu(self, tearoff=False)
@@ -286,6 +1124,15 @@ class MainWindow(tk.Tk):
             label="Select All",
             command=lambda: self.current_tab.text_area.event_generate("<<SelectAll>>"),
         )
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Indent", accelerator="Tab", command=self.indent_block)
+        edit_menu.add_command(label="Outdent", accelerator="Shift+Tab", command=self.outdent_block)
+        edit_menu.add_command(label="Toggle Comment", accelerator="Ctrl+/", command=self.toggle_comment)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Find...", accelerator="Ctrl+F", command=self.find)
+        edit_menu.add_command(label="Find in Folder...", accelerator="Ctrl+Shift+F", command=self.find_in_files)
+        edit_menu.add_command(label="Go to Line...", accelerator="Ctrl+G", command=self.goto_line)
+        edit_menu.add_command(label="Go to Symbol...", accelerator="Ctrl+Shift+O", command=self.go_to_symbol)
 
         # Add menus to main menu bar
         menu.add_cascade(label="File", menu=file_menu)
@@ -296,9 +1143,7 @@ class MainWindow(tk.Tk):
         menu = tk.Menu(self, tearoff=False)
         menu.add_command(
             label="Undo",
-            command=lambda: self.current_tab.text_area.event_generate(
-                "<<Undo>>"
-            ),  # TOODO: get current tab FIX ME
+            command=lambda: self.current_tab.text_area.event_generate("<<Undo>>"),
         )
         menu.add_command(
             label="Redo",
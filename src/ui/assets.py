@@ -0,0 +1,112 @@
+"""Pre-sized images for the UI.
+
+The images in `resources/` are bigger than the UI shows them. Resizing them
+needs Pillow, which is slow to import, so the resized PNGs are kept in a
+bundle under `resources/cache/` and loaded straight into `tk.PhotoImage` on
+the next start. The bundle is rebuilt whenever a source image changes.
+
+Run this module to rebuild the bundle ahead of time:
+
+    python -m ui.assets
+"""
+import base64
+import json
+import tkinter as tk
+from io import BytesIO
+from pathlib import Path
+
+RES_PATH = Path(__file__).parent.parent.parent / "resources"
+CACHE_PATH = RES_PATH / "cache" / "icons.json"
+
+BUNDLE_VERSION = 1
+
+CLOSE_ICON_SIZE = 20
+
+# Tk image name -> (source file, size in pixels)
+ICONS = {
+    "img_close": ("close.png", CLOSE_ICON_SIZE),
+    "img_closeactive": ("close_focus.png", CLOSE_ICON_SIZE),
+    "img_closepressed": ("close_press.png", CLOSE_ICON_SIZE),
+}
+
+
+def _stamp(source):
+    stat = (RES_PATH / source).stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _read_bundle():
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as fp:
+            bundle = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if bundle.get("version") != BUNDLE_VERSION:
+        return None
+    return bundle["icons"]
+
+
+def _resize(source, size):
+    from PIL import Image
+
+    buffered = BytesIO()
+    Image.open(RES_PATH / source).resize((size, size)).save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("ascii")
+
+
+def build_bundle():
+    """Resize every icon with Pillow and write the bundle, returning its icons"""
+    icons = {}
+    for name, (source, size) in ICONS.items():
+        icons[name] = {"source": source, "size": size, "stamp": _stamp(source), "data": _resize(source, size)}
+
+    try:
+        CACHE_PATH.parent.mkdir(exist_ok=True)
+        temp_path = CACHE_PATH.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as fp:
+            json.dump({"version": BUNDLE_VERSION, "icons": icons}, fp)
+        temp_path.replace(CACHE_PATH)
+    except OSError:
+        # a read-only install still works, it just resizes on every start
+        pass
+    return icons
+
+
+def _is_fresh(icons):
+    for name, (source, size) in ICONS.items():
+        icon = icons.get(name)
+        if icon is None or icon["source"] != source or icon["size"] != size or icon["stamp"] != _stamp(source):
+            return False
+    return True
+
+
+def _fallback_image(master, source, size):
+    # without Pillow, shrink by the nearest whole factor Tk can manage
+    image = tk.PhotoImage(file=RES_PATH / source, master=master)
+    factor = max(1, round(image.width() / size))
+    return image.subsample(factor) if factor > 1 else image
+
+
+def load_icons(master=None):
+    """Create the named Tk images in `ICONS`, returning them so they are not garbage collected"""
+    icons = _read_bundle()
+    if icons is None or not _is_fresh(icons):
+        try:
+            icons = build_bundle()
+        except ImportError:
+            icons = None
+
+    images = []
+    for name, (source, size) in ICONS.items():
+        if icons is not None:
+            images.append(tk.PhotoImage(name, data=icons[name]["data"], master=master))
+        else:
+            image = tk.PhotoImage(name, master=master)
+            image.tk.call(name, "copy", _fallback_image(master, source, size))
+            images.append(image)
+    return tuple(images)
+
+
+if __name__ == "__main__":
+    build_bundle()
+    print(f"wrote {CACHE_PATH}")
@@ -0,0 +1,136 @@
+import re
+import tkinter as tk
+
+from core.words import CONTEXT
+
+MAX_RESULTS = 10
+# characters typed before completions are shown
+MIN_PREFIX = 2
+# the word being typed, read from the end of the text before the cursor
+_PREFIX = re.compile(r"[^\W\d]\w*\Z")
+_WORD_END = re.compile(r"\w\Z")
+
+
+class CompletionPopup(tk.Toplevel):
+    """Completes the word before the cursor of a TextArea from a `core.words.WordIndex`.
+
+    `on_changes` is a change listener of every TextArea: after typing a word
+    character the popup shows the words starting with the word being typed,
+    and anything else hides it. The focus stays in the TextArea, which
+    forwards the keys choosing a word with `key`.
+    """
+
+    def __init__(self, master, index, **kwargs):
+        super().__init__(master, bg="#21252b", **kwargs)
+        self.index = index
+        self.text_area = None
+        self.prefix = ""
+        # the completion inserted is no reason to complete again
+        self._accepting = False
+
+        self.overrideredirect(True)
+        self.transient(master)
+        self.withdraw()
+
+        self.listbox = tk.Listbox(
+            self, bg="#21252b", fg="#abb2bf", selectbackground="#3e4451", borderwidth=0, highlightthickness=0,
+            activestyle="none", height=MAX_RESULTS, exportselection=False,
+        )
+        self.listbox.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+        self.listbox.bind("<ButtonRelease-1>", lambda event: self.accept())
+
+    @property
+    def shown(self):
+        return self.text_area is not None
+
+    def on_changes(self, text_area, changes):
+        edits = [change for change in changes if not change.view_only]
+        if not edits:
+            if self.text_area is text_area:
+                # the view scrolled, the cursor moved with the text
+                self._place()
+            return
+        last = edits[-1]
+        if last.cursor_only:
+            # typing moves the cursor along, moving it anywhere else ends the word
+            last = next((change for change in reversed(edits) if change.is_edit), last)
+            if not last.is_edit or last.end != edits[-1].start:
+                self.hide()
+                return
+        if self._accepting or last.action != "insert" or not _WORD_END.search(last.text):
+            self.hide()
+            return
+        if text_area.focus_get() is not text_area:
+            # edits not made by typing: loading, reloads, undo from a menu...
+            return
+        match = _PREFIX.search(text_area.get(f"insert-{CONTEXT}c", "insert"))
+        if match is None or len(match.group()) < MIN_PREFIX:
+            self.hide()
+            return
+        self.show(text_area, match.group())
+
+    def show(self, text_area, prefix):
+        words = self.index.complete(prefix, MAX_RESULTS)
+        if not words:
+            self.hide()
+            return
+        self.text_area = text_area
+        self.prefix = prefix
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *words)
+        self.listbox.configure(height=len(words))
+        self.listbox.selection_set(0)
+        self._place()
+        self.deiconify()
+        self.lift()
+
+    def _place(self):
+        bbox = self.text_area.bbox("insert")
+        if bbox is None:
+            # scrolled out of view
+            self.hide()
+            return
+        x, y, width, height = bbox
+        self.geometry(f"+{self.text_area.winfo_rootx() + x}+{self.text_area.winfo_rooty() + y + height}")
+
+    def hide(self):
+        if self.text_area is not None:
+            self.text_area = None
+            self.withdraw()
+
+    def key(self, event):
+        """Handle a key pressed in a TextArea while the popup is shown, returning "break" when it was used"""
+        if self.text_area is not event.widget:
+            return None
+        if event.keysym in ("Down", "Up"):
+            selected = self.listbox.curselection()
+            row = (selected[0] if selected else 0) + (1 if event.keysym == "Down" else -1)
+            row %= self.listbox.size()
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(row)
+            self.listbox.see(row)
+            return "break"
+        if event.keysym in ("Return", "Tab"):
+            return self.accept()
+        if event.keysym == "Escape":
+            self.hide()
+            return "break"
+        return None
+
+    def accept(self):
+        """Complete the word with the one selected, returning "break" when there was one"""
+        text_area = self.text_area
+        selected = self.listbox.curselection()
+        if text_area is None or not selected:
+            return None
+        word = self.listbox.get(selected[0])
+        self.hide()
+        text_area.insert("insert", word[len(self.prefix):])
+        self._accepting = True
+        try:
+            text_area.flush_changes()
+        finally:
+            self._accepting = False
+        text_area.see("insert")
+        text_area.focus_set()
+        return "break"
@@ -0,0 +1,147 @@
+import tkinter as tk
+
+from core.diagnostics import ERROR, WARNING
+from ui.longlines import bind_shown, unbind_shown
+
+COLORS = {
+    ERROR: "#e06c75",
+    WARNING: "#e5c07b",
+}
+
+DEFAULT_DELAY = 400  # ms without edits before the document is checked
+POLL_INTERVAL = 50  # ms
+MARKER_LAYER = "diagnostics"
+
+
+def _tag(severity):
+    return f"diagnostic.{severity}"
+
+
+class DiagnosticsView:
+    """Checks the document of a TextArea whenever typing pauses, and shows what was found.
+
+    Checking happens in the processes of a `core.diagnostics.DiagnosticsRunner`.
+    Every edit bumps the version of the document, so a check started before
+    it is cancelled or its result dropped. Results are shown all at once:
+    one `tag_remove` and one `tag_add` per severity, and one redraw of the
+    gutter markers. The part of a diagnostic past where a long line is cut
+    off (see `ui.longlines.LongLines`) is tagged once it is shown.
+    """
+
+    def __init__(self, text_area, line_gutter, document, language, runner, path=None, delay=DEFAULT_DELAY,
+                 diagnostics=None):
+        self.text_area = text_area
+        self.line_gutter = line_gutter
+        self.document = document
+        self.language = language
+        self.runner = runner
+        self.path = path
+        self.delay = delay
+        # what the last check found, None when the document changed since
+        self.diagnostics = None
+        # 0-based line -> message shown in the status bar
+        self.messages = {}
+
+        for severity, color in COLORS.items():
+            tag = _tag(severity)
+            try:
+                text_area.tag_configure(tag, underline=True, underlinefg=color)
+            except tk.TclError:
+                # underline colors need Tk 8.6.6
+                text_area.tag_configure(tag, underline=True)
+        text_area.tag_raise(_tag(ERROR), _tag(WARNING))
+
+        self._version = 0
+        self._check_job = None
+        self._poll_job = None
+
+        text_area.add_change_listener(self._on_changes)
+        self._shown_binding = bind_shown(text_area, self._on_long_line_shown)
+        if diagnostics is not None:
+            self.show(diagnostics)
+        else:
+            self._schedule_check()
+
+    def _on_changes(self, changes):
+        if any(change.is_edit for change in changes):
+            self._version += 1
+            self.diagnostics = None
+            self._schedule_check()
+
+    def _on_long_line_shown(self):
+        if self.diagnostics is not None:
+            self.show(self.diagnostics)
+
+    def _schedule_check(self):
+        if self._check_job is not None:
+            self.text_area.after_cancel(self._check_job)
+        # a running check is of an older version now
+        self.runner.cancel(self)
+        self._check_job = self.text_area.after(self.delay, self.check)
+
+    def check(self):
+        self._check_job = None
+        self.runner.submit(self, self._version, self.language.name, self.document.snapshot(), self.path)
+        if self._poll_job is None:
+            self._poll_job = self.text_area.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        result = self.runner.take(self)
+        if result is not None:
+            version, diagnostics = result
+            if version == self._version:
+                self.show(diagnostics)
+        elif self.runner.pending(self):
+            self._poll_job = self.text_area.after(POLL_INTERVAL, self._poll)
+
+    def show(self, diagnostics):
+        self.diagnostics = diagnostics
+        ranges = {ERROR: [], WARNING: []}
+        markers = {}
+        messages = {}
+        # document positions, the same in the widget unless the line is cut off before them
+        long_lines = self.text_area.long_lines
+        cut = long_lines is not None and long_lines.hidden
+        for diagnostic in diagnostics:
+            start = f"{diagnostic.line + 1}.{diagnostic.column}"
+            if (diagnostic.end_line, diagnostic.end_column) > (diagnostic.line, diagnostic.column):
+                end = f"{diagnostic.end_line + 1}.{diagnostic.end_column}"
+                if cut and long_lines.shown_index(diagnostic.end_line, diagnostic.end_column) is None:
+                    # up to the placeholder
+                    end = f"{diagnostic.end_line + 1}.end"
+            else:
+                end = f"{start}+1c"
+            if not cut or long_lines.shown_index(diagnostic.line, diagnostic.column) is not None:
+                ranges[diagnostic.severity].extend((start, end))
+            # errors win over warnings on the same line
+            if markers.get(diagnostic.line) != COLORS[ERROR]:
+                markers[diagnostic.line] = COLORS[diagnostic.severity]
+                messages[diagnostic.line] = diagnostic.message
+        self.messages = messages
+
+        for severity, indices in ranges.items():
+            self.text_area.tag_remove(_tag(severity), "1.0", "end")
+            if indices:
+                self.text_area.tag_add(_tag(severity), *indices)
+        self.line_gutter.set_markers(MARKER_LAYER, markers)
+
+    def message_at(self, line):
+        """The message of the diagnostic on the 0-based `line`, if any"""
+        return self.messages.get(line)
+
+    def detach(self):
+        """Stop checking, and clear what is shown. Returns the diagnostics found last, if still current"""
+        if self._check_job is not None:
+            self.text_area.after_cancel(self._check_job)
+            self._check_job = None
+        if self._poll_job is not None:
+            self.text_area.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.runner.cancel(self)
+        self.text_area.remove_change_listener(self._on_changes)
+        unbind_shown(self.text_area, self._shown_binding)
+        for severity in COLORS:
+            self.text_area.tag_remove(_tag(severity), "1.0", "end")
+        self.line_gutter.set_markers(MARKER_LAYER, {})
+        return self.diagnostics
@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+
+from core.journal import file_stamp
+from core.reload import read_changes
+from core.watcher import FileWatcher
+
+POLL_INTERVAL = 100  # ms
+# a file is read this long after the last change reported, so a burst of writes is read once
+SETTLE_DELAY = 0.2  # s
+
+
+class FileChanges:
+    """Keeps tabs in step with their files when other programs change them.
+
+    Changes are noticed by a `core.watcher.FileWatcher`, and worked out by
+    `core.reload.read_changes` in a worker thread. They are applied to the
+    TextArea in a single event loop turn, so listeners see them at once and
+    undo takes them back in one step, while the cursor and scroll position
+    stay where they were. Tabs with unsaved edits are left alone, and tabs
+    without widgets catch up once they are shown again.
+    """
+
+    def __init__(self, master, on_status, poll_interval=None):
+        self.master = master
+        # called with messages for the status bar
+        self.on_status = on_status
+        self.watcher = FileWatcher(poll_interval) if poll_interval is not None else FileWatcher()
+        # resolved path -> tab
+        self.tabs = {}
+        # tab -> when to read its file
+        self._due = {}
+        # tabs without widgets whose file changed
+        self._stale = set()
+        # tab -> `_Read` running for it
+        self._reading = {}
+        self._results = queue.Queue()
+        self._poll_job = self.master.after(POLL_INTERVAL, self._poll)
+
+    def watch(self, tab):
+        path = tab.path.resolve()
+        self.tabs[path] = tab
+        self.watcher.watch(path)
+
+    def unwatch(self, tab):
+        path = tab.path.resolve()
+        if self.tabs.get(path) is tab:
+            del self.tabs[path]
+            self.watcher.unwatch(path)
+        self._due.pop(tab, None)
+        self._stale.discard(tab)
+        self._reading.pop(tab, None)
+
+    def shown(self, tab):
+        """`tab` has widgets again, catch up with its file"""
+        if tab in self._stale:
+            self._stale.discard(tab)
+            self.check(tab)
+
+    def close(self):
+        self.master.after_cancel(self._poll_job)
+        self.watcher.close()
+
+    def _poll(self):
+        now = time.perf_counter()
+        while True:
+            try:
+                path = self.watcher.changes.get_nowait()
+            except queue.Empty:
+                break
+            tab = self.tabs.get(path)
+            if tab is not None:
+                self._due[tab] = now + SETTLE_DELAY
+
+        for tab, due in list(self._due.items()):
+            if due <= now:
+                del self._due[tab]
+                self.check(tab)
+
+        while True:
+            try:
+                read = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if self._reading.get(read.tab) is read:
+                del self._reading[read.tab]
+                self._apply(read)
+        self._poll_job = self.master.after(POLL_INTERVAL, self._poll)
+
+    def check(self, tab):
+        """Read the file of `tab` in the background if it changed, and apply the changes"""
+        if tab.loading is not None or tab.journal is None:
+            return
+        if not tab.materialized:
+            self._stale.add(tab)
+            return
+        if tab in self._reading:
+            # read again once the running read is done
+            self._due[tab] = time.perf_counter() + SETTLE_DELAY
+            return
+        if tab.journal.dirty:
+            try:
+                changed = file_stamp(tab.path) != tab.journal.stamp
+            except OSError:
+                self.on_status(f"{tab.path.name} was deleted on disk")
+                return
+            if changed:
+                self.on_status(f"{tab.path.name} changed on disk, it is not reloaded over unsaved edits")
+            return
+
+        tab.text_area.flush_changes()
+        self._reading[tab] = _Read(tab, tab.document.snapshot(), tab.journal.stamp, self._results)
+
+    def _apply(self, read):
+        tab = read.tab
+        if isinstance(read.error, FileNotFoundError):
+            self.on_status(f"{tab.path.name} was deleted on disk")
+            return
+        if read.error is not None:
+            self.on_status(f"Could not reload {tab.path.name}: {read.error}")
+            return
+        if tab.journal is None:
+            return
+        if not tab.document.unchanged_since(read.snapshot) or tab.journal.dirty or not tab.materialized:
+            # edited while the file was read, or lost its widgets: start over
+            self.check(tab)
+            return
+
+        changes = read.changes
+        text_area = tab.text_area
+        if changes.kind == "append":
+            # a view following the end keeps following it, like `tail -f`
+            following = text_area.yview()[1] >= 1.0
+            text_area.insert("end-1c", changes.edits)
+            if following:
+                text_area.see("end-1c")
+        elif changes.kind == "patch":
+            for first, removed, text in changes.edits:
+                start = f"{first + 1}.0"
+                if removed:
+                    text_area.delete(start, f"{first + removed + 1}.0")
+                if text:
+                    text_area.insert(start, text)
+            self.on_status(f"Reloaded {tab.path.name}, it changed on disk")
+        # every listener sees the changes at once
+        text_area.flush_changes()
+        if changes.encoding != tab.encoding:
+            # the file no longer decodes in its encoding, and was read as latin-1
+            tab.encoding = changes.encoding
+            tab.journal.restart(changes.stamp, changes.encoding)
+            self.on_status(f"Reloaded {tab.path.name} as {changes.encoding}, it is no longer valid in its encoding")
+        elif changes.stamp != tab.journal.stamp:
+            tab.journal.restart(changes.stamp)
+
+
+class _Read:
+    """Works out how the file of a tab changed, in a background thread"""
+
+    def __init__(self, tab, snapshot, stamp, results):
+        self.tab = tab
+        self.snapshot = snapshot
+        self.changes = None
+        self.error = None
+        threading.Thread(
+            target=self._run,
+            args=(tab.path, stamp, tab.encoding, tab.newline, results),
+            name=f"reload {tab.path.name}",
+            daemon=True,
+        ).start()
+
+    def _run(self, path, stamp, encoding, newline, results):
+        try:
+            self.changes = read_changes(path, self.snapshot, stamp, encoding, newline)
+        except (OSError, LookupError) as exc:
+            self.error = exc
+        results.put(self)
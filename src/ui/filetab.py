@@ -3,17 +3,88 @@ from tkinter import ttk
 
 
 class FileTab(tk.Frame):
-    def __init__(self, master, **kwargs):
+    """A notebook page, and everything known about the file shown on it.
+
+    Only recently viewed tabs own editor widgets (`widgets`, see
+    `ui.widgetpool`). The others are a record of the document, cursor,
+    selection and scroll position, and get widgets back from the pool when
+    they are selected again.
+    """
+
+    _style_initialized = False
+
+    def __init__(self, master, path=None, title="untitled", **kwargs):
         super().__init__(master, **kwargs)
 
+        self.path = path
+        self.title = title
+
+        # `ui.widgetpool.EditorWidgets` while the tab is materialized
+        self.widgets = None
         self.text_area = None
         self.line_gutter = None
         self.scrollbar = None
+        # `core.largefile.LargeFile` for files too big to load, and the view showing it
+        self.large_file = None
+        self.large_file_view = None
+        # `core.piecetable.PieceTable` holding the contents of the tab
+        self.document = None
+        # `core.highlight.Language` of the document, and the highlighter while materialized
+        self.language = None
+        self.highlighter = None
+        self._line_states = None
+        # `core.diagnostics.DiagnosticsRunner` checking documents in a language it has checkers for,
+        # the ms to wait after an edit before checking, and the `ui.diagnostics.DiagnosticsView` while materialized
+        self.diagnostics_runner = None
+        self.diagnostics_delay = None
+        self.diagnostics_view = None
+        # what the last check found, kept while the tab has no widgets
+        self.diagnostics = None
+        # `core.gitdiff.HeadBlobs` to compare the file with its last commit, set once the file is
+        # loaded, and the `ui.gitgutter.GitGutter` marking the changes while materialized
+        self.head_blobs = None
+        self.git_gutter = None
+        # lines longer than this are shown cut off (None shows them whole),
+        # by the `ui.longlines.LongLines` of the tab while materialized
+        self.long_line_limit = None
+        self.long_lines = None
+        # `ui.minimap.MinimapView` drawing the overview of the document while materialized, when the widgets
+        # have a minimap, and the columns a tab character takes in it
+        self.minimap_view = None
+        self.tabsize = 4
+        # `core.words.DocumentWords` counting the words of the document for completion
+        self.words = None
+        # `core.symbols.SymbolIndex` of the document, for documents in a language
+        self.symbols = None
+        # `core.undo.UndoHistory` of the document, outliving the widgets showing it
+        self.undo_history = None
+        # `core.journal.Journal` the edits are streamed to, once the file is loaded
+        self.journal = None
+        # `ui.progressiveload.ProgressiveLoad` while the file is being read
+        self.loading = None
+        # restored from the last session and its file not read yet, it is once the tab is shown
+        # unless the `ui.session.SessionLoader` got to it first
+        self.unloaded = False
+        # how the file was stored on disk, known once it is loaded
+        self.encoding = "utf-8"
+        self.newline = "\n"
+
+        # where the user left off, restored when the tab is materialized
+        self.cursor = "1.0"
+        self.selection = ()
+        self.top_line = 0
+        # when the tab was last shown, in seconds since the epoch
+        self.viewed = 0.0
+
+        if not FileTab._style_initialized:
+            self._initialize_style()
+            FileTab._style_initialized = True
 
+    def _initialize_style(self):
         # Import the Notebook.tab element from the default theme
-        self.style = ttk.Style()
+        style = ttk.Style()
         try:
-            self.style.element_create("TNotebook.Tab", "from", "default")
+            style.element_create("TNotebook.Tab", "from", "default")
         except tk.TclError:
             # gg.TNotebook.tab already exists
             pass
@@ -21,7 +92,7 @@ class FileTab(tk.Frame):
         # Redefine the TNotebook Tab layout to use the new element
         # fmt: off
 
-        self.style.layout("CustomNotebook.Tab",
+        style.layout("CustomNotebook.Tab",
             [('CustomNotebook.Tab', {'children':
                 [('CustomNotebook.padding', {'side': 'top', 'children':
                     [('CustomNotebook.focus', {'side': 'top', 'children':
@@ -32,8 +103,147 @@ class FileTab(tk.Frame):
                     'sticky': 'nswe'})],
                 'sticky': 'nswe'})],
             'sticky': 'nswe'})])
-        self.style.configure("CustomNotebook", background="#282c34", borderwidth=0)
-        self.style.configure("CustomNotebook.Tab", background="#282c34", foreground="#abb2bf", borderwidth=2)
-        self.style.configure("TFrame", background="#282c34", foreground="#282c34", borderwidth=0)
-        self.style.map("CustomNotebook.Tab", background=[("selected", "green"), ("disabled", "red")])
+        style.configure("CustomNotebook", background="#282c34", borderwidth=0)
+        style.configure("CustomNotebook.Tab", background="#282c34", foreground="#abb2bf", borderwidth=2)
+        style.configure("TFrame", background="#282c34", foreground="#282c34", borderwidth=0)
+        style.map("CustomNotebook.Tab", background=[("selected", "green"), ("disabled", "red")])
         # fmt: on
+
+    @property
+    def materialized(self):
+        return self.widgets is not None
+
+    def materialize(self, widgets):
+        """Show the tab in `widgets`, restoring where the user left off"""
+        self.widgets = widgets
+        self.scrollbar = widgets.scrollbar
+        self.text_area = widgets.text_area
+        self.line_gutter = widgets.line_gutter
+        widgets.pack(self)
+
+        # imported here, most tabs need neither and startup should not pay for them
+        if self.large_file is not None:
+            from ui.largefileview import LargeFileView
+
+            self.large_file_view = LargeFileView(self.text_area, self.scrollbar, self.large_file, self.top_line)
+            if widgets.minimap is not None:
+                # the document is never read whole, there is nothing to draw an overview of
+                widgets.minimap.pack_forget()
+            return
+
+        if self.long_line_limit is not None:
+            from ui.longlines import LongLines
+
+            self.long_lines = LongLines(self.text_area, self.document, self.long_line_limit)
+            self.long_lines.reset(self.document.get_text())
+        else:
+            self.text_area.reset(self.document.get_text())
+        self.text_area.undo_history = self.undo_history
+        self.text_area.words = self.words
+        self.text_area.add_change_listener(self.sync_document)
+        if self.language is not None:
+            from ui.highlighter import SyntaxHighlighter
+
+            self.highlighter = SyntaxHighlighter(self.text_area, self.document, self.language, self._line_states)
+        if self.diagnostics_runner is not None:
+            from ui.diagnostics import DiagnosticsView
+
+            self.diagnostics_view = DiagnosticsView(
+                self.text_area, self.line_gutter, self.document, self.language, self.diagnostics_runner, self.path,
+                self.diagnostics_delay, self.diagnostics,
+            )
+        if widgets.minimap is not None:
+            from ui.minimap import MinimapView
+
+            self.minimap_view = MinimapView(
+                widgets.minimap, self.text_area, self.document, widgets.scroller, self.tabsize
+            )
+        self.show_git_changes()
+        self.restore_view()
+
+    def restore_view(self):
+        """Put the cursor, selection and scroll position back where `remember_view` found them"""
+        self.text_area.mark_set("insert", self.cursor)
+        self.text_area.tag_remove("sel", "1.0", "end")
+        if self.selection:
+            self.text_area.tag_add("sel", *self.selection)
+        self.text_area.yview(f"{self.top_line + 1}.0")
+
+    def remember_view(self):
+        """Record where the user is in the widgets, for `restore_view` (or the session) to go back to"""
+        text_area = self.text_area
+        self.top_line = text_area.line_offset + int(text_area.index("@0,0").split(".")[0]) - 1
+        if self.large_file_view is None:
+            self.cursor = text_area.index("insert")
+            self.selection = tuple(str(index) for index in text_area.tag_ranges("sel"))
+
+    def dehydrate(self):
+        """Remember where the user is, and give up the widgets (which are returned)"""
+        text_area = self.text_area
+        text_area.flush_changes()
+        self.remember_view()
+
+        if self.large_file_view is not None:
+            self.large_file_view.detach()
+            self.large_file_view = None
+        else:
+            text_area.remove_change_listener(self.sync_document)
+            text_area.words = None
+            if self.highlighter is not None:
+                self._line_states = self.highlighter.states
+                self.highlighter.detach()
+                self.highlighter = None
+            if self.diagnostics_view is not None:
+                self.diagnostics = self.diagnostics_view.detach()
+                self.diagnostics_view = None
+            if self.git_gutter is not None:
+                self.git_gutter.detach()
+                self.git_gutter = None
+            if self.long_lines is not None:
+                self.long_lines.detach()
+                self.long_lines = None
+            if self.minimap_view is not None:
+                self.minimap_view.detach()
+                self.minimap_view = None
+
+        widgets = self.widgets
+        self.widgets = self.text_area = self.line_gutter = self.scrollbar = None
+        return widgets
+
+    def show_git_changes(self):
+        """Mark the lines changed since the last commit, for files in a repository"""
+        if self.head_blobs is None or self.git_gutter is not None or not self.materialized:
+            return
+        from ui.gitgutter import GitGutter
+
+        self.git_gutter = GitGutter(
+            self.text_area, self.line_gutter, self.document, self.path, self.head_blobs, self.encoding
+        )
+
+    def sync_document(self, changes):
+        """Apply the edits made to `text_area` to `document`"""
+        edited = False
+        for change in changes:
+            if not change.is_edit:
+                continue
+            edited = True
+            line, col = map(int, change.start.split("."))
+            offset = self.document.position_to_offset(line - 1, col)
+            if change.action == "insert":
+                self.document.insert(offset, change.text)
+                if self.journal is not None:
+                    self.journal.insert(offset, change.text)
+            else:
+                self.document.delete(offset, change.length)
+                if self.journal is not None:
+                    self.journal.delete(offset, change.length)
+            if self.symbols is not None:
+                newlines = change.text.count("\n")
+                if change.action == "insert":
+                    self.symbols.edit(line - 1, 0, newlines)
+                else:
+                    self.symbols.edit(line - 1, newlines, 0)
+
+        # only the lines edited are scanned for symbols again
+        if edited and self.symbols is not None:
+            self.symbols.update(self.document)
@@ -0,0 +1,217 @@
+import queue
+import re
+import time
+import tkinter as tk
+
+from core.search import BufferSearch, compile_query
+from ui.longlines import bind_shown, unbind_shown
+
+MATCH_TAG = "search.match"
+SEARCH_DELAY = 150  # ms after the last keystroke (or edit) before searching again
+POLL_INTERVAL = 30  # ms
+# how long a single event loop turn may spend tagging matches
+TIME_BUDGET = 0.010  # s
+VIEW_MARGIN = 100  # lines searched first above and below the visible ones
+
+
+class FindBar(tk.Frame):
+    """Searches the document of the tab it is attached to, see `core.search.BufferSearch`.
+
+    Matches are tagged as they arrive from the worker, those around the
+    viewport first. Typing, or editing the document, starts the search over
+    and cancels the one running. Matches in the part of a long line that is
+    cut off (see `ui.longlines.LongLines`) are counted but left untagged,
+    until that part is shown.
+    """
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.tab = None
+        self.search = None
+        # matches tagged so far
+        self.count = 0
+        self._search_job = None
+        self._poll_job = None
+        self._shown_binding = None
+
+        self.query = tk.StringVar()
+        self.regex = tk.BooleanVar(value=False)
+        self.case_sensitive = tk.BooleanVar(value=False)
+        self.status = tk.StringVar()
+
+        colors = dict(bg=self["bg"], fg="#9da5b4")
+        self.entry = tk.Entry(
+            self, textvariable=self.query, bg="#1b1d23", fg="#abb2bf", insertbackground="#528bff", borderwidth=0
+        )
+        check_colors = dict(colors, selectcolor="#1b1d23", activebackground=self["bg"], highlightthickness=0)
+        self.regex_check = tk.Checkbutton(
+            self, text=".*", variable=self.regex, command=self.schedule_search, **check_colors
+        )
+        self.case_check = tk.Checkbutton(
+            self, text="Aa", variable=self.case_sensitive, command=self.schedule_search, **check_colors
+        )
+        self.status_label = tk.Label(self, textvariable=self.status, width=16, anchor="w", **colors)
+
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 4), pady=2)
+        self.regex_check.pack(side=tk.LEFT)
+        self.case_check.pack(side=tk.LEFT)
+        self.status_label.pack(side=tk.LEFT, padx=4)
+
+        self.query.trace_add("write", lambda *args: self.schedule_search())
+        self.entry.bind("<Return>", lambda event: self.select_match())
+        self.entry.bind("<Shift-Return>", lambda event: self.select_match(backwards=True))
+        self.entry.bind("<Escape>", lambda event: self.hide())
+
+    def show(self):
+        text_area = self.tab.text_area if self.tab is not None else None
+        if text_area is not None and text_area.tag_ranges("sel"):
+            selected = text_area.get("sel.first", "sel.last")
+            if "\n" not in selected:
+                self.query.set(selected)
+        self.entry.focus_set()
+        self.entry.select_range(0, tk.END)
+        self.schedule_search()
+
+    def hide(self):
+        self.cancel()
+        if self.tab is not None and self.tab.text_area is not None:
+            self.tab.text_area.tag_remove(MATCH_TAG, "1.0", "end")
+            self.tab.text_area.focus_set()
+        self.pack_forget()
+
+    def attach(self, tab):
+        """Search the document of `tab` (a materialized FileTab, or None) from now on"""
+        self.detach()
+        self.tab = tab
+        if tab is None or tab.text_area is None:
+            return
+        tab.text_area.tag_configure(MATCH_TAG, background="#3e4451", foreground="#e5c07b")
+        tab.text_area.tag_lower(MATCH_TAG, "sel")
+        tab.text_area.add_change_listener(self._on_changes)
+        self._shown_binding = bind_shown(tab.text_area, self._on_long_line_shown)
+        if self.winfo_ismapped():
+            self.schedule_search()
+
+    def detach(self):
+        self.cancel()
+        tab, self.tab = self.tab, None
+        if tab is not None and tab.text_area is not None:
+            tab.text_area.remove_change_listener(self._on_changes)
+            unbind_shown(tab.text_area, self._shown_binding)
+            tab.text_area.tag_remove(MATCH_TAG, "1.0", "end")
+
+    def cancel(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+
+    def _on_changes(self, changes):
+        if self.query.get() and self.winfo_ismapped() and any(change.is_edit for change in changes):
+            # the matches are of a snapshot taken before the edit
+            self.schedule_search()
+
+    def _on_long_line_shown(self):
+        if self.query.get() and self.winfo_ismapped():
+            # for the matches in the part shown
+            self.schedule_search()
+
+    def schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY, self.start_search)
+
+    def start_search(self):
+        self._search_job = None
+        self.cancel()
+        tab = self.tab
+        if tab is None or tab.text_area is None:
+            return
+        text_area = tab.text_area
+        text_area.tag_remove(MATCH_TAG, "1.0", "end")
+        if not self.query.get():
+            self.status.set("")
+            return
+        if tab.document is None:
+            self.status.set("Not available")
+            return
+        try:
+            compiled = compile_query(self.query.get(), self.regex.get(), self.case_sensitive.get())
+        except re.error:
+            self.status.set("Invalid regex")
+            return
+
+        # the document has to hold the latest edits before it is snapshotted
+        text_area.flush_changes()
+        first = int(text_area.index("@0,0").split(".")[0]) - 1
+        last = int(text_area.index(f"@0,{text_area.winfo_height()}").split(".")[0]) - 1
+        self.count = 0
+        self.search = BufferSearch(tab.document.snapshot(), compiled, first - VIEW_MARGIN, last + VIEW_MARGIN)
+        self.status.set("Searching...")
+        self._poll_job = self.after(1, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        search = self.search
+        text_area = self.tab.text_area
+        long_lines = self.tab.long_lines
+        deadline = time.perf_counter() + TIME_BUDGET
+        finished = False
+        while time.perf_counter() < deadline:
+            try:
+                batch = search.results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            self.count += len(batch)
+            if long_lines is not None and long_lines.hidden:
+                # document positions, the same in the widget unless the line is cut off before them
+                batch = [match for match in map(self._shown_match, batch) if match is not None]
+                if not batch:
+                    continue
+            # one Tcl call for the whole batch
+            text_area.tag_add(MATCH_TAG, *[index for match in batch for index in match])
+
+        count = self.count
+        if finished:
+            self.search = None
+            self.status.set(f"{count} match{'' if count == 1 else 'es'}" if count else "No matches")
+        else:
+            self.status.set(f"{count}...")
+            self._poll_job = self.after(POLL_INTERVAL, self._poll)
+
+    def _shown_match(self, match):
+        long_lines = self.tab.long_lines
+        shown = []
+        for index in match:
+            line, col = map(int, index.split("."))
+            index = long_lines.shown_index(line - 1, col)
+            if index is None:
+                return None
+            shown.append(index)
+        return shown
+
+    def select_match(self, backwards=False):
+        """Select the match after (or before) the cursor, wrapping around"""
+        if self.tab is None or self.tab.text_area is None:
+            return "break"
+        text_area = self.tab.text_area
+        if backwards:
+            start = text_area.index("sel.first") if text_area.tag_ranges("sel") else text_area.index("insert")
+            match = text_area.tag_prevrange(MATCH_TAG, start) or text_area.tag_prevrange(MATCH_TAG, "end")
+        else:
+            match = text_area.tag_nextrange(MATCH_TAG, "insert") or text_area.tag_nextrange(MATCH_TAG, "1.0")
+        if match:
+            start, end = match
+            text_area.tag_remove("sel", "1.0", "end")
+            text_area.tag_add("sel", start, end)
+            text_area.mark_set("insert", end)
+            text_area.see(start)
+        return "break"
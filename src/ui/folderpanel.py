@@ -0,0 +1,148 @@
+import os
+import queue
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import ttk
+
+from core.workspace import WorkspaceScanner
+
+POLL_INTERVAL = 50  # ms
+# how long a single event loop turn may spend taking in scan results and filling the tree
+TIME_BUDGET = 0.010  # s
+
+
+class FolderPanel(tk.Frame):
+    """A tree of the files in a folder, filled in while a `WorkspaceScanner` lists it.
+
+    A directory's children are only inserted into the Treeview when it is
+    opened. Items are identified by their path relative to the folder, and
+    `on_open(path)` is called with the full path of a file double-clicked
+    (or chosen with Return).
+    """
+
+    def __init__(self, master, on_open, cache_dir=None, workers=8, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_open = on_open
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.scanner = None
+
+        # directory -> (directories, files), as far as the scan got
+        self._listings = {}
+        # directories opened in the tree, waiting for their listing, and those filled in
+        self._waiting = set()
+        self._filled = set()
+        # (parent, [(iid, text, is_dir), ...]) still to insert into the tree
+        self._inserts = deque()
+        self._poll_job = None
+
+        self.tree = ttk.Treeview(self, show="tree", selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<<TreeviewOpen>>", self.handle_open_directory)
+        self.tree.bind("<Double-Button-1>", self.handle_open_file)
+        self.tree.bind("<Return>", self.handle_open_file)
+
+    @property
+    def root(self):
+        return self.scanner.root if self.scanner is not None else None
+
+    def open_folder(self, path):
+        self.close_folder()
+        self.scanner = WorkspaceScanner(path, cache_dir=self.cache_dir, workers=self.workers)
+        self._waiting.add("")
+        self._poll_job = self.after(POLL_INTERVAL, self._poll)
+
+    def close_folder(self):
+        if self.scanner is not None:
+            self.scanner.cancel()
+            self.scanner = None
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._listings = {}
+        self._waiting = set()
+        self._filled = set()
+        self._inserts.clear()
+        self.tree.delete(*self.tree.get_children(""))
+
+    def _poll(self):
+        self._poll_job = None
+        deadline = time.perf_counter() + TIME_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                item = self.scanner.results.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            directory, directories, files = item
+            self._listings[directory] = (directories, files)
+            if directory in self._waiting:
+                self._waiting.discard(directory)
+                self._fill(directory)
+
+        self._insert_some(deadline)
+        # the end of the results is queued before `done` is set
+        scanning = not self.scanner.done.is_set() or not self.scanner.results.empty()
+        if scanning or self._inserts:
+            self._poll_job = self.after(POLL_INTERVAL if not self._inserts else 1, self._poll)
+
+    def _fill(self, directory):
+        """Queue the children of `directory` (already opened in the tree) for insertion"""
+        if directory in self._filled:
+            return
+        self._filled.add(directory)
+        directories, files = self._listings[directory]
+        children = [(_join(directory, name), name, True) for name in directories]
+        children.extend((_join(directory, name), name, False) for name in files)
+        self._inserts.append((directory, children))
+
+    def _insert_some(self, deadline):
+        tree = self.tree
+        while self._inserts and time.perf_counter() < deadline:
+            parent, children = self._inserts[0]
+            if parent and tree.exists(_placeholder(parent)):
+                tree.delete(_placeholder(parent))
+            # a few hundred at a time between clock checks
+            for iid, text, is_dir in children[:200]:
+                tree.insert(parent, "end", iid=iid, text=text, open=False)
+                if is_dir:
+                    tree.insert(iid, "end", iid=_placeholder(iid), text="")
+            del children[:200]
+            if not children:
+                self._inserts.popleft()
+
+    def handle_open_directory(self, event):
+        directory = self.tree.focus()
+        if not self.tree.exists(_placeholder(directory)):
+            return
+        if directory in self._listings:
+            self._fill(directory)
+            self._insert_some(time.perf_counter() + TIME_BUDGET)
+            if self._inserts and self._poll_job is None:
+                self._poll_job = self.after(1, self._poll)
+        else:
+            # not scanned yet, filled in when its listing arrives
+            self._waiting.add(directory)
+
+    def handle_open_file(self, event):
+        path = self.tree.focus()
+        if not path or self.tree.get_children(path) or path in self._listings:
+            return
+        self.on_open(self.root / path.replace("/", os.sep))
+        return "break"
+
+
+def _join(directory, name):
+    return f"{directory}/{name}" if directory else name
+
+
+def _placeholder(iid):
+    # child of a directory that was not filled in yet, so the tree shows it can be opened.
+    # no relative path ends with a slash, so it can't clash with a real item
+    return f"{iid}/"
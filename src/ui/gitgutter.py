@@ -0,0 +1,120 @@
+import queue
+import threading
+
+from core.gitdiff import ADDED, DELETED, MODIFIED, LineDiff, merge_edit
+
+COLORS = {
+    ADDED: "#98c379",
+    MODIFIED: "#61afef",
+    DELETED: "#e06c75",
+}
+
+POLL_INTERVAL = 30  # ms
+MARKER_LAYER = "git"
+
+
+class GitGutter:
+    """Marks the lines of a TextArea changed since the last commit in its LineGutter.
+
+    The committed lines come from a `core.gitdiff.HeadBlobs`, and the diff
+    is kept by a `core.gitdiff.LineDiff` in a background thread. Every batch
+    of edits is sent to it as the region of lines it touched, with a snapshot
+    of the document, and the thread diffs that region again. Only the
+    visible lines are looked up when the markers are drawn.
+    """
+
+    def __init__(self, text_area, line_gutter, document, path, blobs, encoding="utf-8"):
+        self.text_area = text_area
+        self.line_gutter = line_gutter
+        self.document = document
+
+        # (snapshot, region) for the thread, None to stop it
+        self._jobs = queue.Queue()
+        # (jobs done, `core.gitdiff.Markers`)
+        self._results = queue.Queue()
+        self._sent = 0
+        self._poll_job = None
+
+        text_area.add_change_listener(self._on_changes)
+        self._sent += 1
+        threading.Thread(
+            target=self._work,
+            args=(path, blobs, encoding, document.snapshot()),
+            name=f"git diff {path.name}",
+            daemon=True,
+        ).start()
+        self._schedule_poll()
+
+    def _on_changes(self, changes):
+        region = None
+        for change in changes:
+            if not change.is_edit:
+                continue
+            line = int(change.start.split(".")[0]) - 1
+            newlines = change.text.count("\n")
+            if change.action == "insert":
+                region = merge_edit(region, line, 0, newlines)
+            else:
+                region = merge_edit(region, line, newlines, 0)
+        if region is None:
+            return
+        self._jobs.put((self.document.snapshot(), region))
+        self._sent += 1
+        self._schedule_poll()
+
+    def _work(self, path, blobs, encoding, snapshot):
+        base = blobs.get(path, encoding)
+        if base is None:
+            # not committed, or not in a repository: nothing to compare with
+            self._results.put((1, None))
+            diff = None
+        else:
+            diff = LineDiff(base, snapshot)
+            self._results.put((1, diff.markers()))
+        done = 1
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            # edits that came in while the last were diffed are caught up with before answering
+            jobs = [job]
+            while True:
+                try:
+                    jobs.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            for job in jobs:
+                if job is None:
+                    return
+                if diff is not None:
+                    diff.update(*job)
+            done += len(jobs)
+            self._results.put((done, diff.markers() if diff is not None else None))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.text_area.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            done, markers = latest
+            if markers is not None:
+                self.line_gutter.set_markers(MARKER_LAYER, markers, COLORS)
+            if done == self._sent:
+                return
+        self._schedule_poll()
+
+    def detach(self):
+        self._jobs.put(None)
+        if self._poll_job is not None:
+            self.text_area.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.text_area.remove_change_listener(self._on_changes)
+        self.line_gutter.set_markers(MARKER_LAYER, {})
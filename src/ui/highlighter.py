@@ -0,0 +1,204 @@
+import queue
+import threading
+
+from core.highlight import BUILTIN, COMMENT, DEFINITION, KEYWORD, NUMBER, STRING, LineStates, lex_states
+
+TAG_COLORS = {
+    COMMENT: "#5c6370",
+    STRING: "#98c379",
+    KEYWORD: "#c678dd",
+    BUILTIN: "#e5c07b",
+    NUMBER: "#d19a66",
+    DEFINITION: "#61afef",
+}
+
+VIEW_MARGIN = 50  # lines tagged above and below the visible ones
+SYNC_LEX_LIMIT = 500  # lines the Tk thread lexes itself before leaving it to the background
+BATCH_LINES = 5000  # lines lexed in the background per batch handed to the Tk thread
+WORKER_DELAY = 150  # ms to wait after an edit before lexing the rest of the document
+POLL_INTERVAL = 30  # ms
+
+# marks lines tagged before the state at their start was known
+_APPROXIMATE = object()
+_UNTAGGED = object()
+
+
+def _tag(kind):
+    return f"syntax.{kind}"
+
+
+class SyntaxHighlighter:
+    """Highlights the visible part of a TextArea, plus a margin.
+
+    Lexer states are cached per line in a `core.highlight.LineStates`. An edit
+    only re-lexes from the changed line until the state converges again, and
+    the states for the rest of the document are computed in a background
+    thread on a snapshot of the document and merged back in batches.
+    """
+
+    def __init__(self, text_area, document, language, states=None):
+        self.text_area = text_area
+        self.document = document
+        self.language = language
+        # states survive the highlighter when its tab gives up its widgets
+        self.states = states if states is not None else LineStates(language.lexer)
+
+        for kind, color in TAG_COLORS.items():
+            text_area.tag_configure(_tag(kind), foreground=color)
+            text_area.tag_lower(_tag(kind), "sel")
+
+        # line -> the state it was tagged from
+        self._tagged = {}
+
+        self._version = 0
+        self._worker_version = None
+        self._results = queue.Queue()
+        self._worker_job = None
+        self._poll_job = None
+
+        text_area.add_change_listener(self._on_changes)
+        self.update()
+        self._schedule_worker()
+
+    def _on_changes(self, changes):
+        edited = False
+        for change in changes:
+            if not change.is_edit:
+                continue
+            edited = True
+            line = int(change.start.split(".")[0]) - 1
+            newlines = change.text.count("\n")
+            if change.action == "insert":
+                self._edit(line, 0, newlines)
+            else:
+                self._edit(line, newlines, 0)
+
+        self.update()
+        if edited:
+            self._schedule_worker()
+
+    def _edit(self, line, removed, added):
+        self.states.edit(line, removed, added)
+        # results of a running worker no longer apply
+        self._version += 1
+
+        delta = added - removed
+        tagged = {}
+        for tagged_line, state in self._tagged.items():
+            if tagged_line < line:
+                tagged[tagged_line] = state
+            elif tagged_line > line + removed:
+                tagged[tagged_line + delta] = state
+        self._tagged = tagged
+
+    def _visible_range(self):
+        first = int(self.text_area.index("@0,0").split(".")[0]) - 1
+        last = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split(".")[0]) - 1
+        return max(0, first - VIEW_MARGIN), min(self.document.line_count - 1, last + VIEW_MARGIN)
+
+    def _lines(self, first, last):
+        start = self.document.line_start(first)
+        return self.document.get_text(start, self.document.line_end(last)).split("\n")
+
+    def update(self):
+        """Tag whatever is in (or near) the viewport and not tagged correctly yet"""
+        first, last = self._visible_range()
+
+        valid_until = self.states.valid_until
+        if valid_until <= last and last - valid_until < SYNC_LEX_LIMIT:
+            lines = self._lines(valid_until - 1, last)
+            self.states.update(lambda n: lines[n - valid_until + 1], last)
+        valid_until = self.states.valid_until
+
+        states = self.states.states
+        lines = self.text_area.get(f"{first + 1}.0", f"{last + 1}.end").split("\n")
+        tokenize = self.states.lexer.tokenize
+        ranges = {kind: [] for kind in TAG_COLORS}
+        cleared = []
+        for n, text in enumerate(lines):
+            line = first + n
+            state = states[line] if line < valid_until else _APPROXIMATE
+            if self._tagged.get(line, _UNTAGGED) == state:
+                continue
+            self._tagged[line] = state
+
+            if cleared and cleared[-1] == f"{line}.end":
+                cleared[-1] = f"{line + 1}.end"
+            else:
+                cleared.extend((f"{line + 1}.0", f"{line + 1}.end"))
+
+            tokens, _ = tokenize(text, None if state is _APPROXIMATE else state)
+            for start, end, kind in tokens:
+                ranges[kind].extend((f"{line + 1}.{start}", f"{line + 1}.{end}"))
+
+        if not cleared:
+            return
+        for kind, indices in ranges.items():
+            self.text_area.tag_remove(_tag(kind), *cleared)
+            if indices:
+                self.text_area.tag_add(_tag(kind), *indices)
+
+    def _schedule_worker(self):
+        if self._worker_job is not None:
+            self.text_area.after_cancel(self._worker_job)
+        self._worker_job = self.text_area.after(WORKER_DELAY, self._start_worker)
+
+    def _start_worker(self):
+        self._worker_job = None
+        if self.states.valid_until >= self.document.line_count:
+            return
+
+        first = self.states.valid_until - 1
+        thread = threading.Thread(
+            target=self._lex_in_background,
+            args=(self._version, self.document.snapshot(), first, self.states.states[first]),
+            name="highlight",
+            daemon=True,
+        )
+        thread.start()
+        self._worker_version = self._version
+        if self._poll_job is None:
+            self._poll_job = self.text_area.after(POLL_INTERVAL, self._poll)
+
+    def _lex_in_background(self, version, snapshot, line, state):
+        lexer = self.states.lexer
+        end = snapshot.line_count - 1
+        while line < end and version == self._version:
+            last = min(line + BATCH_LINES, end)
+            text = snapshot.get_text(snapshot.line_start(line), snapshot.line_end(last - 1))
+            states = lex_states(lexer, text.split("\n"), state)
+            self._results.put((version, line, states))
+            line, state = last, states[-1]
+        self._results.put((version, None, None))
+
+    def _poll(self):
+        self._poll_job = None
+        merged = finished = False
+        while True:
+            try:
+                version, line, states = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if line is None:
+                # keep polling while the latest worker is running
+                finished = finished or version == self._worker_version
+            elif version == self._version and line <= self.states.valid_until - 1 < line + len(states):
+                # the Tk thread may have lexed the start of the batch itself
+                skip = self.states.valid_until - 1 - line
+                self.states.merge(line + skip, states[skip:])
+                merged = True
+
+        if merged:
+            self.update()
+        if not finished:
+            self._poll_job = self.text_area.after(POLL_INTERVAL, self._poll)
+
+    def detach(self):
+        self._version += 1
+        for job in (self._worker_job, self._poll_job):
+            if job is not None:
+                self.text_area.after_cancel(job)
+        self._worker_job = self._poll_job = None
+        self.text_area.remove_change_listener(self._on_changes)
+        for kind in TAG_COLORS:
+            self.text_area.tag_remove(_tag(kind), "1.0", "end")
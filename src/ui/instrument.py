@@ -0,0 +1,68 @@
+import tkinter as tk
+
+from core.instrumentation import callback_name
+
+OVERLAY_INTERVAL = 500  # ms between overlay updates
+OVERLAY_CALLBACKS = 3  # slowest callbacks listed in the overlay
+
+_original_register = tk.Misc._register
+_original_after = tk.Misc.after
+
+
+def _timed(recorder, name, func):
+    def timed(*args):
+        return recorder.call(name, func, *args)
+
+    timed.__name__ = getattr(func, "__name__", "callback")
+    return timed
+
+
+def install(recorder):
+    """Time every callback Tk makes into Python from now on: bindings, commands and `after` jobs.
+
+    Callbacks registered earlier are not timed, so this has to run before
+    the widgets are created.
+    """
+
+    def _register(self, func, subst=None, needcleanup=1):
+        # `after` wraps its job in a `callit` closure, the job itself is timed already
+        if not getattr(func, "__qualname__", "").endswith("after.<locals>.callit"):
+            func = _timed(recorder, callback_name(func), func)
+        return _original_register(self, func, subst, needcleanup)
+
+    def after(self, ms, func=None, *args):
+        if func is not None:
+            func = _timed(recorder, f"after {callback_name(func)}", func)
+        return _original_after(self, ms, func, *args)
+
+    tk.Misc._register = _register
+    tk.Misc.after = after
+
+
+def uninstall():
+    """Stop timing callbacks registered from now on"""
+    tk.Misc._register = _original_register
+    tk.Misc.after = _original_after
+
+
+class InstrumentationOverlay(tk.Label):
+    """Status bar label showing the frame times and the slowest callbacks of a `Recorder`"""
+
+    def __init__(self, master, recorder, **kwargs):
+        super().__init__(master, **kwargs)
+        self.recorder = recorder
+        self.refresh()
+
+    def refresh(self):
+        recorder = self.recorder
+        frames = recorder.frames
+        parts = [f"frame p50 {frames.percentile(50):.1f} / p95 {frames.percentile(95):.1f} ms"]
+        if recorder.slow_frames:
+            name, start, duration = recorder.slow_frames[-1]
+            parts.append(f"{len(recorder.slow_frames)} slow (last {name} {duration:.0f} ms)")
+        for name, duration in recorder.slowest(OVERLAY_CALLBACKS):
+            parts.append(f"{name} {duration:.1f}")
+        self.configure(text="  |  ".join(parts))
+
+        # the overlay's own updates are left out of the measurements
+        _original_after(self, OVERLAY_INTERVAL, self.refresh)
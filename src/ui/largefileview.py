@@ -0,0 +1,134 @@
+# lines kept in the TextArea above and below the visible ones
+WINDOW_MARGIN = 300
+
+INDEX_POLL_INTERVAL = 250  # ms
+
+
+class LargeFileView:
+    """Shows the visible part of a `LargeFile` in a read-only TextArea.
+
+    The TextArea only ever holds a window of lines around the viewport. The
+    window is moved whenever the viewport gets close to one of its edges, and
+    the scrollbar, the LineGutter and the status bar translate positions to
+    absolute line numbers through `TextArea.line_offset`.
+    """
+
+    def __init__(self, text_area, scrollbar, large_file, first_line=0):
+        self.text_area = text_area
+        self.scrollbar = scrollbar
+        self.file = large_file
+
+        self.window_start = 0  # absolute (0-based) line shown on the first line of the TextArea
+        self.window_lines = 0
+
+        self._recenter_job = None
+        self._poll_job = None
+
+        text_area.configure(state="disabled", yscrollcommand=self._on_text_scroll)
+        scrollbar.configure(command=self.yview)
+
+        self.show_line(first_line)
+        self._poll_index()
+
+    @property
+    def visible_lines(self):
+        first = int(self.text_area.index("@0,0").split(".")[0])
+        last = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split(".")[0])
+        return last - first + 1
+
+    @property
+    def top_line(self):
+        """Absolute (0-based) line at the top of the viewport"""
+        return self.window_start + int(self.text_area.index("@0,0").split(".")[0]) - 1
+
+    def _load_window(self, start):
+        # before the widget is mapped only one line is "visible"
+        count = max(self.visible_lines, 100) + 2 * WINDOW_MARGIN
+        text = self.file.read_lines(start, count)
+
+        cursor_line, cursor_col = map(int, self.text_area.index("insert").split("."))
+        cursor_line += self.window_start
+
+        self.text_area.configure(state="normal")
+        self.text_area.delete("1.0", "end")
+        self.text_area.insert("1.0", text)
+        self.text_area.configure(state="disabled")
+
+        self.window_start = start
+        self.window_lines = text.count("\n") + 1
+        self.text_area.line_offset = start
+
+        # keep the cursor on the same absolute line when it is still inside the window
+        if start < cursor_line <= start + self.window_lines:
+            self.text_area.mark_set("insert", f"{cursor_line - start}.{cursor_col}")
+
+    def _ensure_window(self, line):
+        """Move the window if `line` at the top of the viewport would get too close to one of its edges"""
+        wanted_start = max(0, line - WINDOW_MARGIN // 2)
+        wanted_end = min(self.file.line_count, line + self.visible_lines + WINDOW_MARGIN // 2)
+        if wanted_start < self.window_start or wanted_end > self.window_start + self.window_lines:
+            self._load_window(max(0, line - WINDOW_MARGIN))
+            return True
+        return False
+
+    def show_line(self, line):
+        """Scroll so absolute (0-based) `line` is at the top of the viewport"""
+        line = max(0, min(line, self.file.line_count - 1))
+        self._ensure_window(line)
+        self.text_area.yview(f"{line - self.window_start + 1}.0")
+        self._update_scrollbar()
+
+    def goto_line(self, number):
+        """Put the cursor on absolute (1-based) line `number` and bring it into view"""
+        line = max(0, min(number - 1, self.file.line_count - 1))
+        self.show_line(line - self.visible_lines // 2)
+        self.text_area.mark_set("insert", f"{line - self.window_start + 1}.0")
+
+    def yview(self, *args):
+        """`command` for the scrollbar, positions are relative to the whole file"""
+        if args[0] == "moveto":
+            self.show_line(int(float(args[1]) * self.file.estimated_line_count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_lines
+            self.show_line(self.top_line + amount)
+
+    def _on_text_scroll(self, first, last):
+        # the TextArea scrolled by itself (wheel, cursor movement, ...)
+        if self._recenter_job is None:
+            self._recenter_job = self.text_area.after_idle(self._recenter)
+        self._update_scrollbar()
+
+    def _recenter(self):
+        self._recenter_job = None
+        top = self.top_line
+        if self._ensure_window(top):
+            self.text_area.yview(f"{top - self.window_start + 1}.0")
+
+    def _update_scrollbar(self):
+        total = max(1, self.file.estimated_line_count)
+        top = self.top_line
+        self.scrollbar.set(top / total, min(1.0, (top + self.visible_lines) / total))
+
+    def _poll_index(self):
+        self._update_scrollbar()
+        if self.window_start + self.window_lines < self.file.line_count:
+            # more lines were indexed since the window was loaded
+            self._recenter()
+
+        if self.file.indexed.is_set():
+            self._poll_job = None
+        else:
+            self._poll_job = self.text_area.after(INDEX_POLL_INTERVAL, self._poll_index)
+
+    def detach(self):
+        """Stop following the TextArea, leaving the file open"""
+        for job in (self._poll_job, self._recenter_job):
+            if job is not None:
+                self.text_area.after_cancel(job)
+        self._poll_job = self._recenter_job = None
+
+    def close(self):
+        self.detach()
+        self.file.close()
@@ -1,4 +1,29 @@
 import tkinter as tk
+import tkinter.font as tkfont
+
+# Collects everything the gutter needs in a single round-trip to Tcl:
+# the total line count, the first visible line and the y offset of every
+# visible line. `text` is the (renamed) text widget command and `window`
+# is its path name.
+_GEOMETRY_PROC = """
+proc ::codingg_gutter_geometry {text window} {
+    set height [winfo height $window]
+    set count [expr {int([$text index end-1c])}]
+    set first [expr {int([$text index @0,0])}]
+    set last [expr {int([$text index @0,$height])}]
+    set result [list $count $first]
+    for {set i $first} {$i <= $last} {incr i} {
+        set dline [$text dlineinfo $i.0]
+        if {$dline eq ""} {
+            break
+        }
+        lappend result [lindex $dline 1]
+    }
+    return $result
+}
+"""
+
+MARKER_WIDTH = 3  # px
 
 
 class LineGutter(tk.Canvas):
@@ -17,27 +42,122 @@ class LineGutter(tk.Canvas):
 
         self.text_area = text_area
 
+        # pool of canvas text items, reused between redraws
+        self._items = []
+        self._labels = []
+        self._positions = []
+        # (line offset, line count, first visible line, y offsets) of the last redraw
+        self._geometry = None
+        self._min_width = int(self["width"])
+        self._digits = 0
+        # layer -> (markers, colors), drawn as a strip per layer along the right edge
+        self._markers = {}
+        # pool of canvas rectangles for the markers, and how many are shown
+        self._marker_items = []
+        self._markers_shown = 0
+
+        if not self.tk.call("info", "procs", "::codingg_gutter_geometry"):
+            self.tk.eval(_GEOMETRY_PROC)
+
         self.configure(state="disabled")
 
         self.bind_events()
 
     def bind_events(self):
-        self.text_area.bind("<<Change>>", self._on_change)
-        self.text_area.bind("<Configure>", self._on_change)
+        self.text_area.add_change_listener(self._on_change)
+
+    def _on_change(self, changes=None):
+        self.redraw()
+
+    def _line_geometry(self):
+        result = self.tk.call("::codingg_gutter_geometry", self.text_area._orig, self.text_area._w)
+        return tuple(int(value) for value in self.tk.splitlist(result))
+
+    def _fit_width(self, digits):
+        if digits == self._digits:
+            return
+        self._digits = digits
+        width = tkfont.nametofont("TkDefaultFont").measure("0" * digits) + 6
+        self.configure(width=max(self._min_width, width))
 
-    def _on_change(self, event=None):
+    def set_markers(self, layer, markers, colors=None):
+        """Mark lines in `layer`, replacing what it marked before.
+
+        `markers` maps 0-based lines to colors, or to keys of `colors`. It
+        only has to support `get`: only the visible lines are looked up.
+        """
+        if not markers and not self._markers.get(layer, (None,))[0]:
+            return
+        self._markers[layer] = (markers, colors)
+        # forces the next redraw, even when nothing scrolled
+        self._geometry = None
         self.redraw()
 
     def redraw(self):
-        self.delete("all")
-
-        i = self.text_area.index("@0,0")
-        while True:
-            dline = self.text_area.dlineinfo(i)
-            if dline is None:
-                break
-
-            y = dline[1]
-            line_num = str(i).split(".")[0]
-            self.create_text(2, y, anchor="nw", text=line_num, fill=self.foreground)
-            i = self.text_area.index(f"{i}+1line")
+        geometry = (self.text_area.line_offset,) + self._line_geometry()
+        if geometry == self._geometry:
+            # nothing scrolled, resized or changed line count
+            return
+        self._geometry = geometry
+
+        line_offset, line_count, first_line = geometry[:3]
+        first_line += line_offset
+        positions = geometry[3:]
+        self._fit_width(len(str(line_count + line_offset)))
+
+        for n, y in enumerate(positions):
+            label = str(first_line + n)
+            if n == len(self._items):
+                item = self.create_text(2, y, anchor="nw", text=label, fill=self.foreground)
+                self._items.append(item)
+                self._labels.append(label)
+                self._positions.append(y)
+                continue
+
+            item = self._items[n]
+            if self._labels[n] != label:
+                if self._labels[n] is None:
+                    self.itemconfigure(item, text=label, state="")
+                else:
+                    self.itemconfigure(item, text=label)
+                self._labels[n] = label
+            if self._positions[n] != y:
+                self.coords(item, 2, y)
+                self._positions[n] = y
+
+        # hide whatever is left over from a taller view
+        for n in range(len(positions), len(self._items)):
+            if self._labels[n] is not None:
+                self.itemconfigure(self._items[n], state="hidden")
+                self._labels[n] = None
+
+        self._draw_markers(first_line, positions)
+
+    def _draw_markers(self, first_line, positions):
+        shown = 0
+        width = int(self["width"])
+        for layer, (markers, colors) in enumerate(self._markers.values()):
+            if not markers:
+                continue
+            x = width - MARKER_WIDTH - layer * (MARKER_WIDTH + 1)
+            for n, y in enumerate(positions):
+                color = markers.get(first_line + n - 1)
+                if color is None:
+                    continue
+                if colors is not None:
+                    color = colors[color]
+                # the last visible line is as tall as the one before it
+                if n + 1 < len(positions):
+                    bottom = positions[n + 1]
+                else:
+                    bottom = y + (y - positions[n - 1] if n else MARKER_WIDTH * 4)
+                if shown == len(self._marker_items):
+                    self._marker_items.append(self.create_rectangle(0, 0, 0, 0, width=0))
+                item = self._marker_items[shown]
+                self.coords(item, x, y, x + MARKER_WIDTH, bottom - 1)
+                self.itemconfigure(item, fill=color, state="")
+                shown += 1
+
+        for item in self._marker_items[shown:self._markers_shown]:
+            self.itemconfigure(item, state="hidden")
+        self._markers_shown = shown
@@ -0,0 +1,292 @@
+import re
+import tkinter as tk
+
+LONG_LINE_LIMIT = 10_000  # characters of a line shown before the rest is cut off
+
+PLACEHOLDER_COLORS = {"bg": "#3e4451", "fg": "#9da5b4", "activebackground": "#4b5263"}
+# generated on the TextArea when more of a cut off line is shown
+SHOWN_EVENT = "<<LongLineShown>>"
+
+
+def bind_shown(text_area, callback):
+    """Call `callback()` whenever more of a line of `text_area` is shown, returning the id `unbind_shown` takes"""
+    return text_area.bind(SHOWN_EVENT, lambda event: callback(), add="+")
+
+
+def unbind_shown(text_area, funcid):
+    # `unbind` would take the other callbacks away too
+    script = text_area.bind(SHOWN_EVENT)
+    text_area.bind(SHOWN_EVENT, "\n".join(line for line in script.split("\n") if funcid not in line))
+    text_area.deletecommand(funcid)
+
+
+class _Hidden:
+    """Where the text cut off a line is found in the document: `length` characters at `start` of `snapshot`"""
+
+    __slots__ = ("snapshot", "start", "length")
+
+    def __init__(self, snapshot, start, length):
+        self.snapshot = snapshot
+        self.start = start
+        self.length = length
+
+    def take(self, length=None):
+        """Remove the first `length` characters (all by default) and return them"""
+        if length is None or length > self.length:
+            length = self.length
+        text = self.snapshot.get_text(self.start, self.start + length)
+        self.start += length
+        self.length -= length
+        return text
+
+
+class LongLines:
+    """Shows the lines of a TextArea longer than `limit` cut off, so Tk only lays out what fits the limit.
+
+    The part past the limit stays in the document only: the widget holds a
+    placeholder in its place, an embedded window counting the characters
+    hidden. Clicking it shows another `limit` characters. The document keeps
+    the whole line, so saving and searching see the exact content, and the
+    hidden text is put back in the widget before an edit reaches it.
+
+    Text before the placeholder has the same columns in the widget and in
+    the document, the line end after it is `document_column` away.
+    """
+
+    def __init__(self, text_area, document, limit=LONG_LINE_LIMIT):
+        self.text_area = text_area
+        self.document = document
+        self.limit = limit
+        # placeholder window name -> (placeholder, `_Hidden`)
+        self._hidden = {}
+
+        # while loading: the column the text ends at, the text waiting to be inserted,
+        # and the part of the last line past the limit
+        self._column = 0
+        self._shown = []
+        self._cut = None
+
+        text_area.long_lines = self
+        text_area.bind("<<Copy>>", self._copy)
+        text_area.bind("<<Cut>>", self._cut_selection)
+
+    @property
+    def hidden(self):
+        return bool(self._hidden)
+
+    def reset(self, text):
+        """Show `text`, the content of the document, with its long lines cut off"""
+        self._clear()
+        pattern = re.compile(r"^([^\n]{%d})([^\n]+)" % self.limit, re.MULTILINE)
+        shown = []
+        cuts = []
+        position = line = 0
+        for match in pattern.finditer(text):
+            line += text.count("\n", position, match.start())
+            shown.append(text[position:match.end(1)])
+            cuts.append((line, match.start(2), match.end(2) - match.start(2)))
+            position = match.end()
+        if not cuts:
+            self.text_area.reset(text)
+            return
+        shown.append(text[position:])
+        self.text_area.reset("".join(shown))
+
+        snapshot = self.document.snapshot()
+        for line, start, length in cuts:
+            self._add_placeholder(f"{line + 1}.{self.limit}", _Hidden(snapshot, start, length))
+
+    def append(self, text):
+        """Insert `text` at the end of the TextArea, cutting off long lines, while a file loads"""
+        limit = self.limit
+        position = 0
+        while position < len(text):
+            newline = text.find("\n", position)
+            end = len(text) if newline == -1 else newline
+            if self._cut is not None:
+                self._cut.append(text[position:end])
+            elif end - position > limit - self._column:
+                split = position + limit - self._column
+                self._shown.append(text[position:split])
+                self._cut = [text[split:end]]
+            else:
+                self._shown.append(text[position:end])
+                self._column += end - position
+            if newline == -1:
+                break
+            self._end_line(newline=True)
+            position = newline + 1
+
+        if self._shown:
+            self.text_area.insert("end-1c", "".join(self._shown))
+            self._shown = []
+
+    def restart(self):
+        """Forget the line being loaded, the TextArea is emptied for the file to be loaded again"""
+        self._column = 0
+        self._shown = []
+        self._cut = None
+
+    def finish(self):
+        """Cut off the last line once the whole file is in"""
+        self._end_line(newline=False)
+        if self._shown:
+            self.text_area.insert("end-1c", "".join(self._shown))
+            self._shown = []
+
+    def _end_line(self, newline):
+        self._column = 0
+        if newline:
+            self._shown.append("\n")
+        if self._cut is None:
+            return
+        hidden = "".join(self._cut)
+        self._cut = None
+
+        # the document learns about the line through the widget, up to its newline, and
+        # the cut off part goes straight in before that newline once it caught up
+        text_area = self.text_area
+        shown = "".join(self._shown)
+        self._shown = []
+        line = int(text_area.index("end-1c").split(".")[0]) + shown.count("\n") - newline
+        text_area.insert("end-1c", shown)
+        text_area.flush_changes()
+        start = self.document.line_end(line - 1)
+        self.document.insert(start, hidden)
+        if text_area.words is not None:
+            text_area.words.edit("", hidden)
+        self._add_placeholder(f"{line}.{self.limit}", _Hidden(self.document.snapshot(), start, len(hidden)))
+
+    def _add_placeholder(self, index, hidden):
+        text_area = self.text_area
+        placeholder = tk.Label(
+            text_area,
+            font=text_area.cget("font"),
+            cursor="hand2",
+            padx=4,
+            pady=0,
+            borderwidth=0,
+            **PLACEHOLDER_COLORS,
+        )
+        placeholder.bind("<Button-1>", lambda event: self.reveal(str(placeholder)))
+        self._hidden[str(placeholder)] = (placeholder, hidden)
+        self._label(placeholder, hidden)
+        text_area.window_create(index, window=placeholder)
+
+    @staticmethod
+    def _label(placeholder, hidden):
+        placeholder.configure(text=f"⋯ {hidden.length:,} more characters")
+
+    def _placeholders(self, start, end):
+        """(line, column, name) of the placeholders between the indices `start` and `end`"""
+        found = []
+        for _, name, index in self.text_area.dump(start, end, window=True):
+            if name in self._hidden:
+                line, col = map(int, index.split("."))
+                found.append((line, col, name))
+        return found
+
+    def reveal(self, name, length=None):
+        """Show `length` more characters (another `limit` by default) of the line cut off at placeholder `name`"""
+        text_area = self.text_area
+        if str(text_area.cget("state")) == "disabled":
+            return
+        placeholder, hidden = self._hidden[name]
+        index = text_area.index(placeholder)
+        text = hidden.take(self.limit if length is None else length)
+        # inserted before the placeholder, whose text is no edit: the document has it already
+        if hidden.length:
+            text_area.tk.call(text_area._orig, "insert", index, text)
+            self._label(placeholder, hidden)
+        else:
+            self._expand(name, index, text)
+        # not an edit, so the ones tagging text of the document in the widget (search matches...) are told
+        text_area.event_generate(SHOWN_EVENT)
+
+    def _expand(self, name, index, text):
+        text_area = self.text_area
+        placeholder, _ = self._hidden.pop(name)
+        # inserted after the placeholder, so marks before it stay there and the ones after move along
+        text_area.tk.call(text_area._orig, "insert", f"{index}+1c", text)
+        text_area.tk.call(text_area._orig, "delete", index)
+        placeholder.destroy()
+
+    def before_edit(self, start, end=None):
+        """Show the whole of the lines an edit of `start` to `end` reaches the hidden part of"""
+        text_area = self.text_area
+        if not self._hidden or str(text_area.cget("state")) == "disabled":
+            return
+        try:
+            start = text_area.index(start)
+            end = start if end is None else text_area.index(end)
+        except tk.TclError:
+            # there is no selection, Tk reports that for the edit itself
+            return
+        end_line, end_col = map(int, end.split("."))
+        for line, col, name in self._placeholders(f"{start.split('.')[0]}.0", f"{end_line}.end"):
+            if line < end_line or end_col > col:
+                _, hidden = self._hidden[name]
+                self._expand(name, f"{line}.{col}", hidden.take())
+
+    def document_column(self, line, col):
+        """Column in the document of column `col` of `line` (0-based) in the TextArea"""
+        if not self._hidden:
+            return col
+        for _, placeholder_col, name in self._placeholders(f"{line + 1}.0", f"{line + 1}.end"):
+            if col > placeholder_col:
+                return col - 1 + self._hidden[name][1].length
+        return col
+
+    def index(self, line, col):
+        """TextArea index of `line` and `col` (0-based) of the document, showing the line when it is cut off there"""
+        if self._hidden:
+            for _, placeholder_col, name in self._placeholders(f"{line + 1}.0", f"{line + 1}.end"):
+                if col > placeholder_col:
+                    self.reveal(name, self._hidden[name][1].length)
+        return f"{line + 1}.{col}"
+
+    def shown_index(self, line, col):
+        """TextArea index of `line` and `col` (0-based) of the document, None when the line is cut off before it"""
+        if self._hidden:
+            for _, placeholder_col, _ in self._placeholders(f"{line + 1}.0", f"{line + 1}.end"):
+                if col > placeholder_col:
+                    return None
+        return f"{line + 1}.{col}"
+
+    def _document_offset(self, index):
+        line, col = map(int, self.text_area.index(index).split("."))
+        return self.document.position_to_offset(line - 1, self.document_column(line - 1, col))
+
+    def _copy(self, event=None):
+        # the selection holds a placeholder, the text it stands for comes from the document
+        text_area = self.text_area
+        if not self._hidden or not text_area.tag_ranges("sel"):
+            return None
+        if not self._placeholders("sel.first", "sel.last"):
+            return None
+        text_area.flush_changes()
+        text = self.document.get_text(self._document_offset("sel.first"), self._document_offset("sel.last"))
+        text_area.clipboard_clear()
+        text_area.clipboard_append(text)
+        return "break"
+
+    def _cut_selection(self, event=None):
+        if self._copy() is None:
+            return None
+        self.text_area.delete("sel.first", "sel.last")
+        return "break"
+
+    def _clear(self):
+        for placeholder, _ in self._hidden.values():
+            placeholder.destroy()
+        self._hidden = {}
+        self._column = 0
+        self._shown = []
+        self._cut = None
+
+    def detach(self):
+        self._clear()
+        text_area = self.text_area
+        text_area.long_lines = None
+        text_area.unbind("<<Copy>>")
+        text_area.unbind("<<Cut>>")
@@ -0,0 +1,245 @@
+import queue
+import threading
+from collections import OrderedDict
+
+import tkinter as tk
+
+from core.minimap import BACKGROUND, LINE_HEIGHT, SYMBOL, TILE_LINES, WORD, render_tile
+
+COLORS = {
+    BACKGROUND: "#21252b",
+    WORD: "#5c6370",
+    SYMBOL: "#3e4451",
+}
+SLIDER_COLOR = "#abb2bf"
+
+RENDER_DELAY = 150  # ms without edits before the tiles they touched are rendered again
+POLL_INTERVAL = 30  # ms
+MAX_TILES = 64  # tiles kept as Tk images
+
+
+class MinimapView:
+    """Shows an overview of the document of a TextArea in a Canvas, and scrolls it to where it is clicked.
+
+    The document is drawn in tiles of `core.minimap.TILE_LINES` lines,
+    rendered from a snapshot in a background thread and kept as Tk images.
+    An edit only marks the tiles it touched as dirty (all of them below it
+    when it added or removed lines), and those are rendered again once
+    typing pauses. When the document is taller than the canvas, the minimap
+    scrolls along with the TextArea, proportionally.
+    """
+
+    def __init__(self, canvas, text_area, document, scroller, tabsize=4):
+        self.canvas = canvas
+        self.text_area = text_area
+        self.document = document
+        self.scroller = scroller
+        self.tabsize = tabsize
+
+        # tile -> PhotoImage, least recently shown first
+        self._images = OrderedDict()
+        # tiles shown -> canvas item
+        self._items = {}
+        self._dirty = set()
+        # tile -> version it was asked for at, until it arrives
+        self._requested = {}
+        # bumped by every edit, renders of an older document are dropped
+        self._version = 0
+        # first line shown at the top of the canvas
+        self._top = 0
+        self._drag_offset = None
+
+        self._jobs = queue.Queue()
+        # (version, tile, PNG data)
+        self._results = queue.Queue()
+        self._render_job = None
+        self._poll_job = None
+        threading.Thread(target=self._work, name="minimap", daemon=True).start()
+
+        self._slider = canvas.create_rectangle(0, 0, 0, 0, fill=SLIDER_COLOR, outline="", stipple="gray25")
+        canvas.configure(bg=COLORS[BACKGROUND])
+        canvas.bind("<Button-1>", self._press)
+        canvas.bind("<B1-Motion>", self._drag)
+        canvas.bind("<ButtonRelease-1>", self._release)
+        canvas.bind("<Configure>", lambda event: self.redraw())
+        text_area.add_change_listener(self._on_changes)
+        self.redraw()
+
+    def _on_changes(self, changes):
+        edited = False
+        for change in changes:
+            if not change.is_edit:
+                continue
+            edited = True
+            line = int(change.start.split(".")[0]) - 1
+            if "\n" in change.text:
+                # the lines below moved, every tile from here on shows the wrong ones
+                first = line // TILE_LINES
+                self._dirty.update(tile for tile in self._images if tile >= first)
+                self._dirty.update(tile for tile in self._items if tile >= first)
+                self._dirty.add(first)
+            else:
+                self._dirty.add(line // TILE_LINES)
+        if edited:
+            self._version += 1
+            if self._render_job is not None:
+                self.canvas.after_cancel(self._render_job)
+            self._render_job = self.canvas.after(RENDER_DELAY, self._render_dirty)
+        self.redraw()
+
+    def _render_dirty(self):
+        self._render_job = None
+        self.redraw()
+
+    def _visible_lines(self):
+        text_area = self.text_area
+        first = int(text_area.index("@0,0").split(".")[0]) - 1
+        last = int(text_area.index(f"@0,{text_area.winfo_height()}").split(".")[0]) - 1
+        return first, last
+
+    def redraw(self, render=True):
+        """Place the tiles and the slider for the current view, asking for the tiles missing when `render`"""
+        canvas = self.canvas
+        height = canvas.winfo_height()
+        lines = self.document.line_count
+        shown = max(height // LINE_HEIGHT, 1)
+        first, last = self._visible_lines()
+        if lines <= shown:
+            top = 0
+        else:
+            # the overview scrolls as far through its lines as the TextArea did through its own
+            scrollable = max(lines - (last - first + 1), 1)
+            top = round(min(first / scrollable, 1.0) * (lines - shown))
+        self._top = top
+
+        first_tile = top // TILE_LINES
+        last_tile = min(top + shown, lines - 1) // TILE_LINES
+        missing = []
+        for tile in list(self._items):
+            if not first_tile <= tile <= last_tile:
+                canvas.delete(self._items.pop(tile))
+        for tile in range(first_tile, last_tile + 1):
+            y = (tile * TILE_LINES - top) * LINE_HEIGHT
+            image = self._images.get(tile)
+            if image is not None:
+                self._images.move_to_end(tile)
+                item = self._items.get(tile)
+                if item is None:
+                    self._items[tile] = canvas.create_image(0, y, image=image, anchor=tk.NW)
+                else:
+                    canvas.coords(item, 0, y)
+                    canvas.itemconfigure(item, image=image)
+            if image is None or tile in self._dirty:
+                missing.append(tile)
+
+        canvas.coords(
+            self._slider, 0, (first - top) * LINE_HEIGHT, canvas.winfo_width(), (last + 1 - top) * LINE_HEIGHT
+        )
+        canvas.tag_raise(self._slider)
+        # tiles asked for already are only asked for again when the document changed since
+        missing = [tile for tile in missing if self._requested.get(tile) != self._version]
+        if render and missing and self._render_job is None:
+            for tile in missing:
+                self._requested[tile] = self._version
+            self._jobs.put((self._version, self.document.snapshot(), missing))
+            self._schedule_poll()
+
+    def _work(self):
+        colors = [COLORS[kind] for kind in sorted(COLORS)]
+        while True:
+            jobs = [self._jobs.get()]
+            while True:
+                try:
+                    jobs.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if None in jobs:
+                return
+            # all the tiles asked for, from the latest snapshot
+            version, snapshot, _ = jobs[-1]
+            tiles = sorted({tile for job in jobs for tile in job[2]})
+            for tile in tiles:
+                self._results.put((version, tile, render_tile(snapshot, tile, colors, self.tabsize)))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.canvas.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        received = False
+        while True:
+            try:
+                version, tile, data = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if version != self._version:
+                if self._requested.get(tile) == version:
+                    del self._requested[tile]
+                continue
+            self._requested.pop(tile, None)
+            received = True
+            self._dirty.discard(tile)
+            self._images[tile] = tk.PhotoImage(data=data, format="png", master=self.canvas)
+            self._images.move_to_end(tile)
+        while len(self._images) > MAX_TILES:
+            tile, _ = self._images.popitem(last=False)
+            if tile in self._items:
+                self.canvas.delete(self._items.pop(tile))
+        if received:
+            self.redraw(render=False)
+        if self._requested:
+            self._schedule_poll()
+
+    def _first_line_for(self, y):
+        """The first visible line that puts the top of the slider at `y`"""
+        first, last = self._visible_lines()
+        visible = last - first + 1
+        lines = self.document.line_count
+        shown = max(self.canvas.winfo_height() // LINE_HEIGHT, 1)
+        if lines <= shown:
+            return y / LINE_HEIGHT
+        # the slider moves through the canvas slower than the lines do, as the overview scrolls too
+        speed = (shown - visible) / max(lines - visible, 1)
+        if speed <= 0:
+            return y / max(self.canvas.winfo_height(), 1) * lines
+        return y / LINE_HEIGHT / speed
+
+    def _press(self, event):
+        first, last = self._visible_lines()
+        top = (first - self._top) * LINE_HEIGHT
+        bottom = (last + 1 - self._top) * LINE_HEIGHT
+        if top <= event.y < bottom:
+            # dragging the slider keeps the point grabbed under the mouse
+            self._drag_offset = event.y - top
+        else:
+            # a click elsewhere centers the view on the line clicked
+            self._drag_offset = (bottom - top) // 2
+            line = self._top + event.y // LINE_HEIGHT
+            self._scroll_to(line - (last - first) // 2)
+
+    def _drag(self, event):
+        if self._drag_offset is not None:
+            self._scroll_to(self._first_line_for(event.y - self._drag_offset))
+
+    def _release(self, event):
+        self._drag_offset = None
+
+    def _scroll_to(self, line):
+        lines = max(self.document.line_count, 1)
+        # through the Scroller, so a drag scrolls at most once per frame
+        self.scroller.scrollbar_command("moveto", str(max(line, 0) / lines))
+
+    def detach(self):
+        self._jobs.put(None)
+        for job in (self._render_job, self._poll_job):
+            if job is not None:
+                self.canvas.after_cancel(job)
+        self._render_job = self._poll_job = None
+        self.text_area.remove_change_listener(self._on_changes)
+        canvas = self.canvas
+        for sequence in ("<Button-1>", "<B1-Motion>", "<ButtonRelease-1>", "<Configure>"):
+            canvas.unbind(sequence)
+        canvas.delete("all")
+        self._images.clear()
+        self._items.clear()
@@ -0,0 +1,110 @@
+CURSOR_TAG = "extra_cursor"
+_MARK_PREFIX = "extra_cursor_"
+
+# event.state bits of the modifiers whose shortcuts are left to the other bindings
+_CONTROL = 0x4
+_ALT = 0x8
+
+
+class MultiCursor:
+    """Extra cursors in a TextArea, typed at along with the insert cursor as one `TextArea.bulk_edit`.
+
+    Alt+click adds a cursor, or removes the one clicked, and any other
+    click or Escape removes them all. Cursors are marks, shown by a tag on
+    the character after each. Their bindings are on a bindtag of their own
+    ahead of the TextArea's, so while there are extra cursors the keys
+    they type never reach the TextArea's own bindings.
+    """
+
+    def __init__(self, text_area, color):
+        self.text_area = text_area
+        self.color = color
+        self.marks = []
+        self._count = 0
+
+        bindtag = f"{text_area}.multicursor"
+        text_area.bind_class(bindtag, "<Alt-Button-1>", self._toggle)
+        text_area.bind_class(bindtag, "<Button-1>", lambda event: self.clear())
+        text_area.bind_class(bindtag, "<Key>", self.key)
+        text_area.bindtags((bindtag, *text_area.bindtags()))
+
+    @property
+    def active(self):
+        return bool(self.marks)
+
+    def _toggle(self, event):
+        text_area = self.text_area
+        index = text_area.index(f"@{event.x},{event.y}")
+        for mark in self.marks:
+            if text_area.compare(mark, "==", index):
+                self.marks.remove(mark)
+                text_area.mark_unset(mark)
+                break
+        else:
+            self._count += 1
+            mark = f"{_MARK_PREFIX}{self._count}"
+            text_area.mark_set(mark, index)
+            self.marks.append(mark)
+        self.show()
+        text_area.focus_set()
+        return "break"
+
+    def positions(self):
+        """Indices of every cursor, the insert cursor first"""
+        return [self.text_area.index(mark) for mark in ("insert", *self.marks)]
+
+    def show(self):
+        """Tag the cursors, dropping the ones that ran into another"""
+        text_area = self.text_area
+        text_area.tag_remove(CURSOR_TAG, "1.0", "end")
+        seen = {text_area.index("insert")}
+        for mark in list(self.marks):
+            index = text_area.index(mark)
+            if index in seen:
+                self.marks.remove(mark)
+                text_area.mark_unset(mark)
+            else:
+                seen.add(index)
+                text_area.tag_add(CURSOR_TAG, mark)
+        # the tag goes away with the document the TextArea showed
+        text_area.tag_configure(CURSOR_TAG, background=self.color)
+        text_area.tag_raise(CURSOR_TAG)
+
+    def clear(self):
+        text_area = self.text_area
+        for mark in self.marks:
+            text_area.mark_unset(mark)
+        self.marks = []
+        text_area.tag_remove(CURSOR_TAG, "1.0", "end")
+
+    def type(self, text):
+        """Insert `text` at every cursor"""
+        self.edit([(index, index, text) for index in set(self.positions())])
+
+    def edit(self, edits):
+        self.text_area.bulk_edit(edits)
+        self.show()
+        self.text_area.see("insert")
+
+    def key(self, event):
+        """Type a key pressed at every cursor, returning "break" when it was"""
+        if not self.marks:
+            return None
+        if event.keysym == "Escape":
+            self.clear()
+            return None
+        if event.state & (_CONTROL | _ALT):
+            return None
+        positions = set(self.positions())
+        if event.keysym == "BackSpace":
+            self.edit([(f"{index}-1c", index, "") for index in positions])
+        elif event.keysym == "Delete":
+            self.edit([(index, f"{index}+1c", "") for index in positions])
+        elif event.keysym in ("Return", "KP_Enter"):
+            self.type("\n")
+        elif event.char and event.char.isprintable():
+            self.type(event.char)
+        else:
+            # moving around, tabs...
+            return None
+        return "break"
@@ -1,28 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image
-import base64
-from io import BytesIO
-from pathlib import Path
 
-RES_PATH = Path(__file__).parent.parent.parent / "resources"
-
-CLOSE_ICON_SIZE = 20
-
-image = Image.open(RES_PATH / "close.png").resize((CLOSE_ICON_SIZE, CLOSE_ICON_SIZE))
-buffered = BytesIO()
-image.save(buffered, format="PNG")
-close_img = base64.b64encode(buffered.getvalue())
-
-image = Image.open(RES_PATH / "close_focus.png").resize((CLOSE_ICON_SIZE, CLOSE_ICON_SIZE))
-buffered = BytesIO()
-image.save(buffered, format="PNG")
-close_focus_img = base64.b64encode(buffered.getvalue())
-
-image = Image.open(RES_PATH / "close_press.png").resize((CLOSE_ICON_SIZE, CLOSE_ICON_SIZE))
-buffered = BytesIO()
-image.save(buffered, format="PNG")
-close_press_img = base64.b64encode(buffered.getvalue())
+from ui.assets import load_icons
 
 
 class CustomNotebook(ttk.Notebook):
@@ -33,7 +12,7 @@ class CustomNotebook(ttk.Notebook):
     def __init__(self, *args, background="#282c34", **kwargs):
         if not self.__initialized:
             self.__initialize_custom_style()
-            self.__inititialized = True
+            CustomNotebook.__initialized = True
 
         # Import the Notebook.tab element from the default theme
         self.styler = ttk.Style()
@@ -47,6 +26,8 @@ class CustomNotebook(ttk.Notebook):
         ttk.Notebook.__init__(self, *args, **kwargs)
 
         self._active = None
+        # the tab removed by the last <<NotebookTabClosed>>
+        self.closed_tab = None
 
         self.bind("<ButtonPress-1>", self.on_close_press, True)
         self.bind("<ButtonRelease-1>", self.on_close_release)
@@ -75,6 +56,7 @@ class CustomNotebook(ttk.Notebook):
         index = self.index("@%d,%d" % (event.x, event.y))
 
         if self._active == index:
+            self.closed_tab = self.nametowidget(self.tabs()[index])
             self.forget(index)
             self.event_generate("<<NotebookTabClosed>>")
 
@@ -83,20 +65,8 @@ class CustomNotebook(ttk.Notebook):
 
     def __initialize_custom_style(self):
         style = ttk.Style()
-        self.images = (
-            tk.PhotoImage(
-                "img_close",
-                data=close_img,
-            ),
-            tk.PhotoImage(
-                "img_closeactive",
-                data=close_focus_img,
-            ),
-            tk.PhotoImage(
-                "img_closepressed",
-                data=close_press_img,
-            ),
-        )
+        # kept on the class, the style refers to them by name for as long as the app runs
+        CustomNotebook.images = load_icons()
 
         style.element_create(
             "close",
@@ -0,0 +1,105 @@
+import queue
+import time
+
+from core.loader import RESTART
+
+# how long a single event loop turn may spend inserting text
+TIME_BUDGET = 0.012  # s
+INSERT_SIZE = 64 * 1024  # characters per `insert` call
+
+
+class ProgressiveLoad:
+    """Feeds the text decoded by a `core.loader.FileLoader` into a TextArea.
+
+    Text is inserted in small pieces from `after` callbacks that each stop
+    after `TIME_BUDGET`, so the window keeps repainting and handling input
+    while a big file loads. The TextArea is read-only until the load is
+    done. With `long_lines` (a `ui.longlines.LongLines`) the text goes in
+    through it, so lines too long to lay out are cut off as they come in.
+    """
+
+    def __init__(self, text_area, loader, on_progress=None, on_done=None, long_lines=None):
+        self.text_area = text_area
+        self.loader = loader
+        self.long_lines = long_lines
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.done = False
+
+        self._pending = ""
+        self._pending_position = 0
+
+        # loading is not undoable, the history is cleared once the file is in
+        self._undo_history = text_area.undo_history
+        text_area.undo_history = None
+        text_area.configure(state="disabled")
+        self._job = text_area.after_idle(self._step)
+
+    @property
+    def progress(self):
+        return self.loader.progress
+
+    def _next_piece(self):
+        """Return the next piece of text to insert, "" when nothing is ready yet and None at the end"""
+        if self._pending_position >= len(self._pending):
+            chunk = self.loader.chunks.get_nowait()
+            if chunk is None:
+                return None
+            if chunk is RESTART:
+                self._restart()
+                return ""
+            self._pending, self._pending_position = chunk, 0
+
+        start = self._pending_position
+        self._pending_position += INSERT_SIZE
+        return self._pending[start:self._pending_position]
+
+    def _step(self):
+        deadline = time.perf_counter() + TIME_BUDGET
+        self.text_area.configure(state="normal")
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    piece = self._next_piece()
+                except queue.Empty:
+                    break
+                if piece is None:
+                    self._finish()
+                    return
+                if self.long_lines is not None:
+                    self.long_lines.append(piece)
+                else:
+                    self.text_area.insert("end-1c", piece)
+        finally:
+            if not self.done:
+                self.text_area.configure(state="disabled")
+
+        if self.on_progress is not None:
+            self.on_progress(self)
+        self._job = self.text_area.after(1, self._step)
+
+    def _restart(self):
+        """Throw away the text inserted so far, the loader reads the file again in another encoding"""
+        self._pending, self._pending_position = "", 0
+        if self.long_lines is not None:
+            self.long_lines.restart()
+        # as an edit, so the document and the word index lose the text too
+        self.text_area.delete("1.0", "end")
+
+    def _finish(self):
+        self.done = True
+        self._job = None
+        self.text_area.configure(state="normal")
+        if self.long_lines is not None:
+            self.long_lines.finish()
+        self.text_area.undo_history = self._undo_history
+        self.text_area.edit_reset()
+        self.text_area.mark_set("insert", "1.0")
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def cancel(self):
+        if self._job is not None:
+            self.text_area.after_cancel(self._job)
+            self._job = None
+        self.loader.cancel()
@@ -0,0 +1,149 @@
+import math
+import time
+import tkinter.font as tkfont
+
+FRAME_INTERVAL = 16  # ms, at most one scroll applied per frame
+WHEEL_LINES = 3  # lines scrolled per wheel notch
+# smooth scrolling: how fast the speed a notch gives decays (per s), and the speed (px/s) it stops at
+FRICTION = 8.0
+MIN_VELOCITY = 30.0
+
+
+class Scroller:
+    """Scrolls a TextArea at most once per frame, however many wheel and scrollbar events arrive.
+
+    Wheel notches and scrollbar steps are added up, and a scrollbar drag
+    only keeps its latest position. Once per frame the sum is applied as a
+    single `yview` call, and the TextArea's changes are flushed right away
+    so the LineGutter is redrawn in the same frame as the text.
+
+    With `smooth` set, a notch gives the view a speed instead, which is
+    spent scrolling pixel by pixel over the next frames, slowing down as it
+    goes (and adding up when notches come in quick succession).
+    """
+
+    def __init__(self, text_area, smooth=False, wheel_lines=WHEEL_LINES, widgets=()):
+        self.text_area = text_area
+        self.smooth = smooth
+        self.wheel_lines = wheel_lines
+
+        # what was asked for since the last frame
+        self._lines = 0.0
+        self._pages = 0
+        self._moveto = None
+        # smooth scrolling, in px/s, and the fraction of a pixel still to scroll
+        self._velocity = 0.0
+        self._pixels = 0.0
+        self._line_height = None
+
+        self._frame_job = None
+        self._last_frame = 0.0
+        # wheel and scrollbar events handled, and frames that scrolled
+        self.events = 0
+        self.frames = 0
+
+        self._aqua = text_area.tk.call("tk", "windowingsystem") == "aqua"
+        for widget in (text_area,) + tuple(widgets):
+            widget.bind("<MouseWheel>", self.wheel)
+            widget.bind("<Button-4>", self.wheel)
+            widget.bind("<Button-5>", self.wheel)
+
+    def wheel(self, event):
+        if event.state & 0x0001:
+            # shift scrolls sideways, the Text class bindings do that
+            return None
+        if event.num == 4:
+            lines = -self.wheel_lines
+        elif event.num == 5:
+            lines = self.wheel_lines
+        elif self._aqua:
+            # deltas are in lines already
+            lines = -event.delta
+        else:
+            lines = -event.delta / 120 * self.wheel_lines
+        self.scroll_lines(lines)
+        return "break"
+
+    def scrollbar_command(self, *args):
+        """`command` of the scrollbar"""
+        self.events += 1
+        if args[0] == "moveto":
+            # a drag, only the latest position matters
+            self._moveto = float(args[1])
+            self._lines = self._pages = 0
+            self._velocity = 0.0
+        elif args[0] == "scroll":
+            if args[2] == "pages":
+                self._pages += int(args[1])
+            else:
+                self._lines += int(args[1])
+        self._schedule()
+
+    def scroll_lines(self, lines):
+        self.events += 1
+        if self.smooth:
+            # the speed decaying at FRICTION covers `lines` in all
+            self._velocity += lines * self._line_pixels() * FRICTION
+        else:
+            self._lines += lines
+        self._schedule()
+
+    def _line_pixels(self):
+        if self._line_height is None:
+            font = tkfont.Font(font=self.text_area.cget("font"))
+            self._line_height = font.metrics("linespace")
+        return self._line_height
+
+    def _schedule(self):
+        if self._frame_job is not None:
+            return
+        wait = FRAME_INTERVAL - (time.perf_counter() - self._last_frame) * 1000
+        if wait <= 0:
+            self._frame_job = self.text_area.after_idle(self._frame)
+        else:
+            self._frame_job = self.text_area.after(int(wait), self._frame)
+
+    def _frame(self):
+        self._frame_job = None
+        now = time.perf_counter()
+        # after a pause, smooth scrolling starts as if the last frame was just before
+        elapsed = min(now - self._last_frame, 2 * FRAME_INTERVAL / 1000)
+        self._last_frame = now
+        text_area = self.text_area
+
+        if self._moveto is not None:
+            text_area.yview_moveto(self._moveto)
+            self._moveto = None
+        if self._pages:
+            text_area.yview_scroll(self._pages, "pages")
+            self._pages = 0
+        # fractions of a line (from high resolution wheels) are kept for the next frame
+        lines = int(self._lines)
+        if lines:
+            text_area.yview_scroll(lines, "units")
+            self._lines -= lines
+
+        if self._velocity:
+            self._pixels += self._velocity * elapsed
+            pixels = int(self._pixels)
+            if pixels:
+                text_area.yview_scroll(pixels, "pixels")
+                self._pixels -= pixels
+            self._velocity *= math.exp(-FRICTION * elapsed)
+            if abs(self._velocity) < MIN_VELOCITY:
+                self._velocity = self._pixels = 0.0
+            else:
+                self._schedule()
+
+        self.frames += 1
+        # the gutter follows in this frame rather than the next idle time
+        text_area.flush_changes()
+
+    def stop(self):
+        """Forget the scrolling not done yet"""
+        if self._frame_job is not None:
+            self.text_area.after_cancel(self._frame_job)
+            self._frame_job = None
+        self._lines = self._pages = 0
+        self._moveto = None
+        self._velocity = self._pixels = 0.0
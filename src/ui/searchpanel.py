@@ -0,0 +1,203 @@
+import queue
+import re
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from core.search import FileSearch, TrigramIndex, compile_query
+
+POLL_INTERVAL = 50  # ms
+# how long a single event loop turn may spend adding results to the tree
+TIME_BUDGET = 0.010  # s
+MAX_RESULTS = 10_000  # matches shown, the search stops after that many
+
+
+class SearchPanel(tk.Frame):
+    """Find in files, over the folder a `core.workspace.WorkspaceScanner` listed.
+
+    Once the folder is scanned its files are indexed in the background (see
+    `core.search.TrigramIndex`), so later searches skip the files that can
+    not match. Results are added to the tree as they stream in, and a new
+    query cancels the search still running. `on_open(path, line, column)`
+    is called for a result double-clicked.
+    """
+
+    def __init__(self, master, on_open, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_open = on_open
+        self.index = TrigramIndex()
+        self.scanner = None
+        self.search = None
+        # () -> {path relative to the folder: document snapshot} for the files open with unsaved edits
+        self.open_documents = dict
+        self._indexing = None
+        self._poll_job = None
+        self._index_job = None
+        # iid -> (path, line, column) of every match in the tree
+        self._matches = {}
+        self._file_items = {}
+
+        self.query = tk.StringVar()
+        self.regex = tk.BooleanVar(value=False)
+        self.case_sensitive = tk.BooleanVar(value=False)
+        self.status = tk.StringVar()
+
+        top = tk.Frame(self, bg=self["bg"])
+        colors = dict(bg=self["bg"], fg="#9da5b4")
+        self.entry = tk.Entry(
+            top, textvariable=self.query, bg="#1b1d23", fg="#abb2bf", insertbackground="#528bff", borderwidth=0
+        )
+        check_colors = dict(colors, selectcolor="#1b1d23", activebackground=self["bg"], highlightthickness=0)
+        tk.Checkbutton(top, text=".*", variable=self.regex, **check_colors).pack(side=tk.RIGHT)
+        tk.Checkbutton(top, text="Aa", variable=self.case_sensitive, **check_colors).pack(side=tk.RIGHT)
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 4), pady=2)
+        top.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(self, textvariable=self.status, anchor="w", **colors).pack(side=tk.TOP, fill=tk.X, padx=8)
+
+        self.tree = ttk.Treeview(self, show="tree", selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.entry.bind("<Return>", lambda event: self.start_search())
+        self.entry.bind("<Escape>", lambda event: self.cancel())
+        self.tree.bind("<Double-Button-1>", self.handle_open)
+        self.tree.bind("<Return>", self.handle_open)
+
+    def set_scanner(self, scanner):
+        """Search the folder `scanner` lists from now on"""
+        self.cancel()
+        self._stop_indexing()
+        if self.scanner is not None and scanner is not None and self.scanner.root != scanner.root:
+            self.index = TrigramIndex()
+        self.scanner = scanner
+        self._clear()
+        if scanner is not None:
+            self._index_job = self.after(POLL_INTERVAL, self._index_when_scanned)
+
+    def _index_when_scanned(self):
+        self._index_job = None
+        scanner = self.scanner
+        if not scanner.done.is_set():
+            self._index_job = self.after(POLL_INTERVAL, self._index_when_scanned)
+            return
+        self._indexing = _Indexing(self.index, scanner.root, list(scanner.files))
+
+    def _stop_indexing(self):
+        if self._index_job is not None:
+            self.after_cancel(self._index_job)
+            self._index_job = None
+        if self._indexing is not None:
+            self._indexing.cancelled = True
+            self._indexing = None
+
+    def invalidate(self, path):
+        """Forget what the index knows of the file at `path` (absolute), after it was written"""
+        if self.scanner is None:
+            return
+        try:
+            relative = path.resolve().relative_to(self.scanner.root)
+        except ValueError:
+            return
+        self.index.remove(relative.as_posix())
+
+    def focus_entry(self):
+        self.entry.focus_set()
+        self.entry.select_range(0, tk.END)
+
+    def cancel(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+            self.status.set(f"{len(self._matches)} matches (cancelled)")
+
+    def _clear(self):
+        self._matches = {}
+        self._file_items = {}
+        self.tree.delete(*self.tree.get_children(""))
+        self.status.set("")
+
+    def start_search(self):
+        self.cancel()
+        self._clear()
+        if self.scanner is None:
+            self.status.set("Open a folder to search in")
+            return
+        if not self.query.get():
+            return
+        try:
+            compiled = compile_query(self.query.get(), self.regex.get(), self.case_sensitive.get())
+        except re.error as exc:
+            self.status.set(f"Invalid regex: {exc}")
+            return
+
+        self.search = FileSearch(
+            str(self.scanner.root), list(self.scanner.files), compiled, self.index, self.open_documents()
+        )
+        self.status.set("Searching...")
+        self._poll_job = self.after(1, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        search = self.search
+        deadline = time.perf_counter() + TIME_BUDGET
+        finished = False
+        while time.perf_counter() < deadline:
+            try:
+                batch = search.results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            self._add_matches(batch)
+            if len(self._matches) >= MAX_RESULTS:
+                search.cancel()
+
+        count = len(self._matches)
+        skipped = search.files_total - search.files_read
+        if finished:
+            self.search = None
+            self.status.set(
+                f"{count} matches in {len(self._file_items)} files ({search.files_read} read, {skipped} skipped)"
+            )
+        else:
+            self.status.set(f"{count} matches in {len(self._file_items)} files, searching...")
+            self._poll_job = self.after(POLL_INTERVAL, self._poll)
+
+    def _add_matches(self, batch):
+        tree = self.tree
+        for path, line, column, text in batch:
+            parent = self._file_items.get(path)
+            if parent is None:
+                parent = self._file_items[path] = tree.insert("", "end", text=path, open=True)
+            iid = tree.insert(parent, "end", text=f"{line + 1}: {text.strip()}")
+            self._matches[iid] = (path, line, column)
+
+    def handle_open(self, event):
+        match = self._matches.get(self.tree.focus())
+        if match is None:
+            return
+        path, line, column = match
+        self.on_open(self.scanner.root / path, line, column)
+        return "break"
+
+    def destroy(self):
+        self.cancel()
+        self._stop_indexing()
+        super().destroy()
+
+
+class _Indexing:
+    """Brings the index up to date with the files of a folder, in a background thread"""
+
+    def __init__(self, index, root, paths):
+        self.cancelled = False
+        threading.Thread(
+            target=index.refresh, args=(str(root), paths, lambda: self.cancelled), name="index", daemon=True
+        ).start()
@@ -0,0 +1,82 @@
+import queue
+import threading
+
+from core.loader import RESTART, FileLoader
+from core.piecetable import PieceTable
+
+POLL_INTERVAL = 20  # ms
+
+
+class SessionLoader:
+    """Reads the files of the tabs restored from the last session in the background, one at a time.
+
+    `next_tab()` is asked for the tab to read next, None when there is none
+    left, so the order can follow what the user does in the meantime. A
+    worker thread reads the file with a `core.loader.FileLoader` and builds
+    its `PieceTable`, then `on_loaded(tab, loader, document, text)` is
+    called on the Tk thread. `loader` is None when the file could not even
+    be opened.
+    """
+
+    def __init__(self, widget, next_tab, on_loaded):
+        self.widget = widget
+        self.next_tab = next_tab
+        self.on_loaded = on_loaded
+        self.done = False
+
+        self._jobs = queue.Queue()
+        # (tab, loader, document, text)
+        self._results = queue.Queue()
+        threading.Thread(target=self._work, name="session", daemon=True).start()
+        # after the window showed the selected tab
+        self._job = widget.after_idle(self._next)
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            tab, path = job
+            try:
+                loader = FileLoader(path)
+            except OSError:
+                self._results.put((tab, None, None, None))
+                continue
+            chunks = []
+            while True:
+                chunk = loader.chunks.get()
+                if chunk is None:
+                    break
+                if chunk is RESTART:
+                    # read again in another encoding
+                    chunks = []
+                    continue
+                chunks.append(chunk)
+            text = "".join(chunks)
+            self._results.put((tab, loader, PieceTable(text), text))
+
+    def _next(self):
+        self._job = None
+        tab = self.next_tab()
+        if tab is None:
+            self.close()
+            return
+        self._jobs.put((tab, tab.path))
+        self._job = self.widget.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        try:
+            result = self._results.get_nowait()
+        except queue.Empty:
+            self._job = self.widget.after(POLL_INTERVAL, self._poll)
+            return
+        self.on_loaded(*result)
+        # one file per turn of the event loop, the window stays responsive between them
+        self._job = self.widget.after_idle(self._next)
+
+    def close(self):
+        self.done = True
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self._jobs.put(None)
@@ -0,0 +1,97 @@
+import tkinter as tk
+
+from core.symbols import find_symbols
+
+MAX_RESULTS = 50
+
+
+class SymbolPalette(tk.Toplevel):
+    """Go to a symbol of any open tab, fuzzy-matching its name as it is typed.
+
+    `sources()` returns the (tab, `core.symbols.SymbolIndex`) pairs to search,
+    the current tab first. `on_select(tab, line, column)` is called with the
+    symbol picked.
+    """
+
+    def __init__(self, master, sources, on_select, **kwargs):
+        super().__init__(master, bg="#21252b", **kwargs)
+        self.sources = sources
+        self.on_select = on_select
+        # (tab, index, symbol) for every row of the list
+        self.results = []
+
+        self.overrideredirect(True)
+        self.transient(master)
+
+        self.query = tk.StringVar()
+        self.entry = tk.Entry(
+            self, textvariable=self.query, bg="#1b1d23", fg="#abb2bf", insertbackground="#528bff", borderwidth=4,
+            relief=tk.FLAT, width=60,
+        )
+        self.listbox = tk.Listbox(
+            self, bg="#21252b", fg="#abb2bf", selectbackground="#3e4451", borderwidth=0, highlightthickness=0,
+            activestyle="none", height=15,
+        )
+        self.entry.pack(side=tk.TOP, fill=tk.X, padx=4, pady=4)
+        self.listbox.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=4, pady=(0, 4))
+
+        self.query.trace_add("write", lambda *args: self.refresh())
+        self.entry.bind("<Down>", lambda event: self.move(1))
+        self.entry.bind("<Up>", lambda event: self.move(-1))
+        self.entry.bind("<Return>", self.select)
+        self.entry.bind("<Escape>", lambda event: self.destroy())
+        self.entry.bind("<FocusOut>", lambda event: self.destroy())
+        # handled here, the Listbox bindings would take the focus from the entry and close the palette
+        self.listbox.bind("<Button-1>", self.click)
+
+        x = master.winfo_rootx() + (master.winfo_width() - self.entry.winfo_reqwidth()) // 2
+        self.geometry(f"+{max(x, 0)}+{master.winfo_rooty() + 40}")
+        self.refresh()
+        self.entry.focus_force()
+
+    def refresh(self):
+        sources = self.sources()
+        query = self.query.get().strip()
+        if query:
+            tabs = {index: tab for tab, index in sources}
+            found = find_symbols([index for tab, index in sources], query, MAX_RESULTS)
+            self.results = [(tabs[index], index, symbol) for index, symbol in found]
+        elif sources:
+            # the outline of the current tab
+            tab, index = sources[0]
+            self.results = [(tab, index, symbol) for symbol in index.symbols()[:MAX_RESULTS * 4]]
+        else:
+            self.results = []
+
+        self.listbox.delete(0, tk.END)
+        for tab, index, symbol in self.results:
+            self.listbox.insert(tk.END, f"{symbol.name}    {symbol.kind}  {tab.title}:{index.line_of(symbol) + 1}")
+        if self.results:
+            self.listbox.selection_set(0)
+
+    def move(self, step):
+        if not self.results:
+            return "break"
+        selected = self.listbox.curselection()
+        row = max(0, min(len(self.results) - 1, (selected[0] if selected else -1) + step))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(row)
+        self.listbox.see(row)
+        return "break"
+
+    def click(self, event):
+        row = self.listbox.nearest(event.y)
+        if 0 <= row < len(self.results):
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(row)
+            self.select()
+        return "break"
+
+    def select(self, event=None):
+        selected = self.listbox.curselection()
+        if selected and self.results:
+            tab, index, symbol = self.results[selected[0]]
+            line, column = index.line_of(symbol), symbol.column
+            self.destroy()
+            self.on_select(tab, line, column)
+        return "break"
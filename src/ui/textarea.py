@@ -1,4 +1,81 @@
 import tkinter as tk
+from collections import namedtuple
+
+from core import instrumentation
+from core.words import CONTEXT, word_context
+
+
+class TextChange(namedtuple("TextChange", "action start end length text")):
+    """A single mutation seen by `TextArea.event_proxy`.
+
+    `action` is one of "insert", "delete", "cursor" or "view". For edits,
+    `start` and `end` are the indices the inserted text now spans (or the
+    removed text used to span), `length` is the number of characters and
+    `text` the characters themselves. For "cursor" both indices are the new
+    insert position, and for "view" they are None.
+    """
+
+    __slots__ = ()
+
+    @property
+    def is_edit(self):
+        return self.action in ("insert", "delete")
+
+    @property
+    def cursor_only(self):
+        return self.action == "cursor"
+
+    @property
+    def view_only(self):
+        return self.action == "view"
+
+
+# Tcl procedures `TextArea.bulk_edit` makes its edits with, defined in the interpreter on first use
+_RESOLVE_PROC = "codingg_resolve_indices"
+_GET_RANGES_PROC = "codingg_get_ranges"
+_BULK_EDIT_PROC = "codingg_bulk_edit"
+_BULK_EDIT_SCRIPT = """
+proc %s {widget indices} {
+    set last [$widget index end-1c]
+    set result {}
+    foreach index $indices {
+        set index [$widget index $index]
+        if {[$widget compare $index > $last]} {set index $last}
+        lappend result $index
+    }
+    return $result
+}
+proc %s {widget indices} {
+    set result {}
+    foreach {start end} $indices {
+        lappend result [$widget get $start $end]
+    }
+    return $result
+}
+proc %s {widget edits} {
+    foreach {start end text} $edits {
+        if {$start ne $end} {$widget delete $start $end}
+        if {$text ne ""} {$widget insert $start $text}
+    }
+}
+""" % (_RESOLVE_PROC, _GET_RANGES_PROC, _BULK_EDIT_PROC)
+# where the last range of a bulk edit ends, followed through the edits
+_BULK_END_MARK = "codingg_bulk_end"
+
+
+def _position(index):
+    line, col = index.split(".")
+    return int(line), int(col)
+
+
+def advance_index(index, text):
+    """Return the index `text` ends at when inserted at `index` (both "line.col")."""
+    line, col = map(int, index.split("."))
+    newlines = text.count("\n")
+    if newlines:
+        last_col = len(text) - text.rindex("\n") - 1
+        return f"{line + newlines}.{last_col}"
+    return f"{line}.{col + len(text)}"
 
 
 class TextArea(tk.Text):
@@ -7,18 +84,277 @@ class TextArea(tk.Text):
 
         self.master = master
 
+        # undo is handled by `undo_history` rather than Tk, which never forgets an edit
         self.config(
             wrap=tk.NONE,
-            undo=True,
-            yscrollcommand=self.master.scrollbar.set,
-            maxundo=-1,
+            undo=False,
         )
 
+        # absolute number of the line shown first, for views that only hold part of a file
+        self.line_offset = 0
+
+        # `core.undo.UndoHistory` of the document shown, edits are only recorded while it is set
+        self.undo_history = None
+        # `ui.longlines.LongLines` cutting off the long lines of the document shown, if any
+        self.long_lines = None
+        # `core.words.DocumentWords` of the document shown, told about every edit while it is set
+        self.words = None
+
+        # changes made during the current event loop turn, dispatched together
+        self._pending_changes = []
+        self._edited_this_turn = False
+        self._change_listeners = []
+        self._flush_job = None
+
+        # resizing changes what is visible just like scrolling does
+        self.bind("<Configure>", lambda event: self._record_change(TextChange("view", None, None, 0, "")), add="+")
+
         self._orig = f"{self._w}_orig"
         self.tk.call("rename", self._w, self._orig)
-        self.tk.createcommand(self._w, self.event_proxy)
+        self.tk.createcommand(self._w, instrumentation.timed("TextArea.event_proxy", self.event_proxy))
+
+    def add_change_listener(self, callback):
+        """Call `callback(changes)` once per event loop turn with the `TextChange`s made during it"""
+        self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+
+    def flush_changes(self):
+        """Dispatch pending changes right away instead of waiting for idle time"""
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+
+        changes, self._pending_changes = self._pending_changes, []
+        self._edited_this_turn = False
+        if not changes:
+            return
+
+        recorder = instrumentation.recorder
+        for listener in list(self._change_listeners):
+            if recorder is None:
+                listener(changes)
+            else:
+                recorder.call(instrumentation.callback_name(listener), listener, changes)
+        self.event_generate("<<Change>>")
+
+    def reset(self, text=""):
+        """Replace the whole content with `text` without reporting it as an edit.
+
+        Used when the widget starts showing another document, the viewport
+        change is still reported so the gutter and status bar follow.
+        """
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+        self._pending_changes = []
+        self._edited_this_turn = False
+
+        self.undo_history = None
+        self.configure(state="normal")
+        self.tk.call(self._orig, "delete", "1.0", "end")
+        self.tk.call(self._orig, "insert", "1.0", text)
+        self.edit_reset()
+        self.line_offset = 0
+        for tag in self.tag_names():
+            if tag != "sel":
+                self.tag_delete(tag)
+        self.tk.call(self._orig, "mark", "set", "insert", "1.0")
+        self._record_change(TextChange("view", None, None, 0, ""))
+
+    def _record_change(self, change):
+        pending = self._pending_changes
+        # only the latest cursor position / viewport matters
+        if pending and not change.is_edit and pending[-1].action == change.action:
+            pending[-1] = change
+        else:
+            pending.append(change)
+
+        if self._flush_job is None:
+            self._flush_job = self.after_idle(self.flush_changes)
+
+    def _undo(self, redo=False):
+        history = self.undo_history
+        group = history.redo() if redo else history.undo()
+        if group is None:
+            return
+
+        # the edits made while replaying are reported to listeners, but not recorded again
+        self.undo_history = None
+        try:
+            for action, start, text in group.edits if redo else reversed(group.edits):
+                end = advance_index(start, text)
+                if (action == "insert") == redo:
+                    self.insert(start, text)
+                    cursor = end
+                else:
+                    self.delete(start, end)
+                    cursor = start
+        finally:
+            self.undo_history = history
+
+        self.mark_set("insert", cursor)
+        self.see("insert")
+
+    def _edit_command(self, command):
+        """Handle `edit` subcommands concerning undo with `undo_history`, returning None for the others"""
+        history = self.undo_history
+        if command == "undo":
+            self._undo()
+        elif command == "redo":
+            self._undo(redo=True)
+        elif command == "separator":
+            history.separator()
+        elif command == "canundo":
+            return int(history.can_undo)
+        elif command == "canredo":
+            return int(history.can_redo)
+        elif command == "reset":
+            history.clear()
+            return None
+        else:
+            return None
+        return ""
+
+    def _index(self, index):
+        return self.tk.call(self._orig, "index", index)
+
+    def _clamp_end(self, index):
+        """Resolve `index`, keeping it before the newline Tk always keeps at the end"""
+        index = self._index(index)
+        if self.tk.call(self._orig, "compare", index, ">", "end-1c"):
+            return self._index("end-1c")
+        return index
+
+    def _count_words(self, changes):
+        """Tell `words` about an edit, with the parts of the words it cuts into"""
+        start = changes[0].start
+        end = changes[0].end if changes[0].action == "delete" else start
+        left, right = word_context(
+            self.tk.call(self._orig, "get", f"{start}-{CONTEXT}c", start),
+            self.tk.call(self._orig, "get", end, f"{end}+{CONTEXT}c"),
+        )
+        removed = "".join(change.text for change in changes if change.action == "delete")
+        inserted = "".join(change.text for change in changes if change.action == "insert")
+        self.words.edit(left + removed + right, left + inserted + right)
+
+    def bulk_edit(self, edits):
+        """Replace many ranges at once, as one undo step, with a single Tcl call making the edits.
+
+        `edits` are (start, end, text) with indices into the text as it is
+        before any of them, the ranges must not overlap. They are made from
+        the bottom up, so the changes reported (in that order) each hold
+        against the text the ones before them left. Listeners get them all
+        in the same batch, and `words` hears of them as a single edit.
+        """
+        if not edits or str(self.tk.call(self._orig, "cget", "-state")) == "disabled":
+            return
+        if not self.tk.call("info", "commands", _BULK_EDIT_PROC):
+            self.tk.eval(_BULK_EDIT_SCRIPT)
+        # checked before anything is touched, a rejected call leaves the widget as it was
+        ranges = self._bulk_ranges(edits)
+        if self.long_lines is not None and self.long_lines.hidden:
+            for start, end, _ in edits:
+                self.long_lines.before_edit(start, end)
+            # showing the rest of a line moves the indices past its placeholder
+            ranges = self._bulk_ranges(edits)
+
+        # the text removed, and what is around and between the edits for `words`, in one call
+        reads = [index for _, _, start, end, _ in ranges if start != end for index in (start, end)]
+        first, last = ranges[0][2], ranges[-1][3]
+        if self.words is not None:
+            reads += [f"{first}-{CONTEXT}c", first, first, last, last, f"{last}+{CONTEXT}c"]
+        # rather than a multi-range `get`, which leaves out empty ranges and returns a lone range as a string
+        texts = self.tk.splitlist(self.tk.call(_GET_RANGES_PROC, self._orig, tuple(reads))) if reads else ()
+        removed = list(texts[:sum(start != end for _, _, start, end, _ in ranges)])
+        if self.words is not None:
+            left, right = word_context(texts[-3], texts[-1])
+            before_text = texts[-2]
+            self.tk.call(self._orig, "mark", "set", _BULK_END_MARK, last)
+
+        changes = []
+        for _, _, start, end, text in reversed(ranges):
+            if start != end:
+                removed_text = removed.pop()
+                changes.append(TextChange("delete", start, end, len(removed_text), removed_text))
+            if text:
+                changes.append(TextChange("insert", start, advance_index(start, text), len(text), text))
+        self.tk.call(_BULK_EDIT_PROC, self._orig, tuple(item for edit in reversed(ranges) for item in edit[2:]))
+
+        if self.words is not None:
+            after_text = self.tk.call(self._orig, "get", first, _BULK_END_MARK)
+            self.tk.call(self._orig, "mark", "unset", _BULK_END_MARK)
+            self.words.edit(left + before_text + right, left + after_text + right)
+
+        history = self.undo_history
+        if history is not None:
+            # a step of its own, neither joining the edits before it nor the typing after it
+            history.separator()
+            for n, change in enumerate(changes):
+                history.record(change.action, change.start, change.text, compound=n > 0)
+            history.separator()
+        self._edited_this_turn = True
+        for change in changes:
+            self._record_change(change)
+
+    def _bulk_ranges(self, edits):
+        """(start position, end position, start, end, text) of `edits` in order, raising ValueError when they overlap"""
+        indices = self.tk.splitlist(
+            self.tk.call(_RESOLVE_PROC, self._orig, tuple(str(index) for edit in edits for index in edit[:2]))
+        )
+        ranges = []
+        for n, (_, _, text) in enumerate(edits):
+            start, end = sorted((indices[2 * n], indices[2 * n + 1]), key=_position)
+            ranges.append((_position(start), _position(end), start, end, text))
+        ranges.sort()
+        for before, after in zip(ranges, ranges[1:]):
+            if after[0] < before[1] or after[0] == before[0]:
+                raise ValueError(f"bulk edits overlap at {after[2]}")
+        return ranges
 
     def event_proxy(self, *args):
+        if args[0] == "delete" and len(args) > 3:
+            # split multi-range deletes so every range gets its own change,
+            # deleting from the bottom up keeps the other ranges valid
+            ranges = [(self._index(args[n]), self._index(args[n + 1])) for n in range(1, len(args) - 1, 2)]
+            ranges.sort(key=lambda r: tuple(map(int, r[0].split("."))), reverse=True)
+            for start, end in ranges:
+                self.event_proxy("delete", start, end)
+            return ""
+
+        if args[0] == "edit" and len(args) > 1 and self.undo_history is not None:
+            result = self._edit_command(args[1])
+            if result is not None:
+                return result
+
+        if self.long_lines is not None and args[0] in ("insert", "delete", "replace") and len(args) > 1:
+            # the text cut off a long line has to be back before an edit reaches it
+            end = None if args[0] == "insert" else (args[2] if len(args) > 2 else f"{args[1]}+1c")
+            self.long_lines.before_edit(args[1], end)
+
+        changes = []
+        if args[0] in ("insert", "delete", "replace") and str(self.tk.call(self._orig, "cget", "-state")) == "disabled":
+            # Tk ignores edits to a disabled widget
+            pass
+        elif args[0] == "insert" and len(args) > 2:
+            start = self._clamp_end(args[1])
+            text = "".join(args[2::2])
+            changes.append(TextChange("insert", start, advance_index(start, text), len(text), text))
+        elif args[0] in ("delete", "replace") and len(args) > 1:
+            start = self._clamp_end(args[1])
+            end = self._clamp_end(args[2] if len(args) > 2 else f"{args[1]}+1c")
+            if self.tk.call(self._orig, "compare", start, "<", end):
+                removed = self.tk.call(self._orig, "get", start, end)
+                changes.append(TextChange("delete", start, end, len(removed), removed))
+            if args[0] == "replace":
+                text = "".join(args[3::2])
+                changes.append(TextChange("insert", start, advance_index(start, text), len(text), text))
+
+        if changes and self.words is not None:
+            self._count_words(changes)
+
         # let the actual widget perform the requested action
         cmd = (self._orig, *args)
         result = None
@@ -29,18 +365,23 @@ class TextArea(tk.Text):
         except tk.TclError as exc:
             if str(exc) == 'text doesn\'t contain any characters tagged with "sel"':
                 pass
+            return result
+
+        # record what was added or deleted, or whether the cursor or the view moved
+        if args[0:3] == ("mark", "set", "insert"):
+            position = self._index("insert")
+            changes.append(TextChange("cursor", position, position, 0, ""))
+        elif args[0:2] in (("xview", "moveto"), ("xview", "scroll"), ("yview", "moveto"), ("yview", "scroll")):
+            changes.append(TextChange("view", None, None, 0, ""))
 
-        # generate an event if something was added or deleted,
-        # or the cursor position changed
-        if (
-            args[0] in ("insert", "replace", "delete")
-            or args[0:3] == ("mark", "set", "insert")
-            or args[0:2] == ("xview", "moveto")
-            or args[0:2] == ("xview", "scroll")
-            or args[0:2] == ("yview", "moveto")
-            or args[0:2] == ("yview", "scroll")
-        ):
-            self.event_generate("<<Change>>", when="tail")
+        for change in changes:
+            if change.action == "insert" and not change.length:
+                continue
+            if change.is_edit and self.undo_history is not None:
+                # edits made in the same event loop turn are undone together
+                self.undo_history.record(change.action, change.start, change.text, compound=self._edited_this_turn)
+                self._edited_this_turn = True
+            self._record_change(change)
 
         # return what the actual widget returned
         return result
@@ -0,0 +1,83 @@
+import tkinter as tk
+from tkinter import ttk
+
+from core.minimap import COLUMNS
+from ui.linegutter import LineGutter
+from ui.multicursor import MultiCursor
+from ui.scrolling import Scroller
+from ui.textarea import TextArea
+
+
+class EditorWidgets:
+    """The scrollbar, TextArea and LineGutter a FileTab shows its document in, and the Canvas of its minimap.
+
+    The widgets are children of the notebook rather than of a tab, so they
+    can be packed into whichever tab currently borrows them.
+    """
+
+    def __init__(self, master, text_options, gutter_options, scroll_options=None, minimap_options=None):
+        self.scrollbar = ttk.Scrollbar(master, orient="vertical")
+        # drawn in by a `ui.minimap.MinimapView`, None when the minimap is turned off
+        self.minimap = None
+        if minimap_options is not None:
+            self.minimap = tk.Canvas(master, width=COLUMNS, **minimap_options)
+        self.text_area = TextArea(master, **text_options)
+        self.line_gutter = LineGutter(master, self.text_area, **gutter_options)
+        # wheel events over the gutter scroll the text too
+        self.scroller = Scroller(self.text_area, widgets=(self.line_gutter,), **(scroll_options or {}))
+        self.multi_cursor = MultiCursor(self.text_area, text_options.get("insertbackground", "black"))
+        self.reset()
+
+    @property
+    def _widgets(self):
+        widgets = [self.scrollbar, self.line_gutter, self.text_area]
+        if self.minimap is not None:
+            widgets.append(self.minimap)
+        return widgets
+
+    def pack(self, tab):
+        for widget in self._widgets:
+            # a widget is hidden by a container created after it unless raised above it
+            widget.lift(tab)
+        self.scrollbar.pack(in_=tab, side=tk.RIGHT, fill=tk.Y)
+        if self.minimap is not None:
+            self.minimap.pack(in_=tab, side=tk.RIGHT, fill=tk.Y)
+        self.line_gutter.pack(in_=tab, side=tk.LEFT, fill=tk.Y)
+        self.text_area.pack(in_=tab, side=tk.LEFT, fill=tk.BOTH, expand=1)
+
+    def reset(self):
+        """Forget the document shown so far"""
+        for widget in self._widgets:
+            widget.pack_forget()
+        if self.minimap is not None:
+            self.minimap.delete("all")
+        self.scroller.stop()
+        self.multi_cursor.clear()
+        self.scrollbar.configure(command=self.scroller.scrollbar_command)
+        self.text_area.configure(yscrollcommand=self.scrollbar.set)
+        self.text_area.reset()
+
+    def destroy(self):
+        for widget in self._widgets:
+            widget.destroy()
+
+
+class WidgetPool:
+    """A bounded pool of `EditorWidgets` handed back by tabs that no longer show them"""
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self._free = []
+
+    def acquire(self):
+        if self._free:
+            return self._free.pop()
+        return self.factory()
+
+    def release(self, widgets):
+        widgets.reset()
+        if len(self._free) < self.size:
+            self._free.append(widgets)
+        else:
+            widgets.destroy()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the editor's modules are imported the way it imports them, from src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,223 @@
+"""`TextArea.bulk_edit`, run against a Tk text widget emulated in a Tcl interpreter, so no display is needed"""
+import random
+import re
+import tkinter
+from collections import Counter
+
+import pytest
+
+from core.blockedit import comment_edits, indent_edits
+from core.undo import UndoHistory
+from core.words import DocumentWords, WordIndex, find_words
+from ui.textarea import TextArea, advance_index
+
+
+class FakeText:
+    """The subcommands of a text widget `bulk_edit` uses, over a Python string"""
+
+    def __init__(self, text):
+        self.text = text + "\n"
+        self.marks = {"insert": 0}
+
+    def offset(self, index):
+        base, modifiers = re.match(r"^(end|\d+\.\d+|[a-z_]+)((?:[+-]\d+c)*)$", index).groups()
+        if base == "end":
+            offset = len(self.text)
+        elif base in self.marks:
+            offset = self.marks[base]
+        else:
+            line, col = map(int, base.split("."))
+            lines = self.text.split("\n")
+            line = max(1, min(line, len(lines)))
+            offset = sum(len(text) + 1 for text in lines[:line - 1]) + min(col, len(lines[line - 1]))
+        for sign, count in re.findall(r"([+-])(\d+)c", modifiers):
+            offset += int(count) if sign == "+" else -int(count)
+        # like Tk, nothing is past the newline at the end
+        return max(0, min(offset, len(self.text) - 1))
+
+    def index(self, offset):
+        before = self.text[:offset]
+        return f"{before.count(chr(10)) + 1}.{len(before) - before.rfind(chr(10)) - 1}"
+
+    def __call__(self, command, *args):
+        if command == "index":
+            return self.index(self.offset(args[0]))
+        if command == "compare":
+            first, second = self.offset(args[0]), self.offset(args[2])
+            return int({">": first > second, "<": first < second, "==": first == second}[args[1]])
+        if command == "cget":
+            return "normal"
+        if command == "get":
+            # as Tk does it: empty ranges are left out, and a lone range is not a list
+            texts = [self.text[self.offset(args[n]):self.offset(args[n + 1])] for n in range(0, len(args), 2)]
+            texts = [text for text in texts if text] if len(texts) > 1 else texts
+            return texts[0] if len(texts) == 1 else tuple(texts)
+        if command == "delete":
+            start, end = self.offset(args[0]), self.offset(args[1])
+            if start < end:
+                self.text = self.text[:start] + self.text[end:]
+                for mark, offset in self.marks.items():
+                    self.marks[mark] = start if start <= offset < end else offset - (end - start) * (offset >= end)
+            return ""
+        if command == "insert":
+            start = self.offset(args[0])
+            self.text = self.text[:start] + args[1] + self.text[start:]
+            for mark, offset in self.marks.items():
+                if offset >= start:
+                    self.marks[mark] = offset + len(args[1])
+            return ""
+        if command == "mark":
+            if args[0] == "set":
+                self.marks[args[1]] = self.offset(args[2])
+            else:
+                del self.marks[args[1]]
+            return ""
+        raise ValueError(command)
+
+
+class FakeTextArea:
+    """The state of a TextArea `bulk_edit` works with"""
+
+    def __init__(self, text, words=True, undo=False):
+        self.tk = tkinter.Tcl()
+        self.widget = FakeText(text)
+        self._orig = "text_orig"
+        self.tk.createcommand(self._orig, self.widget)
+        self.long_lines = None
+        self.words = DocumentWords(WordIndex()) if words else None
+        if self.words is not None:
+            self.words.edit("", text)
+        self.undo_history = UndoHistory(1 << 20) if undo else None
+        self._edited_this_turn = False
+        self.changes = []
+
+    @property
+    def text(self):
+        return self.widget.text[:-1]
+
+    def _record_change(self, change):
+        self.changes.append(change)
+
+    def bulk_edit(self, edits):
+        TextArea.bulk_edit(self, edits)
+
+    def _bulk_ranges(self, edits):
+        return TextArea._bulk_ranges(self, edits)
+
+
+class FakeLongLines:
+    """Records the lines `bulk_edit` would have shown whole"""
+
+    hidden = True
+
+    def __init__(self):
+        self.shown = []
+
+    def before_edit(self, start, end=None):
+        self.shown.append((start, end))
+
+
+def replay(text, changes):
+    """`text` with the changes applied the way listeners apply them, one after the other"""
+    for change in changes:
+        line, col = map(int, change.start.split("."))
+        offset = sum(len(part) + 1 for part in text.split("\n")[:line - 1]) + col
+        if change.action == "delete":
+            assert text[offset:offset + change.length] == change.text
+            text = text[:offset] + text[offset + change.length:]
+        else:
+            text = text[:offset] + change.text + text[offset:]
+    return text
+
+
+def check(area, before):
+    assert replay(before, area.changes) == area.text
+    if area.words is not None:
+        assert area.words.counts == Counter(find_words(area.text))
+
+
+def test_indent_from_first_line():
+    text = "def compute(values):\n    return sum(values)\nprint(compute)"
+    area = FakeTextArea(text)
+    area.bulk_edit(indent_edits(text.split("\n"), 1, "    "))
+    assert area.text == "    def compute(values):\n        return sum(values)\n    print(compute)"
+    check(area, text)
+
+
+def test_comment_from_first_line():
+    text = "alpha = 1\nbeta = alpha"
+    area = FakeTextArea(text)
+    area.bulk_edit(comment_edits(text.split("\n"), 1, "#"))
+    assert area.text == "# alpha = 1\n# beta = alpha"
+    check(area, text)
+
+
+def test_edit_ending_at_end():
+    text = "first line\nsecond words here"
+    area = FakeTextArea(text)
+    area.bulk_edit([("1.0", "1.5", "one"), ("2.7", "end", "replaced")])
+    assert area.text == "one line\nsecond replaced"
+    check(area, text)
+
+
+def test_single_removed_range_with_spaces():
+    text = "keep this but drop these words"
+    area = FakeTextArea(text, words=False)
+    area.bulk_edit([("1.13", "end", "")])
+    assert area.text == "keep this but"
+    check(area, text)
+
+
+def test_overlapping_edits():
+    area = FakeTextArea("hello world")
+    with pytest.raises(ValueError):
+        area.bulk_edit([("1.0", "1.5", "x"), ("1.3", "1.7", "y")])
+    with pytest.raises(ValueError):
+        area.bulk_edit([("1.2", "1.2", "x"), ("1.2", "1.2", "y")])
+
+
+def test_overlapping_edits_show_no_long_line():
+    area = FakeTextArea("hello world")
+    area.long_lines = FakeLongLines()
+    with pytest.raises(ValueError):
+        area.bulk_edit([("1.0", "1.5", "x"), ("1.3", "1.7", "y")])
+    assert area.long_lines.shown == []
+    assert area.text == "hello world"
+    area.bulk_edit([("1.0", "1.5", "x")])
+    assert area.long_lines.shown == [("1.0", "1.5")]
+
+
+def test_random_edits_and_undo():
+    rng = random.Random(0)
+    alphabet = "ab cd\n_x1"
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        area = FakeTextArea(text, words=rng.random() < 0.8, undo=True)
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, 2 * rng.randint(1, 6))))
+        spans = []
+        for n in range(0, len(cuts) - 1, 2):
+            if not spans or cuts[n] != spans[-1][0]:
+                spans.append((cuts[n], cuts[n + 1]))
+        edits = [
+            (area.widget.index(start), area.widget.index(end), "".join(rng.choices(alphabet, k=rng.randint(0, 4))))
+            for start, end in spans
+        ]
+        expected = text
+        for (start, end), (_, _, inserted) in sorted(zip(spans, edits), reverse=True):
+            expected = expected[:start] + inserted + expected[end:]
+        rng.shuffle(edits)
+
+        area.bulk_edit(edits)
+        assert area.text == expected
+        check(area, text)
+
+        if area.changes:
+            # a single undo step, which brings the text back
+            group = area.undo_history.undo()
+            assert area.undo_history.undo() is None
+            for action, start, inserted in reversed(group.edits):
+                if action == "insert":
+                    area.widget("delete", start, advance_index(start, inserted))
+                else:
+                    area.widget("insert", start, inserted)
+            assert area.text == text
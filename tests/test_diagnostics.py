@@ -0,0 +1,47 @@
+import time
+
+from core.diagnostics import ERROR, DiagnosticsRunner, check_json, check_python
+from core.piecetable import PieceTable
+
+
+def wait(runner, key):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        result = runner.take(key)
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    raise TimeoutError(key)
+
+
+def test_check_python():
+    [diagnostic] = check_python("def compute(:\n    pass\n", None)
+    assert diagnostic.severity == ERROR
+    assert diagnostic.line == 0
+    assert check_python("import os\n\nos.getcwd()\n", None) == []
+
+
+def test_check_json():
+    [diagnostic] = check_json('{"a": 1,\n "b": }', None)
+    assert (diagnostic.line, diagnostic.severity) == (1, ERROR)
+    assert check_json("", None) == []
+
+
+def test_runner_checks_snapshots():
+    runner = DiagnosticsRunner(workers=1)
+    try:
+        document = PieceTable("x = (\n")
+        runner.submit("doc", 1, "Python", document.snapshot())
+        # a newer version replaces the job of the older one
+        document.insert(len(document), ")\n")
+        runner.submit("doc", 2, "Python", document.snapshot())
+        assert wait(runner, "doc") == (2, [])
+        assert not runner.pending("doc")
+        runner.submit("other", 1, "Python", PieceTable("def f(:\n").snapshot())
+        version, diagnostics = wait(runner, "other")
+        assert version == 1 and [diagnostic.severity for diagnostic in diagnostics] == [ERROR]
+        # languages without checkers are left alone
+        runner.submit("text", 1, "Plain Text", PieceTable("anything").snapshot())
+        assert not runner.pending("text")
+    finally:
+        runner.shutdown()
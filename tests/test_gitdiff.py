@@ -0,0 +1,48 @@
+import random
+
+from core.gitdiff import ADDED, DELETED, MODIFIED, LineDiff, merge_edit
+from core.piecetable import PieceTable
+
+
+def check_hunks(base, lines, hunks):
+    """The lines outside of `hunks` are the same in `base` and `lines`, and the hunks are real changes"""
+    old = new = 0
+    for new_start, new_length, old_start, old_length in hunks:
+        assert new_start - new >= 0 and new_start - new == old_start - old
+        assert base[old:old_start] == lines[new:new_start]
+        assert new_length or old_length
+        old, new = old_start + old_length, new_start + new_length
+    assert base[old:] == lines[new:]
+
+
+def test_markers():
+    base = ["a", "b", "c", "d", "e"]
+    document = PieceTable("a\nB\nc\nnew\nd")
+    markers = LineDiff(base, document).markers()
+    assert [markers.get(line) for line in range(document.line_count)] == [None, MODIFIED, None, ADDED, DELETED]
+
+
+def test_random_edits():
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "", "delta"]
+    base = [rng.choice(words) for _ in range(60)]
+    lines = list(base)
+    document = PieceTable("\n".join(lines))
+    diff = LineDiff(base, document.snapshot())
+    check_hunks(base, lines, diff.hunks)
+    region = None
+    for step in range(1000):
+        line = rng.randrange(len(lines))
+        removed = rng.randint(0, min(2, len(lines) - 1 - line))
+        added = rng.randint(0, 2)
+        inserted = [rng.choice(words) for _ in range(added + 1)]
+        start = document.line_start(line)
+        document.delete(start, document.line_end(line + removed) - start)
+        document.insert(start, "\n".join(inserted))
+        lines[line:line + removed + 1] = inserted
+        region = merge_edit(region, line, removed, added)
+        # a batch of edits at a time, like the worker thread gets them
+        if rng.random() < 0.3:
+            diff.update(document.snapshot(), region)
+            region = None
+            check_hunks(base, lines, diff.hunks)
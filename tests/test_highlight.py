@@ -0,0 +1,69 @@
+import random
+from pathlib import Path
+
+from core.highlight import LineStates, language_for_path, lex_states
+
+PIECES = ["/*", "*/", "x", " ", "//", '"', "1"]
+
+
+def random_line(rng):
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 4)))
+
+
+def check_random_edits(seed, steps=200):
+    rng = random.Random(seed)
+    lexer = language_for_path(Path("file.c")).lexer
+    lines = [random_line(rng) for _ in range(rng.randint(1, 8))]
+    cache = LineStates(lexer)
+    cache.edit(0, 0, len(lines) - 1)
+    for _ in range(steps):
+        # an edit on a line, removing and adding line breaks
+        line = rng.randrange(len(lines))
+        removed = rng.randint(0, min(2, len(lines) - 1 - line))
+        added = rng.randint(0, 2)
+        lines[line:line + removed + 1] = [random_line(rng) for _ in range(added + 1)]
+        cache.edit(line, removed, added)
+        if rng.random() < 0.5:
+            continue
+        last = rng.randrange(len(lines))
+        cache.update(lambda n: lines[n], last)
+        expected = [None] + lex_states(lexer, lines[:last], None)
+        assert cache.states[:last + 1] == expected
+
+
+def test_edit_below_the_lines_updated():
+    lexer = language_for_path(Path("file.c")).lexer
+    lines = ["/*", "", ""]
+    cache = LineStates(lexer)
+    cache.edit(0, 0, 2)
+    cache.update(lambda n: lines[n], 2)
+    # an edit without line breaks on a line past the ones brought up to date
+    lines[1] = "*/"
+    cache.edit(1, 0, 0)
+    cache.update(lambda n: lines[n], 0)
+    lines[0] = ""
+    cache.edit(0, 0, 0)
+    cache.update(lambda n: lines[n], 2)
+    assert cache.states[:3] == [None] + lex_states(lexer, lines[:2], None)
+
+
+def test_converge_on_states_lexed_since_the_edit():
+    lexer = language_for_path(Path("file.c")).lexer
+    lines = [""] * 6
+    cache = LineStates(lexer)
+    cache.edit(0, 0, 5)
+    cache.update(lambda n: lines[n], 5)
+    # re-lexed part of the way, lines 2 and 3 get states of the new text
+    lines[1] = "/*"
+    cache.edit(1, 0, 0)
+    cache.update(lambda n: lines[n], 3)
+    # matching them again says nothing of the lines past them
+    lines[0] = "x"
+    cache.edit(0, 0, 0)
+    cache.update(lambda n: lines[n], 5)
+    assert cache.states[:6] == [None] + lex_states(lexer, lines[:5], None)
+
+
+def test_random_edits():
+    for seed in range(300):
+        check_random_edits(seed)
@@ -0,0 +1,98 @@
+import random
+
+from core.journal import Journal, JournalWriter, file_stamp, journal_path, read_journal, unfinished_journals
+from core.piecetable import PieceTable
+
+
+def replay(text, edits):
+    document = PieceTable(text)
+    for action, offset, value in edits:
+        if action == "i":
+            document.insert(offset, value)
+        else:
+            document.delete(offset, value)
+    return document.get_text()
+
+
+def edit_randomly(rng, document, journal, steps):
+    for _ in range(steps):
+        if len(document) and rng.random() < 0.4:
+            offset = rng.randrange(len(document))
+            length = rng.randint(1, min(5, len(document) - offset))
+            document.delete(offset, length)
+            journal.delete(offset, length)
+        else:
+            offset = rng.randint(0, len(document))
+            text = rng.choice(["x", "é", "\n", "word ", "“quoted”"])
+            document.insert(offset, text)
+            journal.insert(offset, text)
+
+
+def test_replay_and_compact(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / "file.txt"
+    original = "first line\r\nsecond lïne\r\n"
+    path.write_bytes(original.encode("utf-8"))
+    directory = tmp_path / "journal"
+    writer = JournalWriter()
+    journal = Journal(writer, journal_path(directory, path), path, "utf-8", "\r\n")
+    document = PieceTable(original.replace("\r\n", "\n"))
+
+    edit_randomly(rng, document, journal, 300)
+    assert journal.dirty
+    journal.close()
+    writer.close()
+    # as found after a crash: the file as it was, and the edits to replay on it
+    [(found, header, edits)] = unfinished_journals(directory)
+    assert found == journal_path(directory, path)
+    assert (header["size"], header["mtime_ns"]) == file_stamp(path)
+    assert header["encoding"] == "utf-8" and header["newline"] == "\r\n"
+    assert replay(original.replace("\r\n", "\n"), edits) == document.get_text()
+
+    # saving writes the document in the file's encoding and line endings, and starts the journal over
+    writer = JournalWriter()
+    journal = Journal(writer, journal_path(directory, path), path, "utf-8", "\r\n", resume=True)
+    journal.compact(document.snapshot())
+    journal.close()
+    writer.close()
+    assert journal.error is None and not journal.dirty
+    assert path.read_bytes() == document.get_text().replace("\n", "\r\n").encode("utf-8")
+    header, edits = read_journal(journal_path(directory, path))
+    assert edits == []
+    assert (header["size"], header["mtime_ns"]) == file_stamp(path)
+    assert list(unfinished_journals(directory)) == []
+    assert not journal_path(directory, path).exists()
+
+
+def test_half_written_last_line(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("abc")
+    writer = JournalWriter()
+    journal = Journal(writer, tmp_path / "file.journal", path, "utf-8", "\n")
+    journal.insert(3, "def")
+    journal.delete(0, 1)
+    journal.close()
+    writer.close()
+    with open(tmp_path / "file.journal", "a", encoding="utf-8") as fp:
+        fp.write('["i", 2, "unfini')
+    header, edits = read_journal(tmp_path / "file.journal")
+    assert edits == [["i", 3, "def"], ["d", 0, 1]]
+    assert replay("abc", edits) == "bcdef"
+
+
+def test_compact_keeps_the_edits_on_error(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("abc")
+    writer = JournalWriter()
+    journal = Journal(writer, tmp_path / "file.journal", path, "ascii", "\n")
+    document = PieceTable("abc")
+    document.insert(3, "é")
+    journal.insert(3, "é")
+    journal.compact(document.snapshot())
+    journal.close()
+    writer.close()
+    # not encodable in ascii: the file is left alone
+    assert isinstance(journal.error, UnicodeEncodeError)
+    assert journal.dirty
+    assert path.read_text() == "abc"
+    assert read_journal(tmp_path / "file.journal")[1] == [["i", 3, "é"]]
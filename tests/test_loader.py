@@ -0,0 +1,44 @@
+import codecs
+
+from core.loader import RESTART, SNIFF_SIZE, FileLoader
+
+
+def read_all(path):
+    loader = FileLoader(path)
+    chunks = []
+    while True:
+        chunk = loader.chunks.get(timeout=10)
+        if chunk is None:
+            return loader, chunks
+        chunks.append(chunk)
+
+
+def text_after_restarts(chunks):
+    text = []
+    for chunk in chunks:
+        text = [] if chunk is RESTART else text + [chunk]
+    return "".join(text)
+
+
+def test_utf8(tmp_path):
+    path = tmp_path / "utf8.txt"
+    path.write_bytes("naïve café\r\n".encode("utf-8") * 50_000)
+    loader, chunks = read_all(path)
+    assert loader.encoding == "utf-8"
+    assert loader.newline == "\r\n"
+    assert RESTART not in chunks
+    assert "".join(chunks) == "naïve café\n" * 50_000
+
+
+def test_invalid_utf8_past_the_sniffed_start(tmp_path):
+    data = "héllo wörld\n".encode("utf-8") * (SNIFF_SIZE // 8) + b"caf\xe9\n" + b"tail\n"
+    path = tmp_path / "latin1.txt"
+    path.write_bytes(data)
+    loader, chunks = read_all(path)
+    assert loader.error is None
+    assert loader.encoding == "latin-1"
+    assert RESTART in chunks
+    text = text_after_restarts(chunks)
+    assert "�" not in text
+    # saving writes back exactly the bytes read
+    assert codecs.encode(text, loader.encoding) == data
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from core.piecetable import OWN_BUFFER_SIZE, PieceTable
+
+
+def position(text, offset):
+    before = text[:offset]
+    return before.count("\n"), offset - (before.rfind("\n") + 1)
+
+
+def check(table, text):
+    assert len(table) == len(text)
+    assert table.get_text() == text
+    lines = text.split("\n")
+    assert table.line_count == len(lines)
+    offset = 0
+    for n, line in enumerate(lines):
+        assert table.line_start(n) == offset
+        assert table.line_end(n) == offset + len(line)
+        assert table.line_text(n) == line
+        offset += len(line) + 1
+
+
+def test_empty():
+    table = PieceTable()
+    check(table, "")
+    assert table.offset_to_position(0) == (0, 0)
+
+
+def test_random_edits_against_a_string():
+    rng = random.Random(0)
+    alphabet = "ab\nc d\n"
+    text = "".join(rng.choice(alphabet) for _ in range(200))
+    table = PieceTable(text)
+    for step in range(2000):
+        if text and rng.random() < 0.4:
+            start = rng.randrange(len(text))
+            length = rng.randint(1, min(20, len(text) - start))
+            table.delete(start, length)
+            text = text[:start] + text[start + length:]
+        else:
+            offset = rng.randint(0, len(text))
+            # now and then one long enough to get a buffer of its own
+            size = OWN_BUFFER_SIZE if step % 500 == 0 else rng.randint(1, 10)
+            inserted = "".join(rng.choice(alphabet) for _ in range(size))
+            table.insert(offset, inserted)
+            text = text[:offset] + inserted + text[offset:]
+        if step % 100 == 0:
+            check(table, text)
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, len(text))
+        assert table.get_text(start, end) == text[start:end]
+        assert table.offset_to_position(start) == position(text, start)
+        assert table.position_to_offset(*position(text, end)) == end
+    check(table, text)
+
+
+def test_snapshots_keep_their_text():
+    rng = random.Random(1)
+    table = PieceTable("first line\nsecond line\n")
+    snapshots = []
+    for _ in range(200):
+        snapshot = table.snapshot()
+        snapshots.append((snapshot, snapshot.get_text()))
+        assert table.unchanged_since(snapshot)
+        offset = rng.randint(0, len(table))
+        if rng.random() < 0.5 and offset < len(table):
+            table.delete(offset, 1)
+        else:
+            table.insert(offset, rng.choice(["x", "\n", "yz"]))
+        assert not table.unchanged_since(snapshot)
+    for snapshot, text in snapshots:
+        check(snapshot, text)
+
+
+def test_out_of_range():
+    table = PieceTable("abc\ndef")
+    with pytest.raises(IndexError):
+        table.insert(8, "x")
+    with pytest.raises(IndexError):
+        table.delete(5, 3)
+    with pytest.raises(IndexError):
+        table.line_start(2)
+    with pytest.raises(IndexError):
+        table.offset_to_position(-1)
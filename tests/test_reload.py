@@ -0,0 +1,71 @@
+import os
+
+from core.journal import Journal, JournalWriter
+from core.piecetable import PieceTable
+from core.reload import read_changes
+
+
+def apply(document, changes):
+    if changes.kind == "append":
+        document.insert(len(document), changes.edits)
+    elif changes.kind == "patch":
+        for first, removed, text in changes.edits:
+            start = document.line_start(first)
+            end = document.line_start(first + removed) if first + removed < document.line_count else len(document)
+            document.delete(start, end - start)
+            document.insert(start, text)
+
+
+def rewrite(path, data):
+    path.write_bytes(data)
+    # a stamp of its own even on file systems with a coarse mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def reload_and_save(tmp_path, old, new):
+    """Reload the file after it went from `old` to `new` on disk, then save it, returning what was saved"""
+    path = tmp_path / "file.txt"
+    path.write_bytes(old)
+    document = PieceTable(old.decode("utf-8"))
+    writer = JournalWriter()
+    journal = Journal(writer, tmp_path / "journal" / "file.journal", path, "utf-8", "\n")
+
+    stamp = journal.stamp
+    rewrite(path, new)
+    changes = read_changes(path, document.snapshot(), stamp, journal.encoding, journal.newline)
+    apply(document, changes)
+    journal.restart(changes.stamp, changes.encoding if changes.encoding != journal.encoding else None)
+    assert "�" not in document.get_text()
+
+    # a save of its own, told apart from the file read
+    rewrite(path, b"")
+    journal.compact(document.snapshot())
+    writer.close()
+    assert journal.error is None
+    return changes, path.read_bytes()
+
+
+def test_patch_with_an_invalid_byte(tmp_path):
+    new = b"caf\xe9\nhello\n"
+    changes, saved = reload_and_save(tmp_path, b"hello\n", new)
+    assert changes.kind == "patch"
+    assert changes.encoding == "latin-1"
+    assert saved == new
+
+
+def test_append_with_an_invalid_byte(tmp_path):
+    old = "héllo\n".encode("utf-8")
+    new = old + b"caf\xe9\n"
+    changes, saved = reload_and_save(tmp_path, old, new)
+    assert changes.encoding == "latin-1"
+    assert saved == new
+
+
+def test_append(tmp_path):
+    old = "héllo\n".encode("utf-8")
+    new = old + "wörld\n".encode("utf-8")
+    changes, saved = reload_and_save(tmp_path, old, new)
+    assert changes.kind == "append"
+    assert changes.encoding == "utf-8"
+    assert saved == new
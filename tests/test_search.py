@@ -0,0 +1,40 @@
+import os
+
+from core.search import FileSearch, TrigramIndex, compile_query
+
+
+def search(root, paths, pattern, index):
+    file_search = FileSearch(str(root), paths, compile_query(pattern), index)
+    matches = []
+    while True:
+        batch = file_search.results.get(timeout=10)
+        if batch is None:
+            return file_search, matches
+        matches.extend(batch)
+
+
+def test_skips_files_without_the_trigrams(tmp_path):
+    (tmp_path / "a.py").write_text("hello\n")
+    (tmp_path / "b.py").write_text("needle\n")
+    index = TrigramIndex()
+    index.refresh(str(tmp_path), ["a.py", "b.py"])
+    file_search, matches = search(tmp_path, ["a.py", "b.py"], "needle", index)
+    assert matches == [("b.py", 0, 0, "needle")]
+    assert file_search.files_read == 1
+
+
+def test_reads_files_changed_since_indexed(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("hello\n")
+    index = TrigramIndex()
+    index.refresh(str(tmp_path), ["a.py"])
+    path.write_text("needle\n")
+    # a stamp of its own even on file systems with a coarse mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    file_search, matches = search(tmp_path, ["a.py"], "needle", index)
+    assert matches == [("a.py", 0, 0, "needle")]
+    assert file_search.files_read == 1
+    # and indexed again on the way
+    assert index.candidates(["a.py"], {"nee"}, str(tmp_path)) == ["a.py"]
+    assert index.candidates(["a.py"], {"hel"}, str(tmp_path)) == []
@@ -0,0 +1,78 @@
+import random
+import time
+from pathlib import Path
+
+from core.highlight import language_for_path
+from core.piecetable import PieceTable
+from core.symbols import CLASS, FUNCTION, SymbolIndex, extract, find_symbols, symbol_regex
+
+PYTHON = language_for_path(Path("module.py"))
+LINES = ["def compute(values):", "class Parser:", "    def parse(self):", "x = 1", "", "async def fetch():"]
+
+
+def built(document):
+    index = SymbolIndex(PYTHON)
+    index.build(document.snapshot())
+    deadline = time.monotonic() + 10
+    while not index.ready and time.monotonic() < deadline:
+        time.sleep(0.001)
+        index.update(document)
+    return index
+
+
+def found(index):
+    return [(index.line_of(symbol), symbol.column, symbol.name, symbol.kind) for symbol in index.symbols()]
+
+
+def scanned(text):
+    return [
+        (line, symbol.column, symbol.name, symbol.kind)
+        for line, symbols in extract(symbol_regex(PYTHON), text)
+        for symbol in symbols
+    ]
+
+
+def test_extract():
+    assert scanned("\n".join(LINES)) == [
+        (0, 4, "compute", FUNCTION),
+        (1, 6, "Parser", CLASS),
+        (2, 8, "parse", FUNCTION),
+        (5, 10, "fetch", FUNCTION),
+    ]
+
+
+def test_random_edits_against_a_scan():
+    rng = random.Random(0)
+    lines = [rng.choice(LINES) for _ in range(50)]
+    document = PieceTable("\n".join(lines))
+    index = built(document)
+    assert found(index) == scanned(document.get_text())
+    for step in range(500):
+        # replace lines [line, line + removed] with `added` + 1 others, as a single edit
+        line = rng.randrange(len(lines))
+        removed = rng.randint(0, min(3, len(lines) - 1 - line))
+        added = rng.randint(0, 3)
+        inserted = [rng.choice(LINES) + rng.choice(["", "x"]) for _ in range(added + 1)]
+        start = document.line_start(line)
+        document.delete(start, document.line_end(line + removed) - start)
+        document.insert(start, "\n".join(inserted))
+        lines[line:line + removed + 1] = inserted
+        index.edit(line, removed, added)
+        if rng.random() < 0.3:
+            index.update(document)
+            assert found(index) == scanned(document.get_text())
+    index.update(document)
+    assert found(index) == scanned(document.get_text())
+    assert len(index) == len(index.symbols())
+    # the catalogs only hold the live symbols
+    matches = [symbol.name for _, symbol in find_symbols([index], "parse", limit=1000)]
+    assert sorted(matches) == sorted(name for _, _, name, _ in scanned(document.get_text()) if "parse" in name.lower())
+
+
+def test_find_symbols_tiers():
+    index = built(PieceTable("def parse():\ndef sparse():\ndef parse_all():\ndef pxaxrxsxe():\ndef other():"))
+    names = [symbol.name for _, symbol in find_symbols([index], "parse")]
+    # prefix first, then substring, then the characters in order, shortest first in each
+    assert names == ["parse", "parse_all", "sparse", "pxaxrxsxe"]
+    assert [symbol.name for _, symbol in find_symbols([index], "PARSE", limit=2)] == ["parse", "parse_all"]
+    assert find_symbols([index], "zzz") == []
@@ -0,0 +1,125 @@
+from core.undo import UndoBudget, UndoGroup, UndoHistory
+
+
+def type_text(history, text, line=1):
+    for col, char in enumerate(text):
+        history.record("insert", f"{line}.{col}", char)
+
+
+def paste(history, n, size=100):
+    history.separator()
+    history.record("insert", f"{n + 1}.0", f"{n:>{size}}")
+
+
+def test_typing_is_one_group_per_word():
+    history = UndoHistory(1 << 20)
+    type_text(history, "hello world")
+    assert [group.edits for group in history.undo_stack] == [
+        [["insert", "1.0", "hello "]],
+        [["insert", "1.6", "world"]],
+    ]
+
+
+def test_backspace_and_delete_merge():
+    history = UndoHistory(1 << 20)
+    history.record("delete", "1.4", "o")
+    history.record("delete", "1.3", "l")
+    history.record("delete", "1.3", "x")
+    assert [group.edits for group in history.undo_stack] == [[["delete", "1.3", "lox"]]]
+
+
+def test_undo_and_redo():
+    history = UndoHistory(1 << 20)
+    paste(history, 0)
+    paste(history, 1)
+    assert history.undo().edits == [["insert", "2.0", f"{1:>100}"]]
+    assert history.redo().edits == [["insert", "2.0", f"{1:>100}"]]
+    history.undo()
+    # an edit drops what was undone
+    paste(history, 2)
+    assert not history.can_redo
+    assert [group.edits[0][1] for group in history.undo_stack] == ["1.0", "3.0"]
+
+
+def test_group_round_trip():
+    group = UndoGroup(7, [["insert", "1.0", "héllo\n"], ["delete", "2.3", "x"]])
+    copy = UndoGroup.from_bytes(group.to_bytes())
+    assert copy.sequence == 7
+    assert copy.edits == group.edits
+    assert copy.size == group.size
+
+
+def test_limit_drops_the_oldest_groups():
+    history = UndoHistory(2000)
+    for n in range(50):
+        paste(history, n)
+    assert history.size <= 2000
+    assert history.size == sum(group.size for group in history.undo_stack)
+    undone = [history.undo() for _ in range(len(history.undo_stack))]
+    assert [group.edits[0][1] for group in undone] == [f"{n + 1}.0" for n in reversed(range(50 - len(undone), 50))]
+    assert history.undo() is None
+
+
+def test_spill_and_back():
+    history = UndoHistory(2000, spill=True)
+    for n in range(50):
+        paste(history, n)
+    assert len(history.journal) > 0
+    assert history.size <= 2000
+    # everything comes back, newest first, from memory and then from the journal
+    undone = []
+    while history.can_undo:
+        undone.append(history.undo())
+    assert [group.edits[0][2] for group in undone] == [f"{n:>100}" for n in reversed(range(50))]
+    assert len(history.journal) == 0
+    history.close()
+
+
+def test_budget_evicts_the_oldest_group_of_any_history():
+    budget = UndoBudget(3000)
+    first = UndoHistory(1 << 20, budget)
+    second = UndoHistory(1 << 20, budget)
+    for n in range(10):
+        paste(first, n)
+        paste(second, n)
+    assert budget.size <= 3000
+    assert budget.size == first.size + second.size
+    # the newest groups of both are kept
+    assert first.undo_stack[-1].edits[0][1] == second.undo_stack[-1].edits[0][1] == "10.0"
+    assert abs(len(first.undo_stack) - len(second.undo_stack)) <= 1
+    first.close()
+    assert budget.size == second.size
+
+
+def test_redo_groups_count():
+    history = UndoHistory(2000, spill=True)
+    for n in range(15):
+        paste(history, n)
+    # reading the groups back from the journal fills the redo stack past the limit
+    while history.undo() is not None:
+        pass
+    assert history.size <= 2000
+    assert history.size == sum(group.size for group in history.redo_stack)
+    # the ones dropped are those undone first, redo still goes in order from the oldest
+    redone = [history.redo().edits[0][1] for _ in range(len(history.redo_stack))]
+    assert redone == [f"{n + 1}.0" for n in range(len(redone))]
+    assert 1 < len(redone) < 15
+    history.close()
+
+
+def test_budget_drops_redo_groups_first():
+    budget = UndoBudget(5000)
+    first = UndoHistory(1 << 20, budget)
+    second = UndoHistory(1 << 20, budget)
+    for n in range(10):
+        paste(first, n)
+    for _ in range(10):
+        first.undo()
+    for n in range(10):
+        paste(second, n)
+    assert budget.size <= 5000
+    assert budget.size == first.size + second.size
+    # rather than any of the groups still to undo
+    assert len(second.undo_stack) == 10
+    assert 0 < len(first.redo_stack) < 10
+    assert first.redo().edits[0][1] == "1.0"
@@ -0,0 +1,78 @@
+import random
+from collections import Counter
+
+from core.words import DocumentWords, WordIndex, find_words, word_context
+
+
+def test_find_words():
+    assert find_words("def compute(values): return x1 + _total2 + 3abc") == [
+        "def", "compute", "values", "return", "_total2",
+    ]
+
+
+def test_word_context():
+    assert word_context("print(val", "ues)") == ("val", "ues")
+    assert word_context("print(", " x") == ("", "")
+
+
+def test_complete_by_frequency():
+    index = WordIndex()
+    DocumentWords(index).edit("", "values value valued value valuable")
+    # ties in alphabetical order
+    assert index.complete("val") == ["value", "valuable", "valued", "values"]
+    assert index.complete("value") == ["valued", "values"]
+    assert index.complete("xyz") == []
+
+
+def test_documents_share_the_index():
+    index = WordIndex()
+    first, second = DocumentWords(index), DocumentWords(index)
+    first.edit("", "shared alpha")
+    second.edit("", "shared beta")
+    assert index.counts == {"shared": 2, "alpha": 1, "beta": 1}
+    first.close()
+    assert index.counts == {"shared": 1, "beta": 1}
+    assert index.words == ["beta", "shared"]
+
+
+def test_words_left_out_while_full():
+    index = WordIndex(max_bytes=1)
+    first = DocumentWords(index)
+    first.edit("", "skipped")
+    assert index.counts == {}
+    assert first.counts == {}
+    # memory freed up, another document puts the word in
+    index.max_bytes = None
+    second = DocumentWords(index)
+    second.edit("", "skipped")
+    first.edit("skipped", "")
+    first.close()
+    assert index.counts == {"skipped": 1}
+    second.close()
+    assert index.counts == {}
+
+
+def test_random_edits():
+    rng = random.Random(0)
+    vocabulary = ["alpha", "beta", "gamma", "delta", "alphabet", "be", "x1"]
+    index = WordIndex()
+    documents = [(DocumentWords(index), [""]) for _ in range(3)]
+    for _ in range(500):
+        words, text = rng.choice(documents)
+        # an edit cut at word boundaries: replace a run of whole tokens
+        tokens = text[0].split(" ") if text[0] else []
+        start = rng.randint(0, len(tokens))
+        end = rng.randint(start, min(len(tokens), start + 3))
+        inserted = [rng.choice(vocabulary) for _ in range(rng.randint(0, 3))]
+        words.edit(" ".join(tokens[start:end]), " ".join(inserted))
+        text[0] = " ".join(tokens[:start] + inserted + tokens[end:])
+        expected = Counter()
+        for _, other in documents:
+            expected.update(find_words(other[0]))
+        assert index.counts == expected
+        assert index.words == sorted(expected)
+    for words, _ in documents:
+        words.close()
+    assert index.counts == {}
+    assert index.words == []
+    assert index.tokens == 0